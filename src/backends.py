@@ -0,0 +1,1084 @@
+import numpy as np
+
+from jobs import check_token
+from profiling import stage
+
+JITTER_MAX = 10
+CHECK_INTERVAL = 16
+CYCLE_TOLERANCE = 1e-12
+NUMBA_CHUNK_SIZE = 65536
+
+
+class KernelStats:
+    """
+    Counts of the iterations skipped by the interior shortcuts of the escape-time kernels and by subdivision.
+
+    Attributes:
+        interior_points (int): The number of points found inside the main cardioid or the period-2 bulb.
+        periodic_points (int): The number of points whose orbit was caught repeating itself.
+        filled_points (int): The number of points filled in by rectangle subdivision without iterating.
+        saved_iterations (int): The number of iterations these points did not have to run.
+    """
+
+    def __init__(self):
+        """
+        Initialize all counts to zero.
+        """
+        self.interior_points = 0
+        self.periodic_points = 0
+        self.filled_points = 0
+        self.saved_iterations = 0
+
+    def add(self, other):
+        """
+        Add the counts of another KernelStats to these.
+
+        Args:
+            other (KernelStats): The counts to add.
+        """
+        self.interior_points += other.interior_points
+        self.periodic_points += other.periodic_points
+        self.filled_points += other.filled_points
+        self.saved_iterations += other.saved_iterations
+
+    def summary(self):
+        """
+        Describe the counts.
+
+        Returns:
+            str: The number of saved iterations and of the points that saved them.
+        """
+        summary = (f"interior shortcuts saved {self.saved_iterations} iterations ({self.interior_points} cardioid "
+                   f"and bulb points, {self.periodic_points} periodic points")
+        if self.filled_points:
+            summary += f", {self.filled_points} points filled by subdivision"
+        return summary + ")"
+
+
+_interior_checks = True
+
+
+def set_interior_checks(enabled):
+    """
+    Enable or disable the interior shortcuts of the escape-time kernels, for example to compare with brute force.
+
+    Args:
+        enabled (bool): Whether calculations skip the points shown to be inside the set.
+    """
+    global _interior_checks
+    _interior_checks = bool(enabled)
+
+
+def get_interior_checks():
+    """
+    Check whether the interior shortcuts of the escape-time kernels are enabled.
+
+    Returns:
+        bool: True if they are enabled.
+    """
+    return _interior_checks
+
+
+_cycle_checks = True
+
+
+def set_cycle_checks(enabled):
+    """
+    Enable or disable the cycle detection of the logistic kernels, for example to compare with brute force.
+
+    Args:
+        enabled (bool): Whether calculations stop iterating the r values whose orbit repeats itself.
+    """
+    global _cycle_checks
+    _cycle_checks = bool(enabled)
+
+
+def get_cycle_checks():
+    """
+    Check whether the cycle detection of the logistic kernels is enabled.
+
+    Returns:
+        bool: True if it is enabled.
+    """
+    return _cycle_checks
+
+
+def interior_mask(c):
+    """
+    Find the points lying strictly inside the main cardioid or the period-2 bulb of the Mandelbrot set.
+
+    These points never escape, so their iteration count is known without iterating.
+
+    Args:
+        c (np.ndarray): The complex points.
+
+    Returns:
+        np.ndarray: Boolean mask of the points inside, with the shape of `c`.
+    """
+    x = c.real.astype(np.float64)
+    y = c.imag.astype(np.float64)
+    x_shifted = x - 0.25
+    q = x_shifted * x_shifted + y * y
+    in_cardioid = q * (q + x_shifted) < 0.25 * y * y
+    in_bulb = (x + 1) * (x + 1) + y * y < 0.0625
+    return in_cardioid | in_bulb
+
+
+def escape_time_kernel(c, precision, token=None, stats=None, shortcuts=None, z=None, start=0):
+    """
+    Compute Mandelbrot iteration counts, iterating only the points that have not escaped yet.
+
+    Escaped points are dropped from the working arrays as soon as they are detected, so each iteration
+    costs time proportional to the number of live points rather than to the size of the grid.
+    A point that first reaches |z| >= 2 before iteration i gets the count i - 1; a point that never
+    escapes gets precision - 1.
+
+    With the interior shortcuts, points inside the main cardioid or the period-2 bulb are never iterated,
+    and a point whose z exactly equals a value it had before is dropped as periodic. Its orbit repeats forever
+    in the same arithmetic, so it never escapes and the counts are identical to those without shortcuts.
+
+    Given `z`, the iteration continues from the values it holds after `start` iterations, and `z` receives the
+    final values: the value at escape, NaN for points shown to be inside the set, and the value after
+    `precision` iterations for the other points. Continuing a calculation this way gives the same counts as
+    starting over with the higher precision.
+
+    Args:
+        c (np.ndarray): The complex points, of any shape.
+        precision (int): The maximum number of iterations.
+        token (CancelToken, optional): Token checked every CHECK_INTERVAL iterations. Defaults to None.
+        stats (KernelStats, optional): Counts updated with the work skipped by the shortcuts. Defaults to None.
+        shortcuts (bool, optional): Whether to use the interior shortcuts. Defaults to None (get_interior_checks()).
+        z (np.ndarray, optional): complex64 values of the points after `start` iterations, with the shape of `c`,
+            updated in place. Defaults to None (start from zero and discard the final values).
+        start (int): The number of iterations already done. Defaults to 0.
+
+    Returns:
+        np.ndarray: The iteration count of every point, with the shape of `c`.
+    """
+    c = np.asarray(c, dtype=np.complex64)
+    m = np.full(c.size, precision, dtype=np.int32)
+    z_out = np.full(c.size, np.nan, dtype=np.complex64)
+    if shortcuts is None:
+        shortcuts = _interior_checks
+
+    live = np.arange(c.size)
+    c_live = c.ravel()
+    z_live = np.zeros_like(c_live) if z is None else np.asarray(z, dtype=np.complex64).ravel().copy()
+    if shortcuts and precision > start:
+        inside = interior_mask(c_live)
+        if stats is not None:
+            stats.interior_points += int(inside.sum())
+            stats.saved_iterations += int(inside.sum()) * (precision - start)
+        live, c_live, z_live = live[~inside], c_live[~inside], z_live[~inside]
+    z_saved = z_live.copy()
+    next_save = max(2 * start, 1)
+
+    with np.errstate(over='ignore', invalid='ignore'):
+        for i in range(start, precision):
+            if (i - start) % CHECK_INTERVAL == 0:
+                check_token(token)
+
+            escaped = ~(np.abs(z_live) < 2)
+            done = escaped
+            if shortcuts and i > start:
+                periodic = ~escaped & (z_live == z_saved)
+                if periodic.any():
+                    if stats is not None:
+                        stats.periodic_points += int(periodic.sum())
+                        stats.saved_iterations += int(periodic.sum()) * (precision - i)
+                    done = escaped | periodic
+            if done.any():
+                m[live[escaped]] = i - 1
+                z_out[live[escaped]] = z_live[escaped]
+                kept = ~done
+                live, c_live, z_live, z_saved = live[kept], c_live[kept], z_live[kept], z_saved[kept]
+                if live.size == 0:
+                    break
+            if shortcuts and i == next_save:
+                z_saved[...] = z_live
+                next_save *= 2
+
+            np.multiply(z_live, z_live, out=z_live)
+            np.add(z_live, c_live, out=z_live)
+
+    z_out[live] = z_live
+    if z is not None:
+        z[...] = z_out.reshape(c.shape)
+    if precision > 0:
+        m[m == precision] = precision - 1
+
+    return m.reshape(c.shape)
+
+
+def logistic_kernel(r, x0, precision, jitter, token=None, shortcuts=None, periods=None):
+    """
+    Iterate the logistic map x -> r * x * (1 - x) for a whole array of r values at once.
+
+    Every lane runs `precision` iterations plus its own number of extra iterations taken from `jitter`.
+
+    With cycle detection, lanes whose orbit has converged to a fixed point or a cycle within CYCLE_TOLERANCE are
+    frozen after the few iterations that bring them to the cycle point their last iteration would reach, as
+    described in logistic_cycles, so the time goes to the lanes that are still chaotic. The final values differ
+    from those without cycle detection by little more than CYCLE_TOLERANCE, far below the resolution of a plot.
+
+    Args:
+        r (np.ndarray): The r values, one per lane.
+        x0 (float): The initial x value shared by all lanes.
+        precision (int): The number of iterations every lane performs.
+        jitter (np.ndarray): The number of extra iterations per lane, in the range [0, JITTER_MAX].
+        token (CancelToken, optional): Token checked every CHECK_INTERVAL iterations. Defaults to None.
+        shortcuts (bool, optional): Whether to use cycle detection. Defaults to None (get_cycle_checks()).
+        periods (np.ndarray, optional): Integer array with the shape of `r` receiving the period of every lane,
+            or 0 where no cycle was found. Defaults to None.
+
+    Returns:
+        np.ndarray: The final x value of every lane.
+    """
+    if shortcuts is None:
+        shortcuts = _cycle_checks
+    if shortcuts:
+        return logistic_cycles(r, x0, precision, jitter, token, periods)
+    if periods is not None:
+        periods[...] = 0
+
+    x = np.full(r.shape, x0, dtype=np.float64)
+    one_minus_x = np.empty_like(x)
+
+    with np.errstate(over='ignore', invalid='ignore'):
+        for i in range(precision):
+            if i % CHECK_INTERVAL == 0:
+                check_token(token)
+
+            np.subtract(1, x, out=one_minus_x)
+            np.multiply(r, x, out=x)
+            np.multiply(x, one_minus_x, out=x)
+
+        for k in range(JITTER_MAX):
+            live = jitter > k
+            if not live.any():
+                break
+            x[live] = r[live] * x[live] * (1 - x[live])
+
+    return x
+
+
+def logistic_cycles(r, x0, precision, jitter, token=None, periods=None):
+    """
+    Iterate the logistic map for a whole array of r values, freezing the lanes whose orbit has converged to a cycle.
+
+    Lanes run blocks of CHECK_INTERVAL iterations without any check. After a block every lane compares its value
+    with its value one block earlier, then with the one saved after block 1, 2, 4, 8, ...; a lane within
+    CYCLE_TOLERANCE of either has converged. It walks its cycle once to find the period, is advanced by its
+    remaining iterations modulo the period and leaves the working arrays. See logistic_kernel for the arguments.
+
+    Returns:
+        np.ndarray: The final x value of every lane.
+    """
+    r_all = np.asarray(r, dtype=np.float64).ravel()
+    total_all = precision + np.asarray(jitter, dtype=np.int64).ravel()
+    x_out = np.empty(r_all.size, dtype=np.float64)
+    period_out = np.zeros(r_all.size, dtype=np.int64)
+
+    live = np.arange(r_all.size)
+    r_live = r_all
+    x = np.full(r_all.size, x0, dtype=np.float64)
+    one_minus_x = np.empty_like(x)
+    previous = x.copy()
+    saved = x.copy()
+    saved_at = 0
+    blocks = 0
+    next_save = 1
+
+    with np.errstate(over='ignore', invalid='ignore'):
+        i = 0
+        while i + CHECK_INTERVAL <= precision and live.size:
+            check_token(token)
+            for _ in range(CHECK_INTERVAL):
+                np.subtract(1, x, out=one_minus_x)
+                np.multiply(r_live, x, out=x)
+                np.multiply(x, one_minus_x, out=x)
+            i += CHECK_INTERVAL
+            blocks += 1
+
+            near_previous = np.abs(x - previous) <= CYCLE_TOLERANCE
+            converged = near_previous | (np.abs(x - saved) <= CYCLE_TOLERANCE)
+            if converged.any():
+                index = live[converged]
+                window = np.where(near_previous[converged], CHECK_INTERVAL, i - saved_at)
+                period = cycle_periods(r_live[converged], x[converged], window)
+                period_out[index] = period
+                x_out[index] = advance_logistic(r_live[converged], x[converged], (total_all[index] - i) % period)
+                kept = ~converged
+                live, r_live, x, saved = live[kept], r_live[kept], x[kept], saved[kept]
+                one_minus_x = np.empty_like(x)
+            previous = x.copy()
+            if blocks == next_save:
+                saved = x.copy()
+                saved_at = i
+                next_save *= 2
+
+        x_out[live] = advance_logistic(r_live, x, total_all[live] - i, token)
+
+    if periods is not None:
+        periods[...] = period_out.reshape(np.shape(r))
+    return x_out.reshape(np.shape(r))
+
+
+def cycle_periods(r, x, window):
+    """
+    Find the periods of converged logistic orbits, by walking them from a point of the cycle.
+
+    Args:
+        r (np.ndarray): The r values.
+        x (np.ndarray): A point of the cycle of every r.
+        window (np.ndarray): A number of iterations after which every orbit is known to come back to its point.
+
+    Returns:
+        np.ndarray: The smallest number of iterations bringing every orbit back within CYCLE_TOLERANCE of its
+            point, or its window if none does.
+    """
+    period = np.zeros(r.size, dtype=np.int64)
+    y = x.copy()
+    for k in range(1, int(window.max()) + 1):
+        y = r * y * (1 - y)
+        period[(period == 0) & (np.abs(y - x) <= CYCLE_TOLERANCE)] = k
+        if period.all():
+            break
+    return np.where(period == 0, window, period)
+
+
+def advance_logistic(r, x, steps, token=None):
+    """
+    Iterate the logistic map a different number of times for every r.
+
+    Args:
+        r (np.ndarray): The r values.
+        x (np.ndarray): The current x values.
+        steps (np.ndarray): The number of iterations of every r.
+        token (CancelToken, optional): Token checked every CHECK_INTERVAL iterations. Defaults to None.
+
+    Returns:
+        np.ndarray: The x values after the iterations.
+    """
+    x = x.copy()
+    for k in range(int(steps.max()) if steps.size else 0):
+        if k % CHECK_INTERVAL == 0:
+            check_token(token)
+        live = steps > k
+        x[live] = r[live] * x[live] * (1 - x[live])
+    return x
+
+
+def lyapunov_kernel(r, x0, precision, samples, token=None, shortcuts=None, periods=None):
+    """
+    Estimate the Lyapunov exponent of the logistic map for a whole array of r values at once.
+
+    Every lane iterates `precision` times from x0 to leave the transient, then `samples` more times while it
+    multiplies together the derivatives |r (1 - 2 x)| of its orbit, in the same loop. The product is split into
+    mantissa and exponent after every block of iterations, so only one logarithm per lane is taken.
+
+    With cycle detection, lanes are checked after every block as in logistic_cycles, during the transient as well
+    as during the sampling. A lane that has converged to a cycle leaves the working arrays and gets the exponent of
+    its cycle, averaged over one walk around it, so the time goes to the chaotic lanes.
+
+    Args:
+        r (np.ndarray): The r values, one per lane.
+        x0 (float): The initial x value shared by all lanes.
+        precision (int): The number of transient iterations of every lane.
+        samples (int): The number of iterations averaged for the lanes without a cycle, at least 1.
+        token (CancelToken, optional): Token checked every CHECK_INTERVAL iterations. Defaults to None.
+        shortcuts (bool, optional): Whether to use cycle detection. Defaults to None (get_cycle_checks()).
+        periods (np.ndarray, optional): Integer array with the shape of `r` receiving the period of every lane,
+            or 0 where no cycle was found. Defaults to None.
+
+    Returns:
+        np.ndarray: The Lyapunov exponent of every lane, -inf where the orbit meets a zero derivative.
+    """
+    if shortcuts is None:
+        shortcuts = _cycle_checks
+    samples = max(samples, 1)
+    total = precision + samples
+    r_all = np.asarray(r, dtype=np.float64).ravel()
+    exponents = np.empty(r_all.size, dtype=np.float64)
+    period_out = np.zeros(r_all.size, dtype=np.int64)
+
+    live = np.arange(r_all.size)
+    r_live = r_all
+    x = np.full(r_all.size, x0, dtype=np.float64)
+    product = np.ones(r_all.size)
+    exponent = np.zeros(r_all.size)
+    scratch = np.empty_like(x)
+    previous = x.copy()
+    saved = x.copy()
+    saved_at = 0
+    blocks = 0
+    next_save = 1
+
+    with np.errstate(over='ignore', invalid='ignore', divide='ignore'):
+        i = 0
+        while i < total and live.size:
+            check_token(token)
+            sampling = i >= precision
+            block = min(CHECK_INTERVAL, (total if sampling else precision) - i)
+            for _ in range(block):
+                if sampling:
+                    np.multiply(x, -2, out=scratch)
+                    scratch += 1
+                    scratch *= r_live
+                    product *= np.abs(scratch, out=scratch)
+                np.subtract(1, x, out=scratch)
+                x *= r_live
+                x *= scratch
+            if sampling:
+                product, block_exponent = np.frexp(product)
+                exponent += block_exponent
+            i += block
+            blocks += 1
+            if not shortcuts:
+                continue
+
+            near_previous = np.abs(x - previous) <= CYCLE_TOLERANCE
+            converged = near_previous | (np.abs(x - saved) <= CYCLE_TOLERANCE)
+            if converged.any():
+                index = live[converged]
+                window = np.where(near_previous[converged], block, i - saved_at)
+                period = cycle_periods(r_live[converged], x[converged], window)
+                period_out[index] = period
+                exponents[index] = cycle_exponents(r_live[converged], x[converged], period)
+                kept = ~converged
+                live, r_live, x, saved = live[kept], r_live[kept], x[kept], saved[kept]
+                product, exponent = product[kept], exponent[kept]
+                scratch = np.empty_like(x)
+            previous = x.copy()
+            if blocks == next_save:
+                saved = x.copy()
+                saved_at = i
+                next_save *= 2
+
+        mantissa, block_exponent = np.frexp(product)
+        exponents[live] = (np.log2(mantissa) + exponent + block_exponent) * np.log(2) / samples
+
+    if periods is not None:
+        periods[...] = period_out.reshape(np.shape(periods))
+    return exponents.reshape(np.shape(r))
+
+
+def cycle_exponents(r, x, period):
+    """
+    Compute the Lyapunov exponents of logistic orbits that have converged to a cycle, by walking the cycle once.
+
+    Args:
+        r (np.ndarray): The r values.
+        x (np.ndarray): A point of the cycle of every r.
+        period (np.ndarray): The period of every cycle, at least 1.
+
+    Returns:
+        np.ndarray: The average of log |r (1 - 2 x)| over one period of every cycle.
+    """
+    total = np.zeros(r.size)
+    y = x.copy()
+    for k in range(int(period.max()) if period.size else 0):
+        live = period > k
+        total[live] += np.log(np.abs(r[live] * (1 - 2 * y[live])))
+        y[live] = r[live] * y[live] * (1 - y[live])
+    return total / period
+
+
+class NumpyBackend:
+    """
+    The default compute backend, implemented with plain NumPy.
+
+    Attributes:
+        name (str): The name of the backend.
+    """
+
+    name = "numpy"
+
+    def escape_time(self, c, precision, token=None, stats=None, shortcuts=None, z=None, start=0):
+        """
+        Compute Mandelbrot iteration counts for an array of complex points.
+
+        Args:
+            c (np.ndarray): The complex points.
+            precision (int): The maximum number of iterations.
+            token (CancelToken, optional): Token checked between iteration batches. Defaults to None.
+            stats (KernelStats, optional): Counts updated with the work skipped by the shortcuts. Defaults to None.
+            shortcuts (bool, optional): Whether to use the interior shortcuts. Defaults to None (the default).
+            z (np.ndarray, optional): Values of the points after `start` iterations, updated in place with the
+                final values as in escape_time_kernel. Defaults to None.
+            start (int): The number of iterations already done. Defaults to 0.
+
+        Returns:
+            np.ndarray: The iteration count of every point, with the shape of `c`.
+        """
+        return escape_time_kernel(c, precision, token, stats, shortcuts, z, start)
+
+    def logistic(self, r, x0, precision, jitter, token=None, shortcuts=None, periods=None):
+        """
+        Iterate the logistic map for an array of r values.
+
+        Args:
+            r (np.ndarray): The r values.
+            x0 (float): The initial x value.
+            precision (int): The number of iterations every lane performs.
+            jitter (np.ndarray): The number of extra iterations per lane.
+            token (CancelToken, optional): Token checked between iteration batches. Defaults to None.
+            shortcuts (bool, optional): Whether to use cycle detection. Defaults to None (the default).
+            periods (np.ndarray, optional): Array receiving the period of every lane, as in logistic_kernel.
+                Defaults to None.
+
+        Returns:
+            np.ndarray: The final x value of every lane.
+        """
+        return logistic_kernel(r, x0, precision, jitter, token, shortcuts, periods)
+
+    def lyapunov(self, r, x0, precision, samples, token=None, shortcuts=None, periods=None):
+        """
+        Estimate the Lyapunov exponent of the logistic map for an array of r values, transient included.
+
+        Args:
+            r (np.ndarray): The r values.
+            x0 (float): The initial x value.
+            precision (int): The number of transient iterations of every r.
+            samples (int): The number of iterations averaged for the r values without a cycle.
+            token (CancelToken, optional): Token checked between iteration batches. Defaults to None.
+            shortcuts (bool, optional): Whether to use cycle detection. Defaults to None (the default).
+            periods (np.ndarray, optional): Array receiving the period of every r, as in lyapunov_kernel.
+                Defaults to None.
+
+        Returns:
+            np.ndarray: The Lyapunov exponent of every r.
+        """
+        return lyapunov_kernel(r, x0, precision, samples, token, shortcuts, periods)
+
+
+class TensorFlowBackend:
+    """
+    A compute backend running the kernels as TensorFlow tensor operations.
+
+    TensorFlow is imported when the backend is created, never at module load.
+
+    Attributes:
+        name (str): The name of the backend.
+        tf: The imported TensorFlow module.
+    """
+
+    name = "tensorflow"
+
+    def __init__(self):
+        """
+        Import TensorFlow and initialize the backend.
+        """
+        import tensorflow as tf
+        self.tf = tf
+
+    def escape_time(self, c, precision, token=None, stats=None, shortcuts=None, z=None, start=0):
+        """
+        Compute Mandelbrot iteration counts for an array of complex points.
+
+        The loop runs over whole tensors, so of the interior shortcuts only the cardioid and bulb tests apply:
+        points inside them are left out of the tensors.
+
+        Args:
+            c (np.ndarray): The complex points.
+            precision (int): The maximum number of iterations.
+            token (CancelToken, optional): Token checked between iteration batches. Defaults to None.
+            stats (KernelStats, optional): Counts updated with the work skipped by the shortcuts. Defaults to None.
+            shortcuts (bool, optional): Whether to use the interior shortcuts. Defaults to None (the default).
+            z (np.ndarray, optional): Values of the points after `start` iterations, updated in place with the
+                final values as in escape_time_kernel. Defaults to None.
+            start (int): The number of iterations already done. Defaults to 0.
+
+        Returns:
+            np.ndarray: The iteration count of every point, with the shape of `c`.
+        """
+        c = np.asarray(c, dtype=np.complex64)
+        if shortcuts is None:
+            shortcuts = _interior_checks
+        if shortcuts and precision > start:
+            inside = interior_mask(c)
+            if stats is not None:
+                stats.interior_points += int(inside.sum())
+                stats.saved_iterations += int(inside.sum()) * (precision - start)
+            m = np.full(c.shape, precision - 1, dtype=np.int32)
+            z_outside = None if z is None else z[~inside]
+            m[~inside] = self.escape_time(c[~inside], precision, token, shortcuts=False, z=z_outside, start=start)
+            if z is not None:
+                z[inside] = np.nan
+                z[~inside] = z_outside
+            return m
+
+        tf = self.tf
+        c_tensor = tf.constant(c)
+        z_tensor = tf.zeros_like(c_tensor) if z is None else tf.constant(np.asarray(z, dtype=np.complex64))
+        m = tf.fill(c.shape, precision if start == 0 else start - 1)
+
+        for i in range(start, precision):
+            if (i - start) % CHECK_INTERVAL == 0:
+                check_token(token)
+
+            mask = tf.abs(z_tensor) < 2
+            z_tensor = tf.where(mask, z_tensor * z_tensor + c_tensor, z_tensor)
+            m = tf.where(mask, tf.fill(m.shape, i), m)
+
+        with stage("to numpy"):
+            if z is not None:
+                z[...] = z_tensor.numpy()
+            return m.numpy()
+
+    def logistic(self, r, x0, precision, jitter, token=None, shortcuts=None, periods=None):
+        """
+        Iterate the logistic map for an array of r values.
+
+        Cycle detection shrinks the set of live lanes after every block, which tensors of fixed shape cannot do,
+        so with it the iteration runs in logistic_cycles on the CPU.
+
+        Args:
+            r (np.ndarray): The r values.
+            x0 (float): The initial x value.
+            precision (int): The number of iterations every lane performs.
+            jitter (np.ndarray): The number of extra iterations per lane.
+            token (CancelToken, optional): Token checked between iteration batches. Defaults to None.
+            shortcuts (bool, optional): Whether to use cycle detection. Defaults to None (the default).
+            periods (np.ndarray, optional): Array receiving the period of every lane, as in logistic_kernel.
+                Defaults to None.
+
+        Returns:
+            np.ndarray: The final x value of every lane.
+        """
+        tf = self.tf
+        if shortcuts is None:
+            shortcuts = _cycle_checks
+        if shortcuts:
+            return logistic_cycles(r, x0, precision, jitter, token, periods)
+        if periods is not None:
+            periods[...] = 0
+
+        r = tf.constant(np.asarray(r, dtype=np.float64))
+        jitter = tf.constant(jitter)
+        x = tf.fill(r.shape, tf.constant(x0, dtype=tf.float64))
+
+        for i in range(precision):
+            if i % CHECK_INTERVAL == 0:
+                check_token(token)
+
+            x = r * x * (1 - x)
+        for k in range(JITTER_MAX):
+            x = tf.where(jitter > k, r * x * (1 - x), x)
+
+        with stage("to numpy"):
+            return x.numpy()
+
+    def lyapunov(self, r, x0, precision, samples, token=None, shortcuts=None, periods=None):
+        """
+        Estimate the Lyapunov exponent of the logistic map for an array of r values, transient included.
+
+        As for logistic, the cycle detection runs in lyapunov_kernel on the CPU.
+
+        Args:
+            r (np.ndarray): The r values.
+            x0 (float): The initial x value.
+            precision (int): The number of transient iterations of every r.
+            samples (int): The number of iterations averaged for the r values without a cycle.
+            token (CancelToken, optional): Token checked between iteration batches. Defaults to None.
+            shortcuts (bool, optional): Whether to use cycle detection. Defaults to None (the default).
+            periods (np.ndarray, optional): Array receiving the period of every r, as in lyapunov_kernel.
+                Defaults to None.
+
+        Returns:
+            np.ndarray: The Lyapunov exponent of every r.
+        """
+        tf = self.tf
+        if shortcuts is None:
+            shortcuts = _cycle_checks
+        if shortcuts:
+            return lyapunov_kernel(r, x0, precision, samples, token, True, periods)
+
+        samples = max(samples, 1)
+        r_tensor = tf.constant(np.asarray(r, dtype=np.float64))
+        x_tensor = tf.fill(tf.shape(r_tensor), tf.constant(x0, dtype=tf.float64))
+        total = tf.zeros_like(r_tensor)
+        if periods is not None:
+            periods[...] = 0
+
+        for i in range(precision + samples):
+            if i % CHECK_INTERVAL == 0:
+                check_token(token)
+            if i >= precision:
+                total += tf.math.log(tf.abs(r_tensor * (1 - 2 * x_tensor)))
+            x_tensor = r_tensor * x_tensor * (1 - x_tensor)
+
+        with stage("to numpy"):
+            return (total / samples).numpy()
+
+
+def build_numba_kernels():
+    """
+    Compile the Numba versions of the escape-time, logistic and Lyapunov kernels.
+
+    Returns:
+        tuple: The compiled escape-time, logistic and Lyapunov kernels.
+    """
+    import math
+
+    import numba
+
+    @numba.njit(cache=True)
+    def magnitude(zr, zi):
+        # The complex absolute value of NumPy for complex64: the larger part scaled by sqrt(1 + ratio**2), with the
+        # fused multiply-add of its SIMD loops, so that the escape test matches the NumPy kernel bit for bit.
+        larger = max(abs(zr), abs(zi))
+        if larger == 0:
+            return np.float32(0)
+        ratio = min(abs(zr), abs(zi)) / larger
+        return larger * np.sqrt(np.float32(np.float64(ratio) * ratio + 1.0))
+
+    @numba.njit(parallel=True, cache=True)
+    def escape_time(c, precision, shortcuts, z_in, start):
+        m = np.empty(c.size, dtype=np.int32)
+        z_out = np.empty(c.size, dtype=np.complex64)
+        shortcut = np.zeros(c.size, dtype=np.int8)
+        saved = np.zeros(c.size, dtype=np.int64)
+        for k in numba.prange(c.size):
+            count = precision - 1 if precision > 0 else 0
+            x = np.float64(c[k].real)
+            y = np.float64(c[k].imag)
+            q = (x - 0.25) * (x - 0.25) + y * y
+            if shortcuts and precision > start and (q * (q + x - 0.25) < 0.25 * y * y or
+                                                    (x + 1) * (x + 1) + y * y < 0.0625):
+                m[k] = count
+                z_out[k] = np.complex64(np.nan)
+                shortcut[k] = 1
+                saved[k] = precision - start
+                continue
+
+            # Iterate on the float32 parts with the fused multiply-adds of the complex product of NumPy, so that
+            # both backends give the same counts.
+            cr = c[k].real
+            ci = c[k].imag
+            zr = z_in[k].real
+            zi = z_in[k].imag
+            saved_r = zr
+            saved_i = zi
+            next_save = max(2 * start, 1)
+            for i in range(start, precision):
+                if not magnitude(zr, zi) < 2:
+                    count = i - 1
+                    break
+                if shortcuts and i > start and zr == saved_r and zi == saved_i:
+                    zr = np.float32(np.nan)
+                    zi = np.float32(np.nan)
+                    shortcut[k] = 2
+                    saved[k] = precision - i
+                    break
+                if shortcuts and i == next_save:
+                    saved_r = zr
+                    saved_i = zi
+                    next_save *= 2
+                zr, zi = (np.float32(np.float64(zr) * zr - (zi * zi)) + cr,
+                          np.float32(np.float64(zr) * zi + (zi * zr)) + ci)
+            m[k] = count
+            z_out[k] = np.complex64(complex(zr, zi))
+        return m, z_out, shortcut, saved
+
+    @numba.njit(parallel=True, cache=True)
+    def logistic(r, x0, precision, jitter, shortcuts):
+        x_out = np.empty(r.size, dtype=np.float64)
+        periods = np.zeros(r.size, dtype=np.int64)
+        for k in numba.prange(r.size):
+            x = x0
+            total = precision + jitter[k]
+            i = 0
+            if shortcuts:
+                previous = x
+                saved = x
+                saved_at = 0
+                blocks = 0
+                next_save = 1
+                while i + CHECK_INTERVAL <= precision:
+                    for _ in range(CHECK_INTERVAL):
+                        x = r[k] * x * (1 - x)
+                    i += CHECK_INTERVAL
+                    blocks += 1
+
+                    window = 0
+                    if abs(x - previous) <= CYCLE_TOLERANCE:
+                        window = CHECK_INTERVAL
+                    elif abs(x - saved) <= CYCLE_TOLERANCE:
+                        window = i - saved_at
+                    if window > 0:
+                        period = window
+                        y = x
+                        for step in range(1, window + 1):
+                            y = r[k] * y * (1 - y)
+                            if abs(y - x) <= CYCLE_TOLERANCE:
+                                period = step
+                                break
+                        periods[k] = period
+                        total = i + (total - i) % period
+                        break
+                    previous = x
+                    if blocks == next_save:
+                        saved = x
+                        saved_at = i
+                        next_save *= 2
+            while i < total:
+                x = r[k] * x * (1 - x)
+                i += 1
+            x_out[k] = x
+        return x_out, periods
+
+    @numba.njit(parallel=True, cache=True)
+    def lyapunov(r, x0, precision, samples, shortcuts):
+        exponents = np.empty(r.size, dtype=np.float64)
+        periods = np.zeros(r.size, dtype=np.int64)
+        samples = max(samples, 1)
+        total = precision + samples
+        for k in numba.prange(r.size):
+            x = x0
+            product = 1.0
+            exponent = 0
+            period = 0
+            i = 0
+            previous = x
+            saved = x
+            saved_at = 0
+            blocks = 0
+            next_save = 1
+            while i < total:
+                sampling = i >= precision
+                block = min(CHECK_INTERVAL, (total if sampling else precision) - i)
+                for _ in range(block):
+                    if sampling:
+                        product *= abs(r[k] * (1 - 2 * x))
+                    x = r[k] * x * (1 - x)
+                if sampling:
+                    product, block_exponent = math.frexp(product)
+                    exponent += block_exponent
+                i += block
+                blocks += 1
+                if not shortcuts:
+                    continue
+
+                window = 0
+                if abs(x - previous) <= CYCLE_TOLERANCE:
+                    window = block
+                elif abs(x - saved) <= CYCLE_TOLERANCE:
+                    window = i - saved_at
+                if window > 0:
+                    period = window
+                    y = x
+                    for step in range(1, window + 1):
+                        y = r[k] * y * (1 - y)
+                        if abs(y - x) <= CYCLE_TOLERANCE:
+                            period = step
+                            break
+                    break
+                previous = x
+                if blocks == next_save:
+                    saved = x
+                    saved_at = i
+                    next_save *= 2
+
+            if period > 0:
+                periods[k] = period
+                walk = 0.0
+                y = x
+                for _ in range(period):
+                    walk += np.log(abs(r[k] * (1 - 2 * y)))
+                    y = r[k] * y * (1 - y)
+                exponents[k] = walk / period
+            elif product == 0:
+                exponents[k] = -np.inf
+            else:
+                mantissa, block_exponent = math.frexp(product)
+                exponents[k] = (math.log2(mantissa) + exponent + block_exponent) * math.log(2) / samples
+        return exponents, periods
+
+    return escape_time, logistic, lyapunov
+
+
+class NumbaBackend:
+    """
+    A compute backend running JIT-compiled per-point loops with Numba, in parallel over all cores.
+
+    Points are processed in chunks of NUMBA_CHUNK_SIZE so that cancellation is checked between chunks.
+
+    Numba is imported and the kernels are compiled when the backend is created, never at module load.
+
+    Attributes:
+        name (str): The name of the backend.
+    """
+
+    name = "numba"
+
+    def __init__(self):
+        """
+        Import Numba and compile the kernels.
+        """
+        self._escape_time, self._logistic, self._lyapunov = build_numba_kernels()
+
+    def escape_time(self, c, precision, token=None, stats=None, shortcuts=None, z=None, start=0):
+        """
+        Compute Mandelbrot iteration counts for an array of complex points.
+
+        Args:
+            c (np.ndarray): The complex points.
+            precision (int): The maximum number of iterations.
+            token (CancelToken, optional): Token checked between iteration batches. Defaults to None.
+            stats (KernelStats, optional): Counts updated with the work skipped by the shortcuts. Defaults to None.
+            shortcuts (bool, optional): Whether to use the interior shortcuts. Defaults to None (the default).
+            z (np.ndarray, optional): Values of the points after `start` iterations, updated in place with the
+                final values as in escape_time_kernel. Defaults to None.
+            start (int): The number of iterations already done. Defaults to 0.
+
+        Returns:
+            np.ndarray: The iteration count of every point, with the shape of `c`.
+        """
+        c = np.asarray(c, dtype=np.complex64)
+        flat = c.ravel()
+        z_flat = np.zeros_like(flat) if z is None else np.asarray(z, dtype=np.complex64).ravel().copy()
+        m = np.empty(flat.size, dtype=np.int32)
+        if shortcuts is None:
+            shortcuts = _interior_checks
+
+        for chunk in range(0, flat.size, NUMBA_CHUNK_SIZE):
+            check_token(token)
+            stop = chunk + NUMBA_CHUNK_SIZE
+            m[chunk:stop], z_flat[chunk:stop], shortcut, saved = self._escape_time(
+                flat[chunk:stop], precision, shortcuts, z_flat[chunk:stop], start)
+            if stats is not None:
+                stats.interior_points += int(np.count_nonzero(shortcut == 1))
+                stats.periodic_points += int(np.count_nonzero(shortcut == 2))
+                stats.saved_iterations += int(saved.sum())
+
+        if z is not None:
+            z[...] = z_flat.reshape(c.shape)
+
+        return m.reshape(c.shape)
+
+    def logistic(self, r, x0, precision, jitter, token=None, shortcuts=None, periods=None):
+        """
+        Iterate the logistic map for an array of r values.
+
+        Args:
+            r (np.ndarray): The r values.
+            x0 (float): The initial x value.
+            precision (int): The number of iterations every lane performs.
+            jitter (np.ndarray): The number of extra iterations per lane.
+            token (CancelToken, optional): Token checked between iteration batches. Defaults to None.
+            shortcuts (bool, optional): Whether to use cycle detection. Defaults to None (the default).
+            periods (np.ndarray, optional): Array receiving the period of every lane, as in logistic_kernel.
+                Defaults to None.
+
+        Returns:
+            np.ndarray: The final x value of every lane.
+        """
+        r = np.ascontiguousarray(r, dtype=np.float64)
+        jitter = np.ascontiguousarray(jitter, dtype=np.int64)
+        x = np.empty(r.size, dtype=np.float64)
+        period = np.empty(r.size, dtype=np.int64)
+        if shortcuts is None:
+            shortcuts = _cycle_checks
+
+        for start in range(0, r.size, NUMBA_CHUNK_SIZE):
+            check_token(token)
+            stop = start + NUMBA_CHUNK_SIZE
+            x[start:stop], period[start:stop] = self._logistic(r[start:stop], np.float64(x0), precision,
+                                                               jitter[start:stop], shortcuts)
+
+        if periods is not None:
+            periods[...] = period.reshape(np.shape(periods))
+        return x
+
+    def lyapunov(self, r, x0, precision, samples, token=None, shortcuts=None, periods=None):
+        """
+        Estimate the Lyapunov exponent of the logistic map for an array of r values, transient included.
+
+        Args:
+            r (np.ndarray): The r values.
+            x0 (float): The initial x value.
+            precision (int): The number of transient iterations of every r.
+            samples (int): The number of iterations averaged for the r values without a cycle.
+            token (CancelToken, optional): Token checked between iteration batches. Defaults to None.
+            shortcuts (bool, optional): Whether to use cycle detection. Defaults to None (the default).
+            periods (np.ndarray, optional): Array receiving the period of every r, as in lyapunov_kernel.
+                Defaults to None.
+
+        Returns:
+            np.ndarray: The Lyapunov exponent of every r.
+        """
+        r = np.ascontiguousarray(r, dtype=np.float64).ravel()
+        exponents = np.empty(r.size, dtype=np.float64)
+        period = np.empty(r.size, dtype=np.int64)
+        if shortcuts is None:
+            shortcuts = _cycle_checks
+
+        for start in range(0, r.size, NUMBA_CHUNK_SIZE):
+            check_token(token)
+            stop = start + NUMBA_CHUNK_SIZE
+            exponents[start:stop], period[start:stop] = self._lyapunov(r[start:stop], np.float64(x0), precision,
+                                                                       samples, shortcuts)
+
+        if periods is not None:
+            periods[...] = period.reshape(np.shape(periods))
+        return exponents
+
+        return exponents
+
+
+BACKENDS = {
+    "numpy": NumpyBackend,
+    "tensorflow": TensorFlowBackend,
+    "numba": NumbaBackend,
+}
+
+_instances = {}
+_default_name = "numpy"
+
+
+def get_backend(name=None):
+    """
+    Get a compute backend by name, creating it on first use.
+
+    Args:
+        name (str, optional): The name of the backend. Defaults to None (the default backend).
+
+    Returns:
+        The backend instance.
+
+    Raises:
+        ValueError: If there is no backend with the given name.
+        ImportError: If the library required by the backend is not installed.
+    """
+    if name is None:
+        name = _default_name
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown backend: {name}. Available backends: {', '.join(BACKENDS)}")
+    if name not in _instances:
+        _instances[name] = BACKENDS[name]()
+    return _instances[name]
+
+
+def set_default_backend(name):
+    """
+    Set the backend used by calculations that do not ask for a specific one.
+
+    The backend is created immediately, so a missing library is reported here rather than in the middle of a job.
+
+    Args:
+        name (str): The name of the backend.
+    """
+    global _default_name
+    get_backend(name)
+    _default_name = name
+
+
+def get_default_backend_name():
+    """
+    Get the name of the default backend.
+
+    Returns:
+        str: The name of the default backend.
+    """
+    return _default_name
@@ -0,0 +1,498 @@
+"""
+Benchmarks of the compute kernels and the rendering path, with a JSON history and a regression check.
+
+Each case runs over a matrix of step, precision and backend settings. The best wall time of the repeats is
+recorded with the throughput and the peak memory traced by tracemalloc, and every run is appended to a JSON
+history. Examples::
+
+    python benchmarks.py run
+    python benchmarks.py run --matrix full --backends numpy,numba --save-baseline baseline.json
+    python benchmarks.py compare baseline.json
+    python benchmarks.py compare baseline.json --current run.json --threshold 0.2
+
+Every case runs with the tile, orbit and disk caches disabled and the last Mandelbrot iteration state cleared,
+so it measures a computation from scratch. The plot cases draw on an offscreen FractalCanvas and are skipped
+when PyQt5 is not installed. The compare command exits with status 1 when a case got slower than the baseline
+by more than the threshold.
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+
+try:
+    from PyQt5.QtWidgets import QApplication
+except ImportError:
+    QApplication = None
+
+import backends
+import disk_cache
+import tile_cache
+from disk_cache import DiskCache
+from mandelbrot_calc import BifurcationCalculation, MandelbrotCalculation
+from tile_cache import TileCache
+from tiling import get_default_workers
+
+MATRICES = {
+    "quick": {
+        "mandelbrot": {"step": [0.01, 0.004], "precision": [50, 200]},
+        "bifurcation": {"step": [0.0001, 0.00001], "precision": [100, 1000]},
+    },
+    "full": {
+        "mandelbrot": {"step": [0.01, 0.004, 0.002, 0.001], "precision": [50, 200, 1000]},
+        "bifurcation": {"step": [0.0001, 0.00001, 0.000001], "precision": [100, 1000]},
+    },
+}
+DEFAULT_HISTORY = "benchmark_history.json"
+DEFAULT_REPEATS = 3
+DEFAULT_THRESHOLD = 0.1
+BIFURCATION_POINT = (-0.5, 0.2)
+
+
+@contextlib.contextmanager
+def caches_disabled():
+    """
+    Replace the default tile, orbit and disk caches with disabled ones.
+
+    The replaced caches are restored on exit, untouched, so no cached entry is evicted by a benchmark.
+    """
+    saved = (tile_cache.default_cache, tile_cache.default_orbit_cache, disk_cache.default_disk_cache)
+    tile_cache.default_cache = TileCache(0)
+    tile_cache.default_orbit_cache = TileCache(0)
+    disk_cache.default_disk_cache = DiskCache(max_bytes=0)
+    try:
+        yield
+    finally:
+        tile_cache.default_cache, tile_cache.default_orbit_cache, disk_cache.default_disk_cache = saved
+        release_iteration_state()
+
+
+@contextlib.contextmanager
+def default_backend(name):
+    """
+    Make a backend the default one for the calculations created by the plot methods, restoring it on exit.
+
+    Args:
+        name (str): The name of the backend.
+    """
+    previous = backends.get_default_backend_name()
+    backends.set_default_backend(name)
+    try:
+        yield
+    finally:
+        backends.set_default_backend(previous)
+
+
+def mandelbrot_col(step, precision, backend):
+    """
+    Run compute_mandelbrot_col.
+
+    Returns:
+        int: The number of grid points.
+    """
+    mandel = MandelbrotCalculation(step, precision, backend=backend)
+    mandel.compute_mandelbrot_col()
+    return mandel.iterations.size
+
+
+def mandelbrot_bw(step, precision, backend):
+    """
+    Run compute_mandelbrot_bw.
+
+    Returns:
+        int: The number of grid points.
+    """
+    mandel = MandelbrotCalculation(step, precision, backend=backend)
+    mandel.compute_mandelbrot_bw()
+    return mandel.iterations.size
+
+
+def bifurcation(step, precision, backend):
+    """
+    Run compute_bifurcation.
+
+    Returns:
+        int: The number of r values.
+    """
+    logi = BifurcationCalculation(step, precision, seed=0, backend=backend)
+    logi.compute_bifurcation()
+    return logi.r_array.size
+
+
+def bifurcation_from_point(step, precision, backend):
+    """
+    Run compute_bifurcation_from_point at BIFURCATION_POINT.
+
+    Returns:
+        int: The number of r values.
+    """
+    logi = BifurcationCalculation(step, precision, seed=0, backend=backend)
+    logi.compute_bifurcation_from_point(*BIFURCATION_POINT)
+    return logi.r_array.size
+
+
+def plot_case(method_name, size_of, *args):
+    """
+    Build a benchmark case drawing with a method of an offscreen FractalCanvas.
+
+    Args:
+        method_name (str): The name of the plot method, called with `args`, the step and the precision.
+        size_of (callable): Function of the step giving the number of points of the plot.
+        *args: Leading arguments of the plot method.
+
+    Returns:
+        callable: The case.
+    """
+    def case(step, precision, backend):
+        with default_backend(backend):
+            getattr(plot_canvas(), method_name)(*args, step=step, precision=precision)
+        return size_of(step)
+
+    case.__doc__ = f"Run FractalCanvas.{method_name} offscreen."
+    return case
+
+
+def mandelbrot_size(margin):
+    """
+    Get a function giving the number of points of the default Mandelbrot grid for a step.
+
+    Args:
+        margin (float): Extra distance added on every side of the range.
+
+    Returns:
+        callable: The function.
+    """
+    def size(step):
+        mandel = MandelbrotCalculation(step, 1)
+        re_spec, im_spec = mandel.axis_specs(margin)
+        return re_spec[1] * im_spec[1]
+
+    return size
+
+
+def bifurcation_size(step):
+    """
+    Get the number of r values of the default bifurcation grid for a step.
+
+    Returns:
+        int: The number of r values.
+    """
+    return BifurcationCalculation(step, 1).r_grid().size
+
+
+_canvas = None
+
+
+def plot_canvas():
+    """
+    Get the offscreen canvas drawn on by the plot cases, creating the Qt application on first use.
+
+    Returns:
+        FractalCanvas: The canvas.
+
+    Raises:
+        ImportError: If PyQt5 is not installed.
+    """
+    global _canvas
+    if QApplication is None:
+        raise ImportError("the plot cases need PyQt5")
+    if _canvas is None:
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+        # main switches matplotlib to the Qt backend, which needs a running application
+        plot_canvas.application = QApplication.instance() or QApplication([])
+        from main import FractalCanvas
+
+        _canvas = FractalCanvas(8, 6, 100)
+    return _canvas
+
+
+CASES = {
+    "compute_mandelbrot_col": ("mandelbrot", mandelbrot_col),
+    "compute_mandelbrot_bw": ("mandelbrot", mandelbrot_bw),
+    "compute_bifurcation": ("bifurcation", bifurcation),
+    "compute_bifurcation_from_point": ("bifurcation", bifurcation_from_point),
+    "plot_mandelbrot_col": ("mandelbrot", plot_case("plot_mandelbrot_col", mandelbrot_size(0.1))),
+    "plot_mandelbrot_bw": ("mandelbrot", plot_case("plot_mandelbrot_bw", mandelbrot_size(0.0))),
+    "plot_logistical": ("bifurcation", plot_case("plot_logistical", bifurcation_size)),
+    "plot_bifurcation_from_point": ("bifurcation", plot_case(
+        "plot_bifurcation_from_point", bifurcation_size, *BIFURCATION_POINT)),
+}
+
+
+def release_iteration_state():
+    """
+    Release the Mandelbrot iteration state kept by the plot canvas, if it was created.
+    """
+    if _canvas is not None and _canvas.mandel is not None:
+        _canvas.mandel.release_state()
+
+
+def available_backends():
+    """
+    List the backends whose library is installed.
+
+    Returns:
+        list: The names of the backends that can be created.
+    """
+    names = []
+    for name in backends.BACKENDS:
+        try:
+            backends.get_backend(name)
+        except ImportError:
+            continue
+        names.append(name)
+    return names
+
+
+def measure(case, step, precision, backend, repeats=DEFAULT_REPEATS):
+    """
+    Time a case and trace its peak memory.
+
+    The case runs once untimed to warm up compilers and imports, `repeats` times timed, then once under
+    tracemalloc, as tracing slows allocations down. The Mandelbrot iteration state of the plot canvas is released
+    before every run, so no run continues the iterations of the previous one.
+
+    Args:
+        case (callable): The case, called with the step, precision and backend name.
+        step (float): The step size.
+        precision (int): The precision.
+        backend (str): The name of the backend.
+        repeats (int): The number of timed runs. Defaults to DEFAULT_REPEATS.
+
+    Returns:
+        dict: The best wall time in seconds, the number of points, the points per second and the peak memory in MB.
+    """
+    with caches_disabled():
+        release_iteration_state()
+        points = case(step, precision, backend)
+        times = []
+        for _ in range(max(repeats, 1)):
+            release_iteration_state()
+            start = time.perf_counter()
+            case(step, precision, backend)
+            times.append(time.perf_counter() - start)
+
+        release_iteration_state()
+        tracemalloc.start()
+        try:
+            case(step, precision, backend)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+    seconds = min(times)
+    return {"seconds": seconds, "points": int(points), "points_per_second": points / seconds if seconds else 0.0,
+            "peak_mb": peak / 2 ** 20}
+
+
+def run_benchmarks(matrix="quick", backend_names=None, case_names=None, repeats=DEFAULT_REPEATS, progress=print):
+    """
+    Run every case over a matrix of settings.
+
+    Args:
+        matrix (str): The name of the matrix in MATRICES. Defaults to "quick".
+        backend_names (list, optional): The backends to run. Defaults to None (every available backend).
+        case_names (list, optional): The cases to run. Defaults to None (every case).
+        repeats (int): The number of timed runs per setting. Defaults to DEFAULT_REPEATS.
+        progress (callable): Function receiving a line per finished setting. Defaults to print.
+
+    Returns:
+        dict: The run, with its time stamp, platform description and the results of every setting.
+
+    Raises:
+        ValueError: If the matrix or a case is unknown.
+    """
+    if matrix not in MATRICES:
+        raise ValueError(f"Unknown matrix: {matrix}. Available matrices: {', '.join(MATRICES)}")
+    unknown = set(case_names or ()) - set(CASES)
+    if unknown:
+        raise ValueError(f"Unknown cases: {', '.join(sorted(unknown))}. Available cases: {', '.join(CASES)}")
+
+    if QApplication is None and any(name.startswith("plot_") for name in case_names or CASES):
+        progress("Skipping the plot cases, PyQt5 is not installed")
+        case_names = [name for name in case_names or CASES if not name.startswith("plot_")]
+
+    results = []
+    for name in case_names or CASES:
+        kind, case = CASES[name]
+        settings = MATRICES[matrix][kind]
+        for backend in backend_names or available_backends():
+            for step in settings["step"]:
+                for precision in settings["precision"]:
+                    result = measure(case, step, precision, backend, repeats)
+                    result.update({"case": name, "backend": backend, "step": step, "precision": precision,
+                                   "workers": get_default_workers()})
+                    results.append(result)
+                    progress(format_result(result))
+
+    return {"timestamp": datetime.now().isoformat(timespec="seconds"), "platform": platform.platform(),
+            "python": platform.python_version(), "numpy": np.__version__, "matrix": matrix, "results": results}
+
+
+def format_result(result):
+    """
+    Describe the result of one setting.
+
+    Args:
+        result (dict): The result.
+
+    Returns:
+        str: The case, settings, time, throughput and peak memory.
+    """
+    return (f"{result['case']} [{result['backend']}, step={result['step']:g}, precision={result['precision']}]: "
+            f"{result['seconds']:.4f} s, {result['points_per_second']:.3g} points/s, {result['peak_mb']:.1f} MB")
+
+
+def result_key(result):
+    """
+    Get the key matching the results of the same setting across runs.
+
+    Args:
+        result (dict): The result.
+
+    Returns:
+        tuple: The case, backend, step and precision.
+    """
+    return result["case"], result["backend"], result["step"], result["precision"]
+
+
+def append_history(path, run):
+    """
+    Append a run to a JSON history file, creating the file if needed.
+
+    Args:
+        path (str): The path of the history file.
+        run (dict): The run.
+    """
+    history = []
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as file:
+            history = json.load(file)
+    history.append(run)
+    with open(path + ".tmp", "w", encoding="utf-8") as file:
+        json.dump(history, file, indent=1)
+    os.replace(path + ".tmp", path)
+
+
+def load_run(path):
+    """
+    Load a run from a file holding either one run or a history, whose latest run is taken.
+
+    Args:
+        path (str): The path of the file.
+
+    Returns:
+        dict: The run.
+
+    Raises:
+        ValueError: If the file holds an empty history.
+    """
+    with open(path, "r", encoding="utf-8") as file:
+        data = json.load(file)
+    if isinstance(data, list):
+        if not data:
+            raise ValueError(f"{path} holds no runs")
+        return data[-1]
+    return data
+
+
+def compare_runs(baseline, current, threshold=DEFAULT_THRESHOLD):
+    """
+    Compare the wall times of the settings present in two runs.
+
+    Args:
+        baseline (dict): The baseline run.
+        current (dict): The run to check.
+        threshold (float): The relative slowdown above which a setting is a regression. Defaults to
+            DEFAULT_THRESHOLD.
+
+    Returns:
+        list: A (result, baseline result, ratio, status) tuple per common setting, the status being "regression",
+            "improvement" or "ok".
+    """
+    base_results = {result_key(result): result for result in baseline["results"]}
+    comparison = []
+    for result in current["results"]:
+        base = base_results.get(result_key(result))
+        if base is None:
+            continue
+        ratio = result["seconds"] / base["seconds"] if base["seconds"] else float("inf")
+        if ratio > 1 + threshold:
+            status = "regression"
+        elif ratio < 1 - threshold:
+            status = "improvement"
+        else:
+            status = "ok"
+        comparison.append((result, base, ratio, status))
+    return comparison
+
+
+def main(argv=None):
+    """
+    Run the command-line interface.
+
+    Args:
+        argv (list, optional): The command-line arguments. Defaults to None (sys.argv).
+
+    Returns:
+        int: The exit status, 1 if the comparison found a regression.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the compute kernels and the rendering path.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="run the benchmarks and append them to the history")
+    run.add_argument("--matrix", default="quick", choices=sorted(MATRICES), help="settings matrix (default: quick)")
+    run.add_argument("--backends", help="comma-separated backends (default: every installed backend)")
+    run.add_argument("--cases", help=f"comma-separated cases (default: all of {', '.join(CASES)})")
+    run.add_argument("--repeats", type=int, default=DEFAULT_REPEATS,
+                     help=f"timed runs per setting, the best is kept (default: {DEFAULT_REPEATS})")
+    run.add_argument("--no-plots", action="store_true", help="skip the plot cases")
+    run.add_argument("--history", default=DEFAULT_HISTORY, help=f"history file (default: {DEFAULT_HISTORY})")
+    run.add_argument("--save-baseline", help="also write the run to this file, to compare later runs with")
+
+    compare = commands.add_parser("compare", help="compare a run with a baseline and flag regressions")
+    compare.add_argument("baseline", help="baseline file, holding a run or a history whose latest run is used")
+    compare.add_argument("--current", help="file with the run to check (default: the latest run of the history)")
+    compare.add_argument("--history", default=DEFAULT_HISTORY, help=f"history file (default: {DEFAULT_HISTORY})")
+    compare.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                         help=f"relative slowdown flagged as a regression (default: {DEFAULT_THRESHOLD})")
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        case_names = args.cases.split(",") if args.cases else list(CASES)
+        if args.no_plots:
+            case_names = [name for name in case_names if not name.startswith("plot_")]
+        try:
+            result = run_benchmarks(args.matrix, args.backends.split(",") if args.backends else None, case_names,
+                                    args.repeats)
+        except (ValueError, ImportError) as error:
+            parser.error(str(error))
+        append_history(args.history, result)
+        if args.save_baseline:
+            with open(args.save_baseline, "w", encoding="utf-8") as file:
+                json.dump(result, file, indent=1)
+        print(f"{len(result['results'])} settings appended to {args.history}")
+        return 0
+
+    try:
+        baseline = load_run(args.baseline)
+        current = load_run(args.current or args.history)
+    except (OSError, ValueError) as error:
+        parser.error(str(error))
+    comparison = compare_runs(baseline, current, args.threshold)
+    for result, base, ratio, status in comparison:
+        print(f"{status:>11}  {ratio:6.2f}x  {format_result(result)} (baseline {base['seconds']:.4f} s)")
+    regressions = sum(status == "regression" for *_, status in comparison)
+    print(f"{len(comparison)} settings compared, {regressions} regressions")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,4 +1,70 @@
+import os
 import sys
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from functools import partial
+
+import numpy as np
+
+import backends
+import profiling
+import subdivision
+import tiling
+from cost_model import get_cost_model, memory_budget
+from disk_cache import DEFAULT_MAX_BYTES, get_default_disk_cache, save_default_max_bytes
+from mandelbrot_calc import (DENSITY_SAMPLES, DENSITY_SHADINGS, LYAPUNOV_SAMPLES, BifurcationCalculation,
+                             MandelbrotCalculation)
+from tile_cache import get_default_cache
+
+RENDER_OPTIONS = {
+    "mand": {"step", "precision", "region", "gradient", "priority", "out"},
+    "log": {"step", "precision", "point", "priority", "out"},
+}
+
+
+def parse_options(words, allowed):
+    """
+    Parse key=value words of a command.
+
+    Args:
+        words (list): The words of the command after its name.
+        allowed (set): The keys the command accepts.
+
+    Returns:
+        dict: The value string of every key.
+
+    Raises:
+        ValueError: If a word is not of the form key=value or its key is not allowed.
+    """
+    options = {}
+    for word in words:
+        key, separator, value = word.partition("=")
+        if not separator or key not in allowed:
+            raise ValueError(f"unexpected option {word}, expected key=value with a key among "
+                             f"{', '.join(sorted(allowed))}")
+        options[key] = value
+    return options
+
+
+def parse_floats(text, count):
+    """
+    Parse a fixed number of comma-separated floats.
+
+    Args:
+        text (str): The comma-separated values.
+        count (int): The number of values expected.
+
+    Returns:
+        tuple: The values.
+
+    Raises:
+        ValueError: If there is not exactly `count` values or one of them is not a number.
+    """
+    values = tuple(float(value) for value in text.split(","))
+    if len(values) != count:
+        raise ValueError(f"expected {count} comma-separated numbers, got {text}")
+    return values
+
 
 class ConsoleHandler:
     """
@@ -27,7 +93,19 @@ class ConsoleHandler:
         lines = text.split("\n")
         command = self.get_last_non_empty_line(lines)
         if command:
-            self.command_list(command)
+            self.run_command(command)
+
+    def run_command(self, commands):
+        """
+        Execute a command, reporting the errors it raises in the console instead of letting them propagate.
+
+        Args:
+            commands (list): A list of command arguments.
+        """
+        try:
+            self.command_list(commands)
+        except Exception as error:
+            self.MainFrame.console.append(f"Command {' '.join(commands)} failed: {error}\n")
 
     def get_last_non_empty_line(self, lines):
         """
@@ -43,6 +121,95 @@ class ConsoleHandler:
             if line.strip():
                 return line.strip().split()
 
+    def run_script(self, path):
+        """
+        Execute the commands of a script file, one per line. Empty lines and lines starting with # are skipped.
+
+        Render commands only queue their jobs, so a script of Render commands ending with "Jobs quit" runs a batch
+        of renders and closes the application once they are done.
+
+        Args:
+            path (str): The path of the script file.
+        """
+        try:
+            with open(path, "r", encoding="utf-8") as file:
+                lines = file.readlines()
+        except OSError as error:
+            self.MainFrame.console.append(f"Could not read script: {error}\n")
+            return
+        self.MainFrame.console.append(f"Running script {path}\n")
+        for line in lines:
+            if line.strip() and not line.strip().startswith("#"):
+                self.run_command(line.split())
+
+    def save_disk_budget(self, disk_cache):
+        """
+        Save the byte budget of the disk cache for the next sessions and show the state of the cache.
+
+        Args:
+            disk_cache (DiskCache): The default disk cache.
+        """
+        try:
+            save_default_max_bytes(disk_cache.max_bytes, disk_cache.directory)
+        except OSError as error:
+            self.MainFrame.console.append(f"Could not save the disk cache size: {error}\n")
+        self.MainFrame.console.append(f"Disk cache: {disk_cache.stats()}\n")
+
+    def queue_render(self, kind, words):
+        """
+        Queue a render job from the options of a Render command.
+
+        Args:
+            kind (str): "mand" for the Mandelbrot set or "log" for the logistic map.
+            words (list): The key=value options of the command.
+
+        Raises:
+            ValueError: If an option is missing or invalid, or the job does not fit the memory budget.
+        """
+        options = parse_options(words, RENDER_OPTIONS[kind])
+        if "step" not in options or "precision" not in options:
+            raise ValueError("step and precision are required")
+        step = float(options["step"])
+        precision = int(options["precision"])
+        priority = int(options.get("priority", 0))
+        if step <= 0 or precision <= 0:
+            raise ValueError("step and precision must be positive")
+        path = options.get("out")
+        description = f"Render {kind} {' '.join(words)}"
+
+        if kind == "mand":
+            gradient = options.get("gradient", "col")
+            if gradient not in ("col", "bw"):
+                raise ValueError(f"unknown gradient {gradient}, expected col or bw")
+            region = parse_floats(options["region"], 4) if "region" in options else None
+            mandel = MandelbrotCalculation(step, precision)
+            if region is not None:
+                mandel.set_region(*region)
+            canvas = self.MainFrame.mandelbrot_canvas
+            plan = canvas.plan_mandelbrot(mandel, mandel.color_margin if gradient == "col" else 0.0)
+            if not plan.fits:
+                raise ValueError(f"not enough memory for the {plan.summary()}")
+            func = canvas.plot_mandelbrot_col if gradient == "col" else canvas.plot_mandelbrot_bw
+            self.MainFrame.job_queue.submit(description, partial(func, region=region, band_rows=plan.chunk), step,
+                                            precision, priority=priority, canvas=canvas, path=path,
+                                            kind=f"mand/{mandel.backend.name}", work=plan.points * precision,
+                                            predicted=plan.seconds)
+        else:
+            logi = BifurcationCalculation(step, precision)
+            plan = get_cost_model(logi.backend.name, wait=False).plan_logistic(logi.r_count(), precision)
+            if not plan.fits:
+                raise ValueError(f"not enough memory for the {plan.summary()}")
+            canvas = self.MainFrame.bifurcation_canvas
+            if "point" in options:
+                real, imag = parse_floats(options["point"], 2)
+                func, args = canvas.plot_bifurcation_from_point, (real, imag, step, precision)
+            else:
+                func, args = partial(canvas.plot_logistical, chunk_size=plan.chunk), (step, precision)
+            self.MainFrame.job_queue.submit(description, func, *args, priority=priority, canvas=canvas, path=path,
+                                            kind=f"log/{logi.backend.name}", work=plan.points * precision,
+                                            predicted=plan.seconds)
+        self.MainFrame.console.append(f"Queued: {description}, {plan.summary()}\n")
+
     def command_list(self, commands):
         """
         Execute the command based on the parsed command list.
@@ -55,29 +222,91 @@ class ConsoleHandler:
         elif commands[0] == "Exit":
             sys.exit(0)
         elif commands[0] == "Save":
-            if len(commands) > 1:
-                if commands[1] == "--all":
-                    self.MainFrame.console.append("Saving all\n")
-                elif commands[1] == "--mand":
-                    self.MainFrame.console.append("Saving Mandelbrot plot\n")
-                elif commands[1] == "--log":
-                    self.MainFrame.console.append("Saving logistical plot\n")
-                else:
-                    self.MainFrame.console.append(f"Invalid Save command: {commands[1]}\n")
+            if len(commands) in (2, 3) and commands[1] in ("--all", "--mand", "--log"):
+                directory = commands[2] if len(commands) == 3 else "."
+                timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
+                canvases = []
+                if commands[1] in ("--all", "--mand"):
+                    canvases.append(("Mandelbrot", "mandelbrot", self.MainFrame.mandelbrot_canvas))
+                if commands[1] in ("--all", "--log"):
+                    canvases.append(("logistical", "logistical", self.MainFrame.bifurcation_canvas))
+                for name, prefix, canvas in canvases:
+                    path = os.path.join(directory, f"{prefix}_{timestamp}.png")
+                    self.MainFrame.job_queue.submit(f"Save {name} plot to {path}", canvas.save_figure, path,
+                                                    exclusive=False, canvas=canvas)
+                    self.MainFrame.console.append(f"Saving {name} plot to {path}\n")
+            elif len(commands) > 1:
+                self.MainFrame.console.append(f"Invalid Save command: {' '.join(commands[1:])}\n")
             else:
-                self.MainFrame.console.append("Save command requires an argument\n")
+                self.MainFrame.console.append("Save command requires an argument: Save --all|--mand|--log "
+                                              "[directory]\n")
         elif commands[0] == "Refresh":
             if len(commands) > 1:
                 if commands[1] == "--all":
                     self.MainFrame.console.append("Refreshing all\n")
+                    self.MainFrame.regenerate_mandel_plot(queued=True)
+                    self.MainFrame.regenerate_logistical_plot(queued=True)
                 elif commands[1] == "--mand":
                     self.MainFrame.console.append("Refreshing Mandelbrot plot\n")
+                    self.MainFrame.regenerate_mandel_plot(queued=True)
                 elif commands[1] == "--log":
                     self.MainFrame.console.append("Refreshing logistical plot\n")
+                    self.MainFrame.regenerate_logistical_plot(queued=True)
                 else:
                     self.MainFrame.console.append(f"Invalid Refresh command: {commands[1]}\n")
             else:
                 self.MainFrame.console.append("Refresh command requires an argument\n")
+        elif commands[0] == "Render":
+            if len(commands) > 1 and commands[1] in RENDER_OPTIONS:
+                try:
+                    self.queue_render(commands[1], commands[2:])
+                except ValueError as error:
+                    self.MainFrame.console.append(f"Invalid Render command: {error}\n")
+            else:
+                self.MainFrame.console.append("Render command requires a plot and its options: Render mand "
+                                              "step=<step> precision=<n> [region=<re0>,<re1>,<im0>,<im1>] "
+                                              "[gradient=col|bw] [priority=<n>] [out=<file>], or Render log "
+                                              "step=<step> precision=<n> [point=<re>,<im>] [priority=<n>] "
+                                              "[out=<file>]\n")
+        elif commands[0] == "Jobs":
+            queue = self.MainFrame.job_queue
+            if len(commands) == 1:
+                self.MainFrame.console.append(f"Jobs: {queue.summary()}")
+                for line in queue.describe():
+                    self.MainFrame.console.append(line)
+            elif commands[1] == "cancel" and len(commands) == 3:
+                try:
+                    job_id = None if commands[2] == "all" else int(commands[2])
+                except ValueError:
+                    self.MainFrame.console.append(f"Invalid job number: {commands[2]}\n")
+                    return
+                self.MainFrame.console.append(f"Cancelled {queue.cancel(job_id)} jobs\n")
+            elif commands[1] == "quit":
+                self.MainFrame.console.append("The application will quit once every job is done\n")
+                queue.quit_when_done()
+            else:
+                self.MainFrame.console.append(f"Invalid Jobs command: {' '.join(commands[1:])}. Usage: Jobs "
+                                              f"[cancel <number>|all|quit]\n")
+        elif commands[0] == "Cost":
+            if len(commands) == 1:
+                model = get_cost_model(wait=False)
+                budget = memory_budget()
+                self.MainFrame.console.append(f"Cost model of the {model.summary()}\n")
+                self.MainFrame.console.append("Memory budget: " + ("unknown" if budget is None else
+                                                                   f"{budget / 2 ** 20:.0f} MB") + "\n")
+                if not model.calibrated:
+                    self.MainFrame.console.append("Run Cost calibrate to calibrate it\n")
+            elif commands[1] == "calibrate":
+                job = self.MainFrame.queue_calibration(recalibrate=True)
+                self.MainFrame.console.append(f"Queued: {job.description}\n")
+            else:
+                self.MainFrame.console.append(f"Invalid Cost command: {' '.join(commands[1:])}. Usage: Cost "
+                                              f"[calibrate]\n")
+        elif commands[0] == "Script":
+            if len(commands) == 2:
+                self.run_script(commands[1])
+            else:
+                self.MainFrame.console.append("Script command requires a file: Script <path>\n")
         elif commands[0] == "Clear":
             if len(commands) > 1:
                 if commands[1] == "console":
@@ -86,5 +315,198 @@ class ConsoleHandler:
                     self.MainFrame.console.append(f"Invalid Clear command: {commands[1]}\n")
             else:
                 self.MainFrame.console.append("Clear command requires an argument\n")
+        elif commands[0] == "Backend":
+            if len(commands) > 1:
+                try:
+                    backends.set_default_backend(commands[1])
+                    self.MainFrame.console.append(f"Using the {commands[1]} backend\n")
+                    self.MainFrame.queue_calibration()
+                except (ValueError, ImportError) as error:
+                    self.MainFrame.console.append(f"Could not switch backend: {error}\n")
+            else:
+                self.MainFrame.console.append(f"Current backend: {backends.get_default_backend_name()}. "
+                                              f"Available backends: {', '.join(backends.BACKENDS)}\n")
+        elif commands[0] == "Workers":
+            if len(commands) > 1:
+                try:
+                    tiling.set_default_workers(int(commands[1]))
+                    self.MainFrame.console.append(f"Using {tiling.get_default_workers()} worker processes\n")
+                except ValueError as error:
+                    self.MainFrame.console.append(f"Invalid Workers command: {error}\n")
+            else:
+                self.MainFrame.console.append(f"Current number of worker processes: {tiling.get_default_workers()}\n")
+        elif commands[0] == "Cache":
+            cache = get_default_cache()
+            if len(commands) == 1:
+                self.MainFrame.console.append(f"Tile cache: {cache.stats()}\n")
+            elif commands[1] == "clear":
+                cache.clear()
+                self.MainFrame.console.append("Tile cache cleared\n")
+            elif commands[1] == "size" and len(commands) > 2:
+                try:
+                    cache.set_max_bytes(int(float(commands[2]) * 2 ** 20))
+                    self.MainFrame.console.append(f"Tile cache: {cache.stats()}\n")
+                except ValueError:
+                    self.MainFrame.console.append(f"Invalid cache size: {commands[2]}\n")
+            else:
+                self.MainFrame.console.append(f"Invalid Cache command: {' '.join(commands[1:])}\n")
+        elif commands[0] == "DiskCache":
+            disk_cache = get_default_disk_cache()
+            if len(commands) == 1:
+                self.MainFrame.console.append(f"Disk cache: {disk_cache.stats()}\n")
+            elif commands[1] in ("on", "off"):
+                disk_cache.set_max_bytes(DEFAULT_MAX_BYTES if commands[1] == "on" else 0)
+                self.save_disk_budget(disk_cache)
+            elif commands[1] == "clear":
+                disk_cache.clear()
+                self.MainFrame.console.append("Disk cache cleared\n")
+            elif commands[1] == "size" and len(commands) > 2:
+                try:
+                    disk_cache.set_max_bytes(max(int(float(commands[2]) * 2 ** 20), 0))
+                    self.save_disk_budget(disk_cache)
+                except ValueError:
+                    self.MainFrame.console.append(f"Invalid cache size: {commands[2]}\n")
+            else:
+                self.MainFrame.console.append(f"Invalid DiskCache command: {' '.join(commands[1:])}. Usage: "
+                                              f"DiskCache [on|off|clear|size <MB>]\n")
+        elif commands[0] == "Strategy":
+            if len(commands) == 1:
+                self.MainFrame.console.append(f"Current strategy: {subdivision.get_default_strategy()}. "
+                                              f"Available strategies: "
+                                              f"{', '.join(subdivision.available_strategies())}\n")
+            elif commands[1] == "verify":
+                mandel = self.MainFrame.mandelbrot_canvas.mandel or MandelbrotCalculation(0.005, 100)
+                _, _, c = mandel.complex_grid()
+                differing, full_time, subdivided_time = subdivision.compare_strategies(mandel.backend, c,
+                                                                                       mandel.precision)
+                self.MainFrame.console.append(f"Subdivision differs from the full computation on {differing} of "
+                                              f"{c.size} points (full {full_time:.3f} s, subdivided "
+                                              f"{subdivided_time:.3f} s)\n")
+            else:
+                try:
+                    subdivision.set_default_strategy(commands[1])
+                    self.MainFrame.console.append(f"Using the {commands[1]} strategy\n")
+                    if commands[1] == "subdivide":
+                        self.MainFrame.console.append("Subdivision is approximate, check with: Strategy verify\n")
+                except ValueError as error:
+                    self.MainFrame.console.append(f"Could not switch strategy: {error}\n")
+        elif commands[0] == "Interior":
+            if len(commands) > 1 and commands[1] in ("on", "off"):
+                subdivided = subdivision.get_default_strategy() == "subdivide"
+                backends.set_interior_checks(commands[1] == "on")
+                if subdivided and commands[1] == "on":
+                    subdivision.set_default_strategy("full")
+                    self.MainFrame.console.append("Using the full strategy, subdivision needs the interior "
+                                                  "shortcuts disabled\n")
+            elif len(commands) > 1:
+                self.MainFrame.console.append(f"Invalid Interior command: {commands[1]}\n")
+                return
+            state = "enabled" if backends.get_interior_checks() else "disabled"
+            self.MainFrame.console.append(f"Interior shortcuts {state}\n")
+        elif commands[0] == "Cycles":
+            if len(commands) > 1 and commands[1] in ("on", "off"):
+                backends.set_cycle_checks(commands[1] == "on")
+            elif len(commands) > 1:
+                self.MainFrame.console.append(f"Invalid Cycles command: {commands[1]}\n")
+                return
+            state = "enabled" if backends.get_cycle_checks() else "disabled"
+            self.MainFrame.console.append(f"Cycle detection {state}\n")
+        elif commands[0] == "DeepZoom":
+            if len(commands) in (4, 5):
+                try:
+                    step = float(commands[3])
+                    precision = int(commands[4]) if len(commands) == 5 else 1000
+                    Decimal(commands[1]), Decimal(commands[2])
+                except (ValueError, InvalidOperation):
+                    self.MainFrame.console.append(f"Invalid DeepZoom command: {' '.join(commands[1:])}\n")
+                    return
+                self.MainFrame.run_thread(self.MainFrame.mandelbrot_scheduler,
+                                          self.MainFrame.mandelbrot_canvas.plot_mandelbrot_deep,
+                                          commands[1], commands[2], step, precision)
+            else:
+                self.MainFrame.console.append("DeepZoom command requires a center, a step and optionally a "
+                                              "precision: DeepZoom <re> <im> <step> [precision]\n")
+        elif commands[0] == "Density":
+            if 3 <= len(commands) <= 5:
+                try:
+                    step = float(commands[1])
+                    precision = int(commands[2])
+                    samples = int(commands[3]) if len(commands) > 3 else DENSITY_SAMPLES
+                except ValueError:
+                    self.MainFrame.console.append(f"Invalid Density command: {' '.join(commands[1:])}\n")
+                    return
+                shading = commands[4] if len(commands) > 4 else "log"
+                if shading not in DENSITY_SHADINGS:
+                    self.MainFrame.console.append(f"Unknown shading: {shading}. "
+                                                  f"Available shadings: {', '.join(DENSITY_SHADINGS)}\n")
+                    return
+                self.MainFrame.run_thread(self.MainFrame.bifurcation_scheduler,
+                                          self.MainFrame.bifurcation_canvas.plot_bifurcation_density,
+                                          step, precision, samples, shading)
+            else:
+                self.MainFrame.console.append("Density command requires a step, a precision and optionally a number "
+                                              "of samples and a shading: Density <step> <precision> [samples] "
+                                              "[log|equalized]\n")
+        elif commands[0] == "Lyapunov":
+            if len(commands) in (3, 4):
+                try:
+                    step = float(commands[1])
+                    precision = int(commands[2])
+                    samples = int(commands[3]) if len(commands) == 4 else LYAPUNOV_SAMPLES
+                except ValueError:
+                    self.MainFrame.console.append(f"Invalid Lyapunov command: {' '.join(commands[1:])}\n")
+                    return
+                self.MainFrame.run_thread(self.MainFrame.bifurcation_scheduler,
+                                          self.MainFrame.bifurcation_canvas.plot_lyapunov_overlay,
+                                          step, precision, samples)
+            else:
+                self.MainFrame.console.append("Lyapunov command requires a step, a precision and optionally a number "
+                                              "of samples: Lyapunov <step> <precision> [samples]\n")
+        elif commands[0] == "BifurcationLine":
+            if len(commands) in (5, 6):
+                try:
+                    start = complex(float(commands[1]), float(commands[2]))
+                    stop = complex(float(commands[3]), float(commands[4]))
+                    count = int(commands[5]) if len(commands) == 6 else 200
+                except ValueError:
+                    self.MainFrame.console.append(f"Invalid BifurcationLine command: {' '.join(commands[1:])}\n")
+                    return
+                self.MainFrame.run_thread(self.MainFrame.bifurcation_scheduler,
+                                          self.MainFrame.bifurcation_canvas.plot_bifurcation_points,
+                                          np.linspace(start, stop, count))
+            else:
+                self.MainFrame.console.append("BifurcationLine command requires two end points and optionally a "
+                                              "number of points: BifurcationLine <re0> <im0> <re1> <im1> [count]\n")
+        elif commands[0] == "Profile":
+            if len(commands) == 1 or commands[1] in ("on", "off"):
+                if len(commands) > 1:
+                    profiling.set_profiling(commands[1] == "on")
+                state = "enabled" if profiling.get_profiling() else "disabled"
+                capture = "enabled" if profiling.get_cprofile() else "disabled"
+                self.MainFrame.console.append(f"Profiling {state}, cProfile capture {capture}, "
+                                              f"{len(profiling.last_traces())} job traces kept\n")
+            elif commands[1] == "dump":
+                try:
+                    count = int(commands[2]) if len(commands) > 2 else 5
+                except ValueError:
+                    self.MainFrame.console.append(f"Invalid number of traces: {commands[2]}\n")
+                    return
+                traces = profiling.last_traces(count)
+                if not traces:
+                    self.MainFrame.console.append("No job traces, enable them with: Profile on\n")
+                for trace in traces:
+                    self.MainFrame.console.append(trace.summary())
+                    if trace.profile:
+                        self.MainFrame.console.append(trace.profile)
+            elif commands[1] == "cprofile" and len(commands) > 2 and commands[2] in ("on", "off"):
+                profiling.set_cprofile(commands[2] == "on")
+                self.MainFrame.console.append(f"cProfile capture {'enabled' if commands[2] == 'on' else 'disabled'}"
+                                              f"\n")
+            elif commands[1] == "clear":
+                profiling.clear_traces()
+                self.MainFrame.console.append("Job traces cleared\n")
+            else:
+                self.MainFrame.console.append(f"Invalid Profile command: {' '.join(commands[1:])}. Usage: Profile "
+                                              f"[on|off|dump [count]|cprofile on|off|clear]\n")
         else:
             self.MainFrame.console.append(f"There is no such command as: {commands[0]}\n")
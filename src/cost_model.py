@@ -0,0 +1,416 @@
+import multiprocessing
+import os
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from backends import get_backend
+from mandelbrot_calc import CHUNK_SIZE, BifurcationCalculation, MandelbrotCalculation
+from tile_cache import get_default_cache
+
+CALIBRATION_STEP = 0.02
+CALIBRATION_R_VALUES = 20000
+CALIBRATION_PRECISIONS = (25, 100)
+CALIBRATION_REPEATS = 2
+MEMORY_FRACTION = 0.5
+MIN_BAND_ROWS = 8
+MIN_CHUNK_SIZE = 4096
+# Arrays kept for every Mandelbrot point: int32 counts, complex64 final z, the bool mask of known points and the
+# float32 RGB image.
+MANDELBROT_RESULT_BYTES = 4 + 8 + 1 + 12
+# The int32 counts of a Mandelbrot point copied into the tile cache, up to the byte budget of the cache.
+MANDELBROT_CACHED_BYTES = 4
+# Arrays kept for every r value: float64 r and x, int64 jitter and int32 period.
+LOGISTIC_RESULT_BYTES = 8 + 8 + 8 + 4
+# Coefficients used until a backend is calibrated, somewhat above those of the NumPy backend so that early plans
+# err on the side of smaller chunks.
+DEFAULT_MANDELBROT_SECONDS = (2e-7, 4e-9)
+DEFAULT_MANDELBROT_WORKING_BYTES = 128
+DEFAULT_LOGISTIC_SECONDS = (2e-7, 2e-9)
+DEFAULT_LOGISTIC_WORKING_BYTES = 128
+DEFAULT_PLOT_BYTES = 96
+
+_models = {}
+
+
+class CostModel:
+    """
+    Predictions of the run time and memory of the calculations of one backend, fitted from timed runs.
+
+    The run time of a point is modelled as a fixed cost plus a cost per iteration, which overestimates grids with
+    many interior points skipped by the shortcuts and underestimates grids with many points inside the set.
+
+    Attributes:
+        backend_name (str): The name of the backend the model was calibrated on.
+        mandelbrot_point_seconds (float): The fixed time of a Mandelbrot point.
+        mandelbrot_iteration_seconds (float): The time of a Mandelbrot point per unit of precision.
+        mandelbrot_working_bytes (float): The kernel memory of a Mandelbrot point while it is computed.
+        logistic_point_seconds (float): The fixed time of an r value.
+        logistic_iteration_seconds (float): The time of an r value per unit of precision.
+        logistic_working_bytes (float): The kernel memory of an r value while it is iterated.
+        plot_bytes (float): The memory of a point of a bifurcation scatter plot.
+        calibrated (bool): Whether the coefficients were measured, or are the defaults.
+    """
+
+    def __init__(self, backend_name, mandelbrot_seconds, mandelbrot_working_bytes, logistic_seconds,
+                 logistic_working_bytes, plot_bytes, calibrated=True):
+        """
+        Initialize the CostModel with calibrated coefficients.
+
+        Args:
+            backend_name (str): The name of the backend the model was calibrated on.
+            mandelbrot_seconds (tuple): The fixed time and the time per unit of precision of a Mandelbrot point.
+            mandelbrot_working_bytes (float): The kernel memory of a Mandelbrot point.
+            logistic_seconds (tuple): The fixed time and the time per unit of precision of an r value.
+            logistic_working_bytes (float): The kernel memory of an r value.
+            plot_bytes (float): The memory of a point of a bifurcation scatter plot.
+            calibrated (bool): Whether the coefficients were measured. Defaults to True.
+        """
+        self.backend_name = backend_name
+        self.mandelbrot_point_seconds, self.mandelbrot_iteration_seconds = mandelbrot_seconds
+        self.mandelbrot_working_bytes = mandelbrot_working_bytes
+        self.logistic_point_seconds, self.logistic_iteration_seconds = logistic_seconds
+        self.logistic_working_bytes = logistic_working_bytes
+        self.plot_bytes = plot_bytes
+        self.calibrated = calibrated
+
+    def mandelbrot_seconds(self, points, precision):
+        """
+        Predict the time of a Mandelbrot grid.
+
+        Args:
+            points (int): The number of grid points.
+            precision (int): The maximum number of iterations.
+
+        Returns:
+            float: The predicted run time in seconds.
+        """
+        return points * (self.mandelbrot_point_seconds + self.mandelbrot_iteration_seconds * precision)
+
+    def logistic_seconds(self, count, precision):
+        """
+        Predict the time of a bifurcation diagram.
+
+        Args:
+            count (int): The number of r values.
+            precision (int): The number of iterations.
+
+        Returns:
+            float: The predicted run time in seconds.
+        """
+        return count * (self.logistic_point_seconds + self.logistic_iteration_seconds * precision)
+
+    def plan_mandelbrot(self, rows, cols, precision, budget=None, state_bytes=0):
+        """
+        Plan a Mandelbrot grid to fit a memory budget, computing it in bands of rows when the whole grid does not.
+
+        The kept memory includes the copy of the counts in the default tile cache, up to the budget of the cache,
+        and the iteration state of the earlier grid kept while the new one is computed.
+
+        Args:
+            rows (int): The number of grid rows.
+            cols (int): The number of grid columns.
+            precision (int): The maximum number of iterations.
+            budget (int, optional): The memory budget in bytes. Defaults to None (memory_budget()).
+            state_bytes (int): The memory of the kept iteration state, as given by IterationState.nbytes.
+                Defaults to 0.
+
+        Returns:
+            JobPlan: The plan, whose `chunk` is the number of rows per band.
+        """
+        budget = memory_budget() if budget is None else budget
+        points = rows * cols
+        kept = (points * MANDELBROT_RESULT_BYTES + min(points * MANDELBROT_CACHED_BYTES, get_default_cache().max_bytes)
+                + state_bytes)
+        row_bytes = cols * self.mandelbrot_working_bytes
+        chunk = rows if budget is None else int((budget - kept) // max(row_bytes, 1))
+        fits = chunk >= min(rows, MIN_BAND_ROWS)
+        chunk = min(max(chunk, 1), rows)
+        return JobPlan("Mandelbrot grid", points, self.mandelbrot_seconds(points, precision),
+                       kept + chunk * row_bytes, budget, chunk if chunk < rows else None, fits)
+
+    def plan_logistic(self, count, precision, budget=None):
+        """
+        Plan a bifurcation diagram to fit a memory budget, iterating fewer r values together when needed.
+
+        Args:
+            count (int): The number of r values.
+            precision (int): The number of iterations.
+            budget (int, optional): The memory budget in bytes. Defaults to None (memory_budget()).
+
+        Returns:
+            JobPlan: The plan, whose `chunk` is the number of r values iterated together.
+        """
+        budget = memory_budget() if budget is None else budget
+        kept = count * (LOGISTIC_RESULT_BYTES + self.plot_bytes)
+        chunk = min(count, CHUNK_SIZE)
+        if budget is not None:
+            chunk = min(chunk, int((budget - kept) // max(self.logistic_working_bytes, 1)))
+        fits = chunk >= min(count, MIN_CHUNK_SIZE)
+        chunk = min(max(chunk, 1), count)
+        return JobPlan("bifurcation diagram", count, self.logistic_seconds(count, precision),
+                       kept + chunk * self.logistic_working_bytes, budget, chunk if chunk < min(count, CHUNK_SIZE)
+                       else None, fits)
+
+    def summary(self):
+        """
+        Describe the calibrated coefficients.
+
+        Returns:
+            str: The time and memory per point of every calculation.
+        """
+        state = "" if self.calibrated else " (defaults until calibrated)"
+        return (f"{self.backend_name} backend{state}: Mandelbrot {self.mandelbrot_point_seconds * 1e9:.0f} ns per "
+                f"point + {self.mandelbrot_iteration_seconds * 1e9:.2f} ns per iteration, "
+                f"{self.mandelbrot_working_bytes:.0f} B per point while computed; logistic "
+                f"{self.logistic_point_seconds * 1e9:.0f} ns per r + {self.logistic_iteration_seconds * 1e9:.2f} ns "
+                f"per iteration, {self.logistic_working_bytes:.0f} B per r while iterated, "
+                f"{self.plot_bytes:.0f} B per plotted point")
+
+
+class JobPlan:
+    """
+    The predicted cost of a job and how it is split to fit the memory budget.
+
+    Attributes:
+        name (str): What the job computes.
+        points (int): The number of points of the job.
+        seconds (float): The predicted run time.
+        peak_bytes (float): The predicted peak memory with the chosen chunk.
+        budget (int): The memory budget, or None if the available memory is unknown.
+        chunk (int): The number of rows or r values computed together, or None if the job is not split.
+        fits (bool): Whether the job fits the budget, possibly split.
+    """
+
+    def __init__(self, name, points, seconds, peak_bytes, budget, chunk, fits):
+        """
+        Initialize a JobPlan.
+
+        Args:
+            name (str): What the job computes.
+            points (int): The number of points of the job.
+            seconds (float): The predicted run time.
+            peak_bytes (float): The predicted peak memory with the chosen chunk.
+            budget (int): The memory budget, or None if the available memory is unknown.
+            chunk (int): The number of rows or r values computed together, or None if the job is not split.
+            fits (bool): Whether the job fits the budget.
+        """
+        self.name = name
+        self.points = points
+        self.seconds = seconds
+        self.peak_bytes = peak_bytes
+        self.budget = budget
+        self.chunk = chunk
+        self.fits = fits
+
+    def summary(self):
+        """
+        Describe the plan.
+
+        Returns:
+            str: The size, predicted time and memory of the job, and how it is split.
+        """
+        summary = (f"{self.name} of {self.points} points, predicted {self.seconds:.1f} s and "
+                   f"{self.peak_bytes / 2 ** 20:.0f} MB")
+        if self.budget is not None:
+            summary += f" of a {self.budget / 2 ** 20:.0f} MB budget"
+        if not self.fits:
+            summary += ", too large even when split"
+        elif self.chunk is not None:
+            summary += f", split in chunks of {self.chunk}"
+        return summary
+
+
+def available_memory():
+    """
+    Get the memory available to new allocations, from /proc/meminfo or else the number of free pages.
+
+    Returns:
+        int: The available memory in bytes, or None if it cannot be read.
+    """
+    try:
+        with open("/proc/meminfo", "r", encoding="ascii") as file:
+            for line in file:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def memory_budget():
+    """
+    Get the memory a job may use, MEMORY_FRACTION of the available memory.
+
+    Returns:
+        int: The budget in bytes, or None if the available memory is unknown.
+    """
+    available = available_memory()
+    return None if available is None else int(available * MEMORY_FRACTION)
+
+
+def traced_peak(func, *args):
+    """
+    Run a function and measure the memory it allocates with a tracemalloc session started for it.
+
+    tracemalloc has a single peak for the whole process, so the measurement is only meaningful in a process doing
+    nothing else, such as the one started by calibrate.
+
+    Args:
+        func (callable): The function.
+        *args: Arguments to pass to the function.
+
+    Returns:
+        int: The peak memory allocated by the function, in bytes.
+
+    Raises:
+        RuntimeError: If tracemalloc is already tracing, as its session belongs to someone else.
+    """
+    if tracemalloc.is_tracing():
+        raise RuntimeError("tracemalloc is already tracing, calibrate in a separate process")
+    tracemalloc.start()
+    try:
+        func(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def fit_seconds(run, count):
+    """
+    Time a run at every calibration precision and fit a fixed cost and a cost per unit of precision.
+
+    The best of CALIBRATION_REPEATS runs is kept at each precision, to leave out runs slowed by other threads.
+
+    Args:
+        run (callable): Function running the calculation at a given precision.
+        count (int): The number of points of the run.
+
+    Returns:
+        tuple: The fixed time and the time per unit of precision of a point, both non-negative.
+    """
+    times = []
+    for precision in CALIBRATION_PRECISIONS:
+        best = float("inf")
+        for _ in range(CALIBRATION_REPEATS):
+            start = time.perf_counter()
+            run(precision)
+            best = min(best, time.perf_counter() - start)
+        times.append(best)
+    (p0, p1), (t0, t1) = CALIBRATION_PRECISIONS, times
+    per_iteration = max((t1 - t0) / (p1 - p0), 0.0) / count
+    per_point = max(t0 / count - per_iteration * p0, 0.0)
+    return per_point, per_iteration
+
+
+def measure(backend_name=None):
+    """
+    Fit a cost model by timing and tracing small calculations on a backend, after a run that warms it up.
+
+    The calculations run in the calling process, which should be doing nothing else; see calibrate.
+
+    Args:
+        backend_name (str, optional): The name of the backend. Defaults to None (the default backend).
+
+    Returns:
+        CostModel: The calibrated model.
+    """
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    backend = get_backend(backend_name)
+    mandel = MandelbrotCalculation(CALIBRATION_STEP, 1, backend=backend.name)
+    _, _, c = mandel.complex_grid()
+    backend.escape_time(c[:4, :4], CALIBRATION_PRECISIONS[0])
+    mandelbrot_seconds = fit_seconds(lambda precision: backend.escape_time(c, precision), c.size)
+    mandelbrot_bytes = traced_peak(lambda: backend.escape_time(mandel.complex_grid()[2], CALIBRATION_PRECISIONS[0]))
+    mandelbrot_bytes = max(mandelbrot_bytes / c.size, 1.0)
+
+    logi = BifurcationCalculation(1.0, 1, backend=backend.name)
+    logi.set_step_count((logi.restop - logi.restart) / CALIBRATION_R_VALUES)
+    r = logi.r_grid()
+    jitter = np.zeros(r.size, dtype=np.int64)
+    backend.logistic(r[:16], 0.2, CALIBRATION_PRECISIONS[0], jitter[:16])
+    logistic_seconds = fit_seconds(lambda precision: backend.logistic(r, 0.2, precision, jitter), r.size)
+    logistic_bytes = traced_peak(lambda: backend.logistic(r, 0.2, CALIBRATION_PRECISIONS[1], jitter)) / r.size
+
+    def plot():
+        figure = Figure(figsize=(4, 3), dpi=50)
+        figure.add_subplot(111).scatter(r, np.full(r.size, 0.5), 0.05, 'b')
+        FigureCanvasAgg(figure).draw()
+
+    plot()
+    plot_bytes = traced_peak(plot) / r.size
+    return CostModel(backend.name, mandelbrot_seconds, mandelbrot_bytes, logistic_seconds, max(logistic_bytes, 1.0),
+                     plot_bytes)
+
+
+def calibrate(backend_name=None):
+    """
+    Fit a cost model of a backend in a new process, so that neither the memory traced nor the tracemalloc session
+    is shared with the calculations and profiling of this process.
+
+    Args:
+        backend_name (str, optional): The name of the backend. Defaults to None (the default backend).
+
+    Returns:
+        CostModel: The calibrated model.
+    """
+    name = get_backend(backend_name).name
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+        return pool.submit(measure, name).result()
+
+
+def default_model(backend_name):
+    """
+    Get a cost model with the default coefficients, used until a backend is calibrated.
+
+    Args:
+        backend_name (str): The name of the backend.
+
+    Returns:
+        CostModel: The uncalibrated model.
+    """
+    return CostModel(backend_name, DEFAULT_MANDELBROT_SECONDS, DEFAULT_MANDELBROT_WORKING_BYTES,
+                     DEFAULT_LOGISTIC_SECONDS, DEFAULT_LOGISTIC_WORKING_BYTES, DEFAULT_PLOT_BYTES, calibrated=False)
+
+
+def is_calibrated(backend_name=None):
+    """
+    Check whether the cost model of a backend has been calibrated.
+
+    Args:
+        backend_name (str, optional): The name of the backend. Defaults to None (the default backend).
+
+    Returns:
+        bool: True if the backend has a calibrated model.
+    """
+    return get_backend(backend_name).name in _models
+
+
+def get_cost_model(backend_name=None, recalibrate=False, wait=True):
+    """
+    Get the cost model of a backend, calibrating it on first use.
+
+    Without waiting, the model with the default coefficients is returned until the backend has been calibrated,
+    which keeps the GUI thread responsive; the GUI calibrates in a job of its own, run while no render is running
+    since the timings would be slowed down by it.
+
+    Args:
+        backend_name (str, optional): The name of the backend. Defaults to None (the default backend).
+        recalibrate (bool): Whether to calibrate the model again. Ignored without waiting. Defaults to False.
+        wait (bool): Whether to calibrate the model if needed. Defaults to True.
+
+    Returns:
+        CostModel: The model, or the default model if it is not calibrated.
+    """
+    name = get_backend(backend_name).name
+    if wait and (recalibrate or name not in _models):
+        _models[name] = calibrate(name)
+    return _models.get(name) or default_model(name)
@@ -0,0 +1,266 @@
+import math
+from decimal import Decimal, localcontext
+
+import numpy as np
+
+from backends import CHECK_INTERVAL
+from jobs import check_token
+
+GLITCH_TOLERANCE = 1e-3
+SERIES_TOLERANCE = 2.0 ** -53
+MAX_REFERENCES = 32
+GUARD_DIGITS = 20
+
+
+def reference_orbit(c_re, c_im, precision, digits, token=None):
+    """
+    Iterate z -> z ** 2 + c for one point in high-precision decimal arithmetic.
+
+    Args:
+        c_re (Decimal): The real part of the point.
+        c_im (Decimal): The imaginary part of the point.
+        precision (int): The maximum number of iterations.
+        digits (int): The number of significant decimal digits of the arithmetic.
+        token (CancelToken, optional): Token checked every CHECK_INTERVAL iterations. Defaults to None.
+
+    Returns:
+        np.ndarray: The complex128 values z_0 = 0, z_1, ... up to z_(precision - 1) or the first value with |z| >= 2.
+    """
+    orbit = []
+    with localcontext() as ctx:
+        ctx.prec = digits
+        z_re = z_im = Decimal(0)
+        for i in range(precision):
+            if i % CHECK_INTERVAL == 0:
+                check_token(token)
+            orbit.append(complex(float(z_re), float(z_im)))
+            if z_re * z_re + z_im * z_im >= 4:
+                break
+            z_re, z_im = z_re * z_re - z_im * z_im + c_re, 2 * z_re * z_im + c_im
+    return np.array(orbit, dtype=np.complex128)
+
+
+def series_coefficients(orbit):
+    """
+    Compute the coefficients of the series approximation of the perturbation along a reference orbit.
+
+    The perturbation of a point at offset dc from the reference is delta_n ~ A_n dc + B_n dc ** 2 + C_n dc ** 3.
+
+    Args:
+        orbit (np.ndarray): The reference orbit.
+
+    Returns:
+        tuple: The A, B and C coefficients as complex128 arrays, one value per orbit entry.
+    """
+    a = np.zeros_like(orbit)
+    b = np.zeros_like(orbit)
+    c = np.zeros_like(orbit)
+    with np.errstate(over='ignore', invalid='ignore'):
+        for n in range(len(orbit) - 1):
+            a[n + 1] = 2 * orbit[n] * a[n] + 1
+            b[n + 1] = 2 * orbit[n] * b[n] + a[n] * a[n]
+            c[n + 1] = 2 * orbit[n] * c[n] + 2 * a[n] * b[n]
+    return a, b, c
+
+
+def series_skip(orbit, coefficients, max_offset):
+    """
+    Find how many iterations the series approximation can skip for every point within a distance of the reference.
+
+    An iteration can be skipped while the cubic term stays negligible against the linear term and no point
+    within the distance can have escaped yet, so skipping never changes an iteration count.
+
+    Args:
+        orbit (np.ndarray): The reference orbit.
+        coefficients (tuple): The A, B and C coefficients of the series.
+        max_offset (float): The largest distance of a point from the reference.
+
+    Returns:
+        int: The number of iterations to skip.
+    """
+    a, b, c = (np.abs(coefficient) for coefficient in coefficients)
+    with np.errstate(over='ignore', invalid='ignore'):
+        accurate = c * max_offset ** 3 <= SERIES_TOLERANCE * a * max_offset
+        bounded = np.abs(orbit) + a * max_offset + b * max_offset ** 2 + c * max_offset ** 3 < 2
+    valid = accurate & bounded
+    valid[0] = True
+    invalid = np.flatnonzero(~valid)
+    skip = invalid[0] - 1 if invalid.size else len(orbit) - 1
+    return max(int(skip), 0)
+
+
+def perturbation_kernel(orbit, dc, delta, start, precision, token=None):
+    """
+    Compute iteration counts by iterating the low-precision perturbation of every point from a reference orbit.
+
+    The perturbation follows delta_(n+1) = 2 Z_n delta_n + delta_n ** 2 + dc, where Z is the reference orbit.
+    Points with |Z_n + delta_n| < GLITCH_TOLERANCE |Z_n| have lost their precision and are flagged as glitched,
+    as are points still live when the reference orbit ends. Counts follow escape_time_kernel: a point that first
+    reaches |z| >= 2 before iteration i gets i - 1, a point that never escapes gets precision - 1.
+
+    Args:
+        orbit (np.ndarray): The reference orbit.
+        dc (np.ndarray): The complex128 offsets of the points from the reference.
+        delta (np.ndarray): The perturbation of every point at iteration `start`.
+        start (int): The iteration the perturbation starts at.
+        precision (int): The maximum number of iterations.
+        token (CancelToken, optional): Token checked every CHECK_INTERVAL iterations. Defaults to None.
+
+    Returns:
+        tuple: The int32 iteration counts, the glitch mask and the ratio |z| / |Z| at which each point glitched
+            (inf for points that did not glitch, 1 for points outliving the reference).
+    """
+    counts = np.full(dc.size, precision - 1, dtype=np.int32)
+    glitched = np.zeros(dc.size, dtype=bool)
+    ratio = np.full(dc.size, np.inf)
+
+    live = np.arange(dc.size)
+    dc_live = dc.ravel().astype(np.complex128)
+    delta_live = delta.ravel().astype(np.complex128)
+
+    with np.errstate(over='ignore', invalid='ignore'):
+        for n in range(start, precision):
+            if (n - start) % CHECK_INTERVAL == 0:
+                check_token(token)
+            if n >= len(orbit):
+                glitched[live] = True
+                ratio[live] = 1.0
+                break
+
+            z = orbit[n] + delta_live
+            magnitude = np.abs(z)
+            escaped = ~(magnitude < 2)
+            glitch = ~escaped & (magnitude < GLITCH_TOLERANCE * abs(orbit[n]))
+            done = escaped | glitch
+            if done.any():
+                counts[live[escaped]] = n - 1
+                glitched[live[glitch]] = True
+                ratio[live[glitch]] = magnitude[glitch] / abs(orbit[n])
+                kept = ~done
+                live, dc_live, delta_live = live[kept], dc_live[kept], delta_live[kept]
+                if live.size == 0:
+                    break
+
+            delta_live = 2 * orbit[n] * delta_live + delta_live * delta_live + dc_live
+
+    return counts, glitched, ratio
+
+
+class DeepZoomCalculation:
+    """
+    A class for computing Mandelbrot images far beyond the resolution of hardware floats, by perturbation.
+
+    One reference orbit at the center of the image is computed in high-precision decimal arithmetic. Every pixel
+    is then iterated as a complex128 perturbation of that orbit, starting after the iterations skipped by the
+    series approximation. Glitched pixels are recomputed against new reference orbits placed on them.
+    Offsets from the center are doubles, so zooms reach steps of about 1e-300.
+
+    Attributes:
+        center_re (Decimal): The real part of the center of the image.
+        center_im (Decimal): The imaginary part of the center of the image.
+        step (float): The distance between neighbouring pixels.
+        width (int): The number of pixel columns.
+        height (int): The number of pixel rows.
+        precision (int): The maximum number of iterations.
+        digits (int): The number of significant decimal digits of the reference orbits.
+        token (CancelToken): Token checked by the kernels so a superseded calculation stops early, or None.
+        iterations (np.ndarray): 2D image of the iteration count of every pixel, rows along the imaginary axis.
+        extent (tuple): The (left, right, bottom, top) bounds of the image as offsets from the center.
+        skipped (int): The number of iterations skipped by the series approximation.
+        references (int): The number of reference orbits used.
+        glitched (int): The number of pixels still glitched after the last reference.
+    """
+
+    def __init__(self, center_re, center_im, step, width, height, precision, token=None):
+        """
+        Initialize the DeepZoomCalculation with the specified center, pixel size, image size and precision.
+
+        Args:
+            center_re (str): The real part of the center, as a decimal string so no digits are lost.
+            center_im (str): The imaginary part of the center, as a decimal string.
+            step (float): The distance between neighbouring pixels.
+            width (int): The number of pixel columns.
+            height (int): The number of pixel rows.
+            precision (int): The maximum number of iterations.
+            token (CancelToken, optional): Token that cancels the calculation. Defaults to None.
+        """
+        self.center_re = Decimal(center_re)
+        self.center_im = Decimal(center_im)
+        self.step = float(step)
+        self.width = int(width)
+        self.height = int(height)
+        self.precision = int(precision)
+        self.digits = max(int(-math.log10(self.step)), 0) + GUARD_DIGITS
+        self.token = token
+        self.iterations = None
+        self.extent = None
+        self.skipped = 0
+        self.references = 0
+        self.glitched = 0
+
+    def pixel_offsets(self):
+        """
+        Build the offsets of the pixels from the center of the image.
+
+        Returns:
+            np.ndarray: The complex128 offsets, of shape (height, width).
+        """
+        re_offsets = (np.arange(self.width) - (self.width - 1) / 2) * self.step
+        im_offsets = (np.arange(self.height) - (self.height - 1) / 2) * self.step
+        return re_offsets[np.newaxis, :] + 1j * im_offsets[:, np.newaxis]
+
+    def orbit_at(self, offset):
+        """
+        Compute the reference orbit of the point at an offset from the center.
+
+        Args:
+            offset (complex): The offset of the point.
+
+        Returns:
+            np.ndarray: The reference orbit.
+        """
+        return reference_orbit(self.center_re + Decimal(offset.real), self.center_im + Decimal(offset.imag),
+                               self.precision, self.digits, self.token)
+
+    def compute_iterations(self):
+        """
+        Compute the iteration-count image and its extent.
+
+        Returns:
+            np.ndarray: The iteration counts.
+        """
+        dc = self.pixel_offsets().ravel()
+
+        orbit = self.orbit_at(0j)
+        coefficients = series_coefficients(orbit)
+        self.skipped = series_skip(orbit, coefficients, np.abs(dc).max())
+        a, b, c = (coefficient[self.skipped] for coefficient in coefficients)
+        delta = a * dc + b * dc ** 2 + c * dc ** 3
+        counts, glitched, ratio = perturbation_kernel(orbit, dc, delta, self.skipped, self.precision, self.token)
+        self.references = 1
+
+        while glitched.any() and self.references < MAX_REFERENCES:
+            index = np.flatnonzero(glitched)
+            reference = index[np.argmin(ratio[index])]
+            orbit = self.orbit_at(dc[reference])
+            offsets = dc[index] - dc[reference]
+            counts[index], glitched[index], ratio[index] = perturbation_kernel(
+                orbit, offsets, np.zeros_like(offsets), 0, self.precision, self.token)
+            self.references += 1
+
+        self.glitched = int(glitched.sum())
+        self.iterations = counts.reshape(self.height, self.width)
+        half_width = (self.width - 1) / 2 * self.step
+        half_height = (self.height - 1) / 2 * self.step
+        self.extent = (-half_width, half_width, -half_height, half_height)
+        return self.iterations
+
+    def summary(self):
+        """
+        Describe the last calculation.
+
+        Returns:
+            str: The number of reference orbits, skipped iterations and remaining glitched pixels.
+        """
+        return (f"{self.references} reference orbits at {self.digits} digits, {self.skipped} iterations skipped "
+                f"by series approximation, {self.glitched} glitched pixels left")
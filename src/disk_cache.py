@@ -0,0 +1,328 @@
+import hashlib
+import json
+import os
+import threading
+import zlib
+
+import numpy as np
+
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+# Results computed faster than this are not written, as reading them back would save little.
+MIN_WRITE_SECONDS = 0.5
+CRC_CHUNK_SIZE = 16 * 1024 * 1024
+SETTINGS_FILE = "settings.json"
+
+
+def default_cache_directory():
+    """
+    Get the directory of the default disk cache.
+
+    Returns:
+        str: $LPF_CACHE_DIR if set, otherwise a directory under $XDG_CACHE_HOME or ~/.cache.
+    """
+    if os.environ.get("LPF_CACHE_DIR"):
+        return os.environ["LPF_CACHE_DIR"]
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "logistical-projection-fractal")
+
+
+def default_max_bytes(directory=None):
+    """
+    Get the byte budget of the default disk cache.
+
+    Args:
+        directory (str, optional): The cache directory holding the saved budget. Defaults to None
+            (default_cache_directory()).
+
+    Returns:
+        int: $LPF_DISK_CACHE_MB in bytes if set, otherwise the budget saved by save_default_max_bytes(), otherwise
+            DEFAULT_MAX_BYTES.
+    """
+    try:
+        if os.environ.get("LPF_DISK_CACHE_MB"):
+            return max(int(float(os.environ["LPF_DISK_CACHE_MB"]) * 2 ** 20), 0)
+    except ValueError:
+        pass
+    try:
+        with open(os.path.join(directory or default_cache_directory(), SETTINGS_FILE), "r", encoding="utf-8") as file:
+            return max(int(json.load(file)["max_bytes"]), 0)
+    except (OSError, ValueError, KeyError, TypeError):
+        return DEFAULT_MAX_BYTES
+
+
+def save_default_max_bytes(max_bytes, directory=None):
+    """
+    Save the byte budget of the default disk cache for the next sessions. $LPF_DISK_CACHE_MB still overrides it.
+
+    Args:
+        max_bytes (int): The byte budget. 0 disables caching.
+        directory (str, optional): The cache directory. Defaults to None (default_cache_directory()).
+    """
+    directory = directory or default_cache_directory()
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, SETTINGS_FILE), "w", encoding="utf-8") as file:
+        json.dump({"max_bytes": int(max_bytes)}, file)
+
+
+def array_crc(array):
+    """
+    Compute the CRC32 checksum of the raw bytes of an array, a chunk at a time.
+
+    Args:
+        array (np.ndarray): The array, possibly memory-mapped.
+
+    Returns:
+        int: The checksum.
+    """
+    flat = array.reshape(-1).view(np.uint8)
+    crc = 0
+    for start in range(0, flat.size, CRC_CHUNK_SIZE):
+        crc = zlib.crc32(flat[start:start + CRC_CHUNK_SIZE], crc)
+    return crc
+
+
+class DiskCache:
+    """
+    A persistent cache of computed arrays stored as .npy files and loaded back as read-only memory maps.
+
+    Every entry is a pair of files named after the hash of its parameters: the .npy data and a .json sidecar
+    recording the parameters, shape, dtype and CRC32 of the data. Entries whose file does not match its
+    sidecar are deleted. The full checksum is verified the first time an entry is loaded in a process.
+    When the cache grows past its byte budget the least recently used entries are deleted.
+
+    Results that took less than `min_seconds` to compute are not written, so cheap renders do not churn the disk.
+    The budget of the default disk cache is given by default_max_bytes().
+
+    Attributes:
+        directory (str): The directory holding the cache files.
+        max_bytes (int): The byte budget of the cache. 0 disables caching.
+        min_seconds (float): The compute time below which results are not written.
+        hits (int): The number of lookups that found a valid entry.
+        misses (int): The number of lookups that did not.
+    """
+
+    def __init__(self, directory=None, max_bytes=DEFAULT_MAX_BYTES, min_seconds=MIN_WRITE_SECONDS):
+        """
+        Initialize the DiskCache with the specified directory and byte budget.
+
+        Args:
+            directory (str, optional): The cache directory. Defaults to None (default_cache_directory()).
+            max_bytes (int): The byte budget of the cache. Defaults to DEFAULT_MAX_BYTES.
+            min_seconds (float): The compute time below which results are not written. Defaults to
+                MIN_WRITE_SECONDS.
+        """
+        self.directory = directory or default_cache_directory()
+        self.max_bytes = max_bytes
+        self.min_seconds = min_seconds
+        self.hits = 0
+        self.misses = 0
+        self._verified = set()
+        self._lock = threading.Lock()
+
+    def key_name(self, params):
+        """
+        Get the file name stem of the entry for a set of parameters.
+
+        Args:
+            params (dict): JSON-serializable parameters identifying the entry.
+
+        Returns:
+            str: The hex digest of the parameters.
+        """
+        return hashlib.sha256(json.dumps(params, sort_keys=True).encode()).hexdigest()
+
+    def paths(self, params):
+        """
+        Get the data and sidecar paths of the entry for a set of parameters.
+
+        Args:
+            params (dict): JSON-serializable parameters identifying the entry.
+
+        Returns:
+            tuple: The .npy path and the .json path.
+        """
+        stem = os.path.join(self.directory, self.key_name(params))
+        return stem + ".npy", stem + ".json"
+
+    def get(self, params):
+        """
+        Load an entry as a read-only memory map.
+
+        Args:
+            params (dict): JSON-serializable parameters identifying the entry.
+
+        Returns:
+            np.memmap: The cached array, or None if there is no valid entry.
+        """
+        if self.max_bytes <= 0:
+            return None
+
+        data_path, meta_path = self.paths(params)
+        with self._lock:
+            try:
+                with open(meta_path, "r", encoding="utf-8") as file:
+                    meta = json.load(file)
+                array = np.load(data_path, mmap_mode="r")
+            except (OSError, ValueError):
+                self.misses += 1
+                return None
+
+            if not self.is_valid(data_path, meta, params, array):
+                del array
+                self.remove(data_path, meta_path)
+                self.misses += 1
+                return None
+
+            os.utime(data_path)
+            self.hits += 1
+            return array
+
+    def is_valid(self, data_path, meta, params, array):
+        """
+        Check an entry against its sidecar.
+
+        Args:
+            data_path (str): The path of the .npy file.
+            meta (dict): The content of the sidecar.
+            params (dict): The parameters the entry was looked up with.
+            array (np.ndarray): The memory-mapped data.
+
+        Returns:
+            bool: True if the parameters, shape and dtype match, and the checksum matches on first load.
+        """
+        if meta.get("params") != json.loads(json.dumps(params)):
+            return False
+        if list(array.shape) != meta.get("shape") or str(array.dtype) != meta.get("dtype"):
+            return False
+        if data_path not in self._verified:
+            if array_crc(array) != meta.get("crc"):
+                return False
+            self._verified.add(data_path)
+        return True
+
+    def put(self, params, array, seconds=None):
+        """
+        Store an array, then evict the least recently used entries until the cache fits its budget.
+
+        The files are written under temporary names and renamed, so readers never see a partial entry.
+
+        Args:
+            params (dict): JSON-serializable parameters identifying the entry.
+            array (np.ndarray): The array to store.
+            seconds (float, optional): The time it took to compute the array; it is not stored if that is below
+                `min_seconds`. Defaults to None (always store).
+        """
+        if self.max_bytes <= 0 or array.nbytes > self.max_bytes:
+            return
+        if seconds is not None and seconds < self.min_seconds:
+            return
+
+        array = np.ascontiguousarray(array)
+        data_path, meta_path = self.paths(params)
+        meta = {"params": params, "shape": list(array.shape), "dtype": str(array.dtype), "crc": array_crc(array)}
+
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(data_path + ".tmp", "wb") as file:
+                np.save(file, array)
+            with open(meta_path + ".tmp", "w", encoding="utf-8") as file:
+                json.dump(meta, file)
+            os.replace(data_path + ".tmp", data_path)
+            os.replace(meta_path + ".tmp", meta_path)
+            self._verified.add(data_path)
+            self.evict()
+
+    def entries(self):
+        """
+        List the data files of the cache with their size and last access time.
+
+        Returns:
+            list: The (mtime, size, data_path) of every entry, oldest first.
+        """
+        if not os.path.isdir(self.directory):
+            return []
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".npy"):
+                path = os.path.join(self.directory, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return sorted(entries)
+
+    def evict(self):
+        """
+        Delete the least recently used entries until the cache fits its byte budget.
+        """
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, data_path in entries:
+            if total <= self.max_bytes:
+                break
+            self.remove(data_path, data_path[:-len(".npy")] + ".json")
+            total -= size
+
+    def remove(self, data_path, meta_path):
+        """
+        Delete the files of an entry, ignoring files that are already gone.
+
+        Args:
+            data_path (str): The path of the .npy file.
+            meta_path (str): The path of the .json file.
+        """
+        for path in (data_path, meta_path):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        self._verified.discard(data_path)
+
+    def set_max_bytes(self, max_bytes):
+        """
+        Set the byte budget of the cache, evicting entries if it shrank. Disabling the cache keeps its entries.
+
+        Args:
+            max_bytes (int): The new byte budget. 0 disables caching.
+        """
+        with self._lock:
+            self.max_bytes = max_bytes
+            if max_bytes > 0:
+                self.evict()
+
+    def clear(self):
+        """
+        Delete every entry and reset the hit and miss counters.
+        """
+        with self._lock:
+            for _, _, data_path in self.entries():
+                self.remove(data_path, data_path[:-len(".npy")] + ".json")
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """
+        Describe the state of the cache.
+
+        Returns:
+            str: The number of entries, disk use and hit/miss counters.
+        """
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        budget = f"{self.max_bytes / 2 ** 20:.1f} MB" if self.max_bytes > 0 else "disabled"
+        return (f"{len(entries)} entries in {self.directory}, {total / 2 ** 20:.1f} MB used ({budget}), "
+                f"{self.hits} hits, {self.misses} misses")
+
+
+default_disk_cache = DiskCache(max_bytes=default_max_bytes())
+
+
+def get_default_disk_cache():
+    """
+    Get the disk cache shared by all calculations that do not ask for a specific one.
+
+    Returns:
+        DiskCache: The default disk cache.
+    """
+    return default_disk_cache
@@ -0,0 +1,61 @@
+import threading
+
+
+class JobCancelled(Exception):
+    """
+    Raised inside a job when its cancellation token has been cancelled.
+    """
+
+
+class CancelToken:
+    """
+    A thread-safe flag telling a running job that its result is no longer wanted.
+
+    Compute kernels call check() between iteration batches, so a cancelled job stops at the next batch boundary.
+    """
+
+    def __init__(self):
+        """
+        Initialize a token that is not cancelled.
+        """
+        self._event = threading.Event()
+
+    def cancel(self):
+        """
+        Cancel the job holding this token.
+        """
+        self._event.set()
+
+    @property
+    def cancelled(self):
+        """
+        Whether the token has been cancelled.
+
+        Returns:
+            bool: True if cancel() has been called.
+        """
+        return self._event.is_set()
+
+    def check(self):
+        """
+        Stop the current job if the token has been cancelled.
+
+        Raises:
+            JobCancelled: If the token has been cancelled.
+        """
+        if self._event.is_set():
+            raise JobCancelled()
+
+
+def check_token(token):
+    """
+    Stop the current job if the given token exists and has been cancelled.
+
+    Args:
+        token (CancelToken): The token to check, or None.
+
+    Raises:
+        JobCancelled: If the token has been cancelled.
+    """
+    if token is not None:
+        token.check()
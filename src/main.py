@@ -1,6 +1,10 @@
+import math
 import os
 import sys
+import threading
+import time
 from datetime import datetime
+from functools import partial
 
 import webbrowser
 
@@ -14,18 +18,31 @@ from PyQt5.QtWidgets import QMainWindow, QLabel, QVBoxLayout, QHBoxLayout, QFram
     QStyleFactory, QTextEdit, QWidget, QLineEdit, QFileDialog, QPushButton, QSplitter
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg, NavigationToolbar2QT as NavigationToolbar
 from matplotlib.figure import Figure
-from mandelbrot_calc import MandelbrotCalculation, BifurcationCalculation
+from backends import get_default_backend_name
+from mandelbrot_calc import MandelbrotCalculation, BifurcationCalculation, shade_density
+from deep_zoom import DeepZoomCalculation
+from cost_model import get_cost_model, is_calibrated
+from jobs import CancelToken, JobCancelled, check_token
+from profiling import job_trace, stage
 import console_handler as chand
 from PyQt5.QtCore import Qt
-import threading as thread
 matplotlib.use('Qt5Agg')
 
+VIEWPORT_DEBOUNCE_MS = 300
+# The (step, precision) of the plots drawn at startup.
+INITIAL_MANDELBROT_SETTINGS = (0.05, 20)
+INITIAL_LOGISTIC_SETTINGS = (0.00001, 100)
+# The (left, right, bottom, top) limits of the bifurcation diagrams of a point clicked on the Mandelbrot plot.
+BIFURCATION_POINT_EXTENT = (-2.0, 0.5, -0.6, 0.4)
+
 
 class FractalCanvas(FigureCanvasQTAgg):
     """
     A class for creating a canvas to display various fractals.
     """
 
+    viewport_changed = pyqtSignal()
+
     def __init__(self, width=30, height=20, dpi=100):
         """
         Initialize the FractalCanvas with specified dimensions and resolution.
@@ -35,96 +52,518 @@ class FractalCanvas(FigureCanvasQTAgg):
         :param dpi: Dots per inch for the figure, defaults to 100.
         """
         self.mandel = None
+        self.plot_settings = None
+        self.image = None
+        self.bifurcation = None
+        self.bifurcation_key = None
+        self.bifurcation_columns = None
+        self.bifurcation_background = None
+        self.lyapunov_axes = None
+        self.gradient_name = None
+        self.scheduler = None
+        self.draw_lock = threading.Lock()
         self.figure = Figure(figsize=(width, height), dpi=dpi)
         super().__init__(self.figure)
 
-    def plot_mandelbrot_col(self, step=0.05, precision=20):
+        self.viewport_timer = QtCore.QTimer(self)
+        self.viewport_timer.setSingleShot(True)
+        self.viewport_timer.setInterval(VIEWPORT_DEBOUNCE_MS)
+        self.viewport_timer.timeout.connect(self.recompute_viewport)
+        self.viewport_changed.connect(self.viewport_timer.start)
+
+    def draw(self):
+        """
+        Render the figure, timed as the draw stage of the job when profiling is enabled.
+
+        The copy of the axes that bifurcation diagrams of a point are blitted onto is dropped, as it may be stale.
+        """
+        self.bifurcation_background = None
+        with stage("draw"):
+            super().draw()
+
+    def enable_viewport_tracking(self, scheduler):
+        """
+        Recompute the Mandelbrot plot for the visible region whenever the axis limits change.
+
+        Changes are debounced, so zooming or panning only starts a job once the interaction pauses.
+
+        :param scheduler: The render scheduler of this canvas.
+        """
+        self.scheduler = scheduler
+
+    def on_limits_changed(self, ax):
+        """
+        Handle a change of the axis limits, from whichever thread made it.
+
+        :param ax: The axes whose limits changed.
+        """
+        if self.scheduler is not None:
+            self.viewport_changed.emit()
+
+    def recompute_viewport(self):
+        """
+        Schedule a Mandelbrot job for the visible region, at a step matching the pixel size of the axes.
+
+        The step is rounded down to a power of sqrt(2), so views panned at the same zoom share their cached tiles.
+
+        Nothing is scheduled while the limits still match the extent of the image, which is the case after
+        every change made by the plot itself rather than by the user.
+        """
+        with self.draw_lock:
+            if self.image is None:
+                return
+
+            ax = self.image.axes
+            x0, x1 = sorted(ax.get_xlim())
+            y0, y1 = sorted(ax.get_ylim())
+            if np.allclose((x0, x1, y0, y1), self.image.get_extent()):
+                return
+
+            bbox = ax.get_window_extent()
+        step = max((x1 - x0) / max(bbox.width, 1), (y1 - y0) / max(bbox.height, 1))
+        step = 2 ** (math.floor(2 * math.log2(step)) / 2)
+        self.scheduler.submit(self.plot_mandelbrot_region, (x0, x1, y0, y1), step, self.mandel.precision,
+                              self.gradient_name)
+
+    def plot_mandelbrot_region(self, region, step, precision, gradient_name, progress=None, token=None):
+        """
+        Plot the Mandelbrot set for a region into the existing axes, keeping the current view. The image is not
+        written to the disk cache, as panned and zoomed views are seldom seen again.
+
+        :param region: The (restart, restop, imstart, imstop) bounds of the region.
+        :param step: Step size for the calculation.
+        :param precision: Precision for the calculation.
+        :param gradient_name: Name of the MandelbrotCalculation gradient used to color the plot.
+        :param progress: Callable receiving a message after each resolution level, defaults to None.
+        :param token: Cancellation token of the job, defaults to None.
+        :return: A message naming the backend, the iterations saved and the precision the calculation continued from.
+        """
+        mandel = MandelbrotCalculation(step, precision, token=token, disk_writes=False, state=self.iteration_state())
+        mandel.set_region(*region)
+        self.plot_mandelbrot_progressive(mandel, getattr(mandel, gradient_name), 0.0, progress, keep_axes=True)
+
+        return f"Computed the visible region with the {mandel.backend.name} backend, {mandel.work_summary()}."
+
+    def plot_mandelbrot_col(self, step=0.05, precision=20, progress=None, token=None, region=None, band_rows=None):
         """
         Plot the Mandelbrot set in color.
 
         :param step: Step size for the calculation, defaults to 0.05.
         :param precision: Precision for the calculation, defaults to 20.
+        :param progress: Callable receiving a message after each resolution level, defaults to None.
+        :param token: Cancellation token of the job, defaults to None.
+        :param region: The (restart, restop, imstart, imstop) bounds to plot, defaults to None (the whole set).
+        :param band_rows: Maximum number of rows computed together, defaults to None (no limit).
+        :return: A message naming the backend, the iterations saved and the precision the calculation continued from.
         """
-        self.figure.clear()
-        ax = self.figure.add_subplot(111, position=[0.05, 0.05, 0.9, 0.9])
-
-        self.mandel = MandelbrotCalculation(step, precision)
-        self.mandel.compute_mandelbrot_col()
+        mandel = MandelbrotCalculation(step, precision, token=token, band_rows=band_rows, state=self.iteration_state())
+        if region is not None:
+            mandel.set_region(*region)
+        self.plot_mandelbrot_progressive(mandel, mandel.psych_grad, mandel.color_margin, progress)
+        self.plot_settings = (step, precision)
 
-        ax.scatter(self.mandel.x_array, self.mandel.y_array, 0.2, self.mandel.c_array)
-        ax.set_xlabel('X')
-        ax.set_ylabel('Y')
+        return f"Computed with the {mandel.backend.name} backend, {mandel.work_summary()}."
 
-        self.draw()
-
-    def plot_mandelbrot_bw(self, step=0.00001, precision=100):
+    def plot_mandelbrot_bw(self, step=0.00001, precision=100, progress=None, token=None, region=None,
+                           band_rows=None):
         """
         Plot the Mandelbrot set in black and white.
 
         :param step: Step size for the calculation, defaults to 0.00001.
         :param precision: Precision for the calculation, defaults to 100.
+        :param progress: Callable receiving a message after each resolution level, defaults to None.
+        :param token: Cancellation token of the job, defaults to None.
+        :param region: The (restart, restop, imstart, imstop) bounds to plot, defaults to None (the whole set).
+        :param band_rows: Maximum number of rows computed together, defaults to None (no limit).
+        :return: A message naming the backend, the iterations saved and the precision the calculation continued from.
         """
-        self.figure.clear()
-        ax = self.figure.add_subplot(111, position=[0.05, 0.05, 0.9, 0.9])
+        mandel = MandelbrotCalculation(step, precision, token=token, band_rows=band_rows, state=self.iteration_state())
+        if region is not None:
+            mandel.set_region(*region)
+        self.plot_mandelbrot_progressive(mandel, mandel.bw_grad, 0.0, progress)
+        self.plot_settings = (step, precision)
+
+        return f"Computed with the {mandel.backend.name} backend, {mandel.work_summary()}."
 
-        self.mandel = MandelbrotCalculation(step, precision)
-        self.mandel.compute_mandelbrot_bw()
-        ax.scatter(self.mandel.x_array, self.mandel.y_array, 0.05, color='b')
-        ax.set_xlabel('X')
-        ax.set_ylabel('Y')
+    def iteration_state(self):
+        """
+        Get the iteration state of the Mandelbrot grid last drawn on the canvas, which the next plot of the same grid
+        at another precision continues from. Every canvas keeps its own.
 
-        self.draw()
+        :return: The IterationState, or None.
+        """
+        mandel = self.mandel
+        return mandel.state if mandel is not None else None
 
-    def plot_logistical(self, step=0.00001, precision=100):
+    def plan_mandelbrot(self, mandel, margin):
+        """
+        Plan a Mandelbrot plot on the canvas with the cost model of its backend, counting the iteration state the
+        canvas keeps. The state is released when the plot only fits the memory budget without it.
+
+        :param mandel: The Mandelbrot calculation to plan.
+        :param margin: Extra distance added on every side of the range.
+        :return: The JobPlan of the plot.
+        """
+        re_spec, im_spec = mandel.axis_specs(margin)
+        model = get_cost_model(mandel.backend.name, wait=False)
+        state = self.iteration_state()
+        state_bytes = state.nbytes() if state is not None else 0
+        plan = model.plan_mandelbrot(im_spec[1], re_spec[1], mandel.precision, state_bytes=state_bytes)
+        if not plan.fits and state_bytes:
+            self.mandel.release_state()
+            plan = model.plan_mandelbrot(im_spec[1], re_spec[1], mandel.precision)
+        return plan
+
+    def plot_mandelbrot_progressive(self, mandel, gradient, margin, progress=None, keep_axes=False):
+        """
+        Compute a Mandelbrot calculation coarse to fine, redrawing the canvas after each level.
+
+        Nothing is drawn once the token of the calculation has been cancelled.
+
+        :param mandel: The Mandelbrot calculation to run.
+        :param gradient: Gradient used to color the iteration counts.
+        :param margin: Extra distance added on every side of the range.
+        :param progress: Callable receiving a message after each resolution level, defaults to None.
+        :param keep_axes: Draw into the existing image and keep the axis limits, defaults to False.
+        """
+        image = None
+        for stride in mandel.compute_progressive(margin):
+            iterations, extent = mandel.level_view(stride)
+            colors = mandel.colorize(gradient, iterations)
+
+            with self.draw_lock:
+                check_token(mandel.token)
+                if image is None and keep_axes and self.image is not None:
+                    image = self.image
+                if image is None:
+                    self.figure.clear()
+                    self.bifurcation = None
+                    ax = self.figure.add_subplot(111, position=[0.05, 0.05, 0.9, 0.9])
+                    ax.set_xlabel('X')
+                    ax.set_ylabel('Y')
+                    image = ax.imshow(colors, origin='lower', extent=extent, interpolation='nearest', aspect='auto')
+                    ax.callbacks.connect('xlim_changed', self.on_limits_changed)
+                    ax.callbacks.connect('ylim_changed', self.on_limits_changed)
+                    self.image = image
+                else:
+                    image.set_data(colors)
+                    image.set_extent(extent)
+                self.mandel = mandel
+                self.gradient_name = gradient.__name__
+
+                self.draw()
+
+            if progress and stride > 1:
+                progress(f"Preview at step {mandel.step * stride:g} ready, refining...")
+
+    def plot_mandelbrot_deep(self, center_re, center_im, step, precision=1000, width=640, height=480, progress=None,
+                             token=None):
+        """
+        Plot a deep zoom of the Mandelbrot set in color, computed by perturbation around a high-precision center.
+
+        The axes show offsets from the center, and the view is not recomputed on zoom or pan.
+
+        :param center_re: Real part of the center, as a decimal string.
+        :param center_im: Imaginary part of the center, as a decimal string.
+        :param step: Distance between neighbouring pixels.
+        :param precision: Precision for the calculation, defaults to 1000.
+        :param width: Number of pixel columns, defaults to 640.
+        :param height: Number of pixel rows, defaults to 480.
+        :param progress: Callable receiving progress messages, unused, defaults to None.
+        :param token: Cancellation token of the job, defaults to None.
+        :return: A message describing the reference orbits, skipped iterations and glitches.
+        """
+        deep = DeepZoomCalculation(center_re, center_im, step, width, height, precision, token=token)
+        deep.compute_iterations()
+        mandel = MandelbrotCalculation(deep.step, deep.precision)
+        colors = mandel.colorize(mandel.psych_grad, deep.iterations)
+
+        with self.draw_lock:
+            check_token(token)
+            self.figure.clear()
+            self.image = None
+            self.bifurcation = None
+            self.mandel = None
+            ax = self.figure.add_subplot(111, position=[0.05, 0.05, 0.9, 0.9])
+            ax.imshow(colors, origin='lower', extent=deep.extent, interpolation='nearest', aspect='auto')
+            ax.set_xlabel(f'X - {center_re}')
+            ax.set_ylabel(f'Y - {center_im}')
+
+            self.draw()
+
+        return f"Deep zoom computed: {deep.summary()}."
+
+    def plot_logistical(self, step=0.00001, precision=100, progress=None, token=None, chunk_size=None):
         """
         Plot the logistic map.
 
         :param step: Step size for the calculation, defaults to 0.00001.
         :param precision: Precision for the calculation, defaults to 100.
+        :param progress: Callable receiving progress messages, unused, defaults to None.
+        :param token: Cancellation token of the job, defaults to None.
+        :param chunk_size: Maximum number of r values iterated together, defaults to None (the default chunk size).
+        :return: A message naming the backend that ran the calculation and the cycles it found.
         """
-        self.figure.clear()
-        ax = self.figure.add_subplot(111, position=[0.05, 0.05, 0.9, 0.9])
-
-        logi = BifurcationCalculation(step, precision)
+        logi = BifurcationCalculation(step, precision, token=token, chunk_size=chunk_size)
         logi.compute_bifurcation()
-        ax.scatter(logi.r_array, logi.x_array, 0.05, 'b')
-        ax.set_xlabel('X')
-        ax.set_ylabel('Y')
 
-        self.draw()
+        with self.draw_lock:
+            check_token(token)
+            self.figure.clear()
+            self.image = None
+            self.bifurcation = None
+            ax = self.figure.add_subplot(111, position=[0.05, 0.05, 0.9, 0.9])
+
+            with stage("scatter"):
+                ax.scatter(logi.r_array, logi.x_array, 0.05, 'b')
+            ax.set_xlabel('X')
+            ax.set_ylabel('Y')
 
-    def plot_bifurcation_from_point(self, real, imag, step=0.00001, precision=100):
+            self.draw()
+            self.plot_settings = (step, precision)
+
+        return f"Computed with the {logi.backend.name} backend, {logi.period_summary()}."
+
+    def plot_bifurcation_from_point(self, real, imag, step=0.00001, precision=100, progress=None, token=None):
         """
         Plot the bifurcation diagram starting from a given point in the complex plane.
 
+        The base orbit comes from the in-memory orbit cache after the first plot, and the points are binned to the
+        pixels of the axes and drawn as an image. While the r grid and the canvas size are unchanged the image is
+        updated in place and only it is redrawn, over a copy of the rest of the axes, so a click only scales the
+        orbit, bins it and blits an image whose size does not depend on the number of r values.
+
         :param real: Real part of the complex number.
         :param imag: Imaginary part of the complex number.
         :param step: Step size for the calculation, defaults to 0.00001.
         :param precision: Precision for the calculation, defaults to 100.
+        :param progress: Callable receiving progress messages, unused, defaults to None.
+        :param token: Cancellation token of the job, defaults to None.
+        :return: A message naming the backend that ran the calculation.
         """
-        self.figure.clear()
-        ax = self.figure.add_subplot(111, position=[0.05, 0.05, 0.9, 0.9])
-
-        logi = BifurcationCalculation(step, precision)
+        logi = BifurcationCalculation(step, precision, token=token)
         logi.compute_bifurcation_from_point(real, imag)
-        ax.scatter(logi.r_array, logi.x_array, 0.05, 'b')
+        key = (logi.restart, logi.restop, step, precision, self.get_width_height())
+
+        with self.draw_lock:
+            check_token(token)
+            if self.bifurcation is None or self.bifurcation_key != key:
+                self.figure.clear()
+                self.image = None
+                ax = self.figure.add_subplot(111, position=[0.05, 0.05, 0.9, 0.9])
+
+                ax.set_xlim(*BIFURCATION_POINT_EXTENT[:2])
+                ax.set_ylim(*BIFURCATION_POINT_EXTENT[2:])
+                ax.grid(True)
+                ax.set_xlabel('r')
+                ax.set_ylabel('x')
+
+                bbox = ax.get_window_extent()
+                height, width = max(int(bbox.height), 1), max(int(bbox.width), 1)
+                left, right = BIFURCATION_POINT_EXTENT[:2]
+                columns = np.floor((logi.r_array - left) / (right - left) * width)
+                self.bifurcation_columns = np.clip(columns, 0, width - 1).astype(np.int32)
+                self.bifurcation = ax.imshow(np.zeros((height, width, 4), dtype=np.uint8), origin='lower',
+                                             extent=BIFURCATION_POINT_EXTENT, interpolation='nearest', aspect='auto',
+                                             zorder=2)
+                self.bifurcation_key = key
+
+            with stage("bin"):
+                hit = self.orbit_pixels(logi.x_array)
+                pixels = np.zeros(hit.shape + (4,), dtype=np.uint8)
+                pixels[..., 2] = pixels[..., 3] = hit.view(np.uint8) * np.uint8(255)
+            if self.bifurcation_background is None:
+                spines = self.bifurcation.axes.spines.values()
+                self.bifurcation.set_data(np.zeros_like(pixels))
+                for spine in spines:
+                    spine.set_visible(False)
+                self.draw()
+                self.bifurcation_background = self.copy_from_bbox(self.bifurcation.axes.bbox.padded(2))
+                for spine in spines:
+                    spine.set_visible(True)
+            with stage("draw"):
+                self.bifurcation.set_data(pixels)
+                self.restore_region(self.bifurcation_background)
+                self.blit_orbit(hit)
+            self.update()
+
+        return f"Computed with the {logi.backend.name} backend."
+
+    def orbit_pixels(self, x_array):
+        """
+        Bin the points of a bifurcation diagram to the pixels of its image, in the columns of the current r grid.
 
-        ax.set_xlim(-2, 0.5)
-        ax.set_ylim(-0.6, 0.4)
+        The r values lie in the r range of the image, so only the x values are checked; those outside the image,
+        including NaN and infinities, are counted in a row below or above it that is dropped.
 
-        ax.grid(True)
+        :param x_array: The x value of every r of the grid.
+        :return: Boolean image, True in the pixels holding a point, with the first row at the bottom.
+        """
+        height, width = self.bifurcation.get_array().shape[:2]
+        bottom, top = BIFURCATION_POINT_EXTENT[2:]
+        scale = height / (top - bottom)
+        rows = np.subtract(x_array, bottom - 1 / scale, dtype=np.float32)
+        rows *= np.float32(scale)
+        np.fmax(rows, 0, out=rows)
+        np.fmin(rows, height + 1, out=rows)
+        index = rows.astype(np.int32)
+        index *= width
+        index += self.bifurcation_columns
+        hit = np.zeros((height + 2) * width, dtype=bool)
+        hit[index] = True
+        return hit.reshape(height + 2, width)[1:height + 1]
+
+    def blit_orbit(self, hit):
+        """
+        Draw the image of a bifurcation diagram of a point onto the rendered figure.
 
-        ax.set_xlabel('r')
-        ax.set_ylabel('x')
+        While the axes show the whole image, its pixels match those of the axes, so the points are written straight
+        into the render buffer; matplotlib takes tens of milliseconds to resample even a pixel-sized image. Otherwise
+        the image artist is drawn. The spines, left out of the copy of the axes, are drawn over the image as in a full
+        draw.
 
-        self.draw()
+        :param hit: Boolean image from orbit_pixels.
+        """
+        ax = self.bifurcation.axes
+        if ax.get_xlim() + ax.get_ylim() == BIFURCATION_POINT_EXTENT:
+            buffer = np.asarray(self.get_renderer().buffer_rgba())
+            left, bottom = int(ax.bbox.x0), int(ax.bbox.y0)
+            top = buffer.shape[0] - bottom
+            region = buffer[top - hit.shape[0]:top, left:left + hit.shape[1]]
+            region[hit[::-1]] = (0, 0, 255, 255)
+        else:
+            ax.draw_artist(self.bifurcation)
+        for spine in ax.spines.values():
+            ax.draw_artist(spine)
+
+    def save_figure(self, path, progress=None, token=None):
+        """
+        Save the figure of the canvas to an image file, without any plot drawing at the same time.
+
+        :param path: Path of the image file, whose extension selects the format.
+        :param progress: Callable receiving progress messages, unused, defaults to None.
+        :param token: Cancellation token of the job, defaults to None.
+        :return: A message naming the file.
+        """
+        with self.draw_lock:
+            check_token(token)
+            self.figure.savefig(path)
+
+        return f"Plot saved to {path}."
+
+    def plot_bifurcation_density(self, step=0.00001, precision=100, samples=100, shading="log", progress=None,
+                                 token=None):
+        """
+        Plot the logistic map as a density image of the last iterates of every r, binned to the canvas pixels.
+
+        :param step: Step size for the calculation, defaults to 0.00001.
+        :param precision: Precision for the calculation, defaults to 100.
+        :param samples: Number of iterates recorded per r, defaults to 100.
+        :param shading: "log" or "equalized" shading of the densities, defaults to "log".
+        :param progress: Callable receiving progress messages, unused, defaults to None.
+        :param token: Cancellation token of the job, defaults to None.
+        :return: A message naming the number of iterates binned and the backend that ran the calculation.
+        """
+        width, height = self.get_width_height()
+        logi = BifurcationCalculation(step, precision, token=token)
+        density = logi.compute_density((max(int(height * 0.9), 1), max(int(width * 0.9), 1)), samples)
+        shaded = shade_density(density, shading)
+
+        with self.draw_lock:
+            check_token(token)
+            self.figure.clear()
+            self.image = None
+            self.bifurcation = None
+            ax = self.figure.add_subplot(111, position=[0.05, 0.05, 0.9, 0.9])
+
+            ax.imshow(shaded, origin='lower', extent=logi.density_extent, interpolation='nearest', aspect='auto',
+                      cmap='Blues')
+            ax.set_xlabel('r')
+            ax.set_ylabel('x')
+
+            self.draw()
+
+        return f"Binned {int(density.sum())} iterates with the {logi.backend.name} backend."
+
+    def plot_lyapunov_overlay(self, step=0.00001, precision=100, samples=200, progress=None, token=None):
+        """
+        Draw the Lyapunov exponent of the logistic map as a line over the current plot, on its own y axis.
+
+        The exponent shares the r axis of the bifurcation plots. A previous overlay is replaced.
+
+        :param step: Step size for the calculation, defaults to 0.00001.
+        :param precision: Precision for the calculation, defaults to 100.
+        :param samples: Number of iterations averaged for r values without a cycle, defaults to 200.
+        :param progress: Callable receiving progress messages, unused, defaults to None.
+        :param token: Cancellation token of the job, defaults to None.
+        :return: A message with the share of chaotic r values and the backend that ran the calculation.
+        """
+        logi = BifurcationCalculation(step, precision, token=token)
+        exponents = logi.compute_lyapunov(samples)
+
+        with self.draw_lock:
+            check_token(token)
+            if self.lyapunov_axes is not None and self.lyapunov_axes in self.figure.axes:
+                self.lyapunov_axes.remove()
+            if self.figure.axes:
+                ax = self.figure.axes[0].twinx()
+            else:
+                ax = self.figure.add_subplot(111, position=[0.05, 0.05, 0.9, 0.9])
+                ax.set_xlabel('r')
+            self.lyapunov_axes = ax
+
+            ax.plot(logi.r_array, exponents, color='r', linewidth=0.5)
+            ax.axhline(0, color='k', linewidth=0.5, linestyle='--')
+            ax.set_ylim(-3, 1)
+            ax.set_ylabel('Lyapunov exponent')
+
+            self.draw()
+
+        chaotic = np.count_nonzero(exponents > 0)
+        return (f"Lyapunov exponent computed with the {logi.backend.name} backend, {chaotic} of {exponents.size} "
+                f"r values chaotic.")
+
+    def plot_bifurcation_points(self, points, step=0.001, precision=100, progress=None, token=None):
+        """
+        Plot the bifurcation diagrams of many points in the complex plane as a heatmap, one row per point.
+
+        :param points: The complex points.
+        :param step: Step size for the calculation, defaults to 0.001.
+        :param precision: Precision for the calculation, defaults to 100.
+        :param progress: Callable receiving progress messages, unused, defaults to None.
+        :param token: Cancellation token of the job, defaults to None.
+        :return: A message naming the number of points and the backend that ran the calculation.
+        """
+        logi = BifurcationCalculation(step, precision, token=token)
+        x_points = logi.compute_bifurcation_points(points)
+
+        with self.draw_lock:
+            check_token(token)
+            self.figure.clear()
+            self.image = None
+            self.bifurcation = None
+            ax = self.figure.add_subplot(111, position=[0.05, 0.05, 0.85, 0.9])
+
+            heatmap = ax.imshow(x_points, origin='lower', interpolation='nearest', aspect='auto', cmap='viridis',
+                                extent=(logi.r_array[0], logi.r_array[-1], -0.5, len(x_points) - 0.5))
+            self.figure.colorbar(heatmap, ax=ax, label='x')
+
+            ax.set_xlabel('r')
+            ax.set_ylabel('point')
+
+            self.draw()
+
+        return f"Computed {len(x_points)} points with the {logi.backend.name} backend."
 
     def clear_plot(self):
         """
         Clear the current plot.
         """
-        self.figure.clear()
-        self.draw()
+        with self.draw_lock:
+            self.figure.clear()
+            self.image = None
+            self.bifurcation = None
+            self.draw()
 
 
 
@@ -133,28 +572,32 @@ class KeyListener(QObject):
     A class to handle mouse click events on the Mandelbrot canvas and update the logistic canvas accordingly.
     """
 
-    def __init__(self, mandelbrot_canvas, logistic_canvas):
+    def __init__(self, mandelbrot_canvas, logistic_canvas, scheduler):
         """
         Initialize the KeyListener with the given Mandelbrot and logistic canvases.
 
         :param mandelbrot_canvas: The canvas displaying the Mandelbrot set.
         :param logistic_canvas: The canvas displaying the logistic map.
+        :param scheduler: The render scheduler of the logistic canvas.
         """
         super().__init__()
         self.mandelbrot_canvas = mandelbrot_canvas
         self.logistic_canvas = logistic_canvas
+        self.scheduler = scheduler
         self.mandelbrot_canvas.mpl_connect('button_press_event', self.on_click)
 
     def on_click(self, event):
         """
         Handle mouse click events on the Mandelbrot canvas and plot the bifurcation diagram on the logistic canvas.
 
+        The plot is scheduled as a render job, superseding any job still running on the logistic canvas.
+
         :param event: The mouse click event.
         """
         if event.inaxes is not None and event.canvas == self.mandelbrot_canvas:
             x, y = event.xdata, event.ydata
             print(f"Clicked coordinates: x={x}, y={y}")
-            self.logistic_canvas.plot_bifurcation_from_point(x, y)
+            self.scheduler.submit(self.logistic_canvas.plot_bifurcation_from_point, x, y)
 
 
 class FVThread(QObject):
@@ -165,27 +608,391 @@ class FVThread(QObject):
     finished = pyqtSignal(str)
     progress = pyqtSignal(str)
 
-    def __init__(self, func, *args):
+    def __init__(self, func, *args, token=None, name=None):
         """
         Initialize the FVThread with the given function and arguments.
 
-        :param func: The function to run in the thread.
+        :param func: The function to run in the thread. It receives the emit method of the progress signal as
+            its ``progress`` keyword argument and the cancellation token as its ``token`` keyword argument.
         :param args: Arguments to pass to the function.
+        :param token: Cancellation token of the job, defaults to None.
+        :param name: Name of the job in its profile, defaults to None (the name of the function).
         """
         super(FVThread, self).__init__()
         self.func = func
         self.args = args
+        self.token = token
+        self.name = name or getattr(func, "func", func).__name__
 
     @pyqtSlot()
     def run(self):
         """
         Execute the function in the thread, emitting progress and finished signals.
+
+        When profiling is enabled, the time and memory of every stage of the job are emitted as a progress message.
         """
         self.progress.emit("Regenerating plot. This may take a while...")
-        self.func(*self.args)
+        try:
+            with job_trace(self.name) as trace:
+                message = self.func(*self.args, progress=self.progress.emit, token=self.token)
+        except JobCancelled:
+            self.finished.emit("Plot regeneration superseded by a newer request.")
+            return
+        if message:
+            self.progress.emit(message)
+        if trace is not None:
+            self.progress.emit(trace.summary())
         self.finished.emit("Plot regeneration completed!")
 
 
+class RenderScheduler(QObject):
+    """
+    A class to run the render jobs of one canvas, where every new job supersedes the previous one.
+
+    Submitting a job cancels the token of the job before it, so the older job stops at its next cancellation
+    check and never draws again. Only the newest job can put its result on the canvas. Threads are kept
+    referenced until they have finished running.
+    """
+
+    def __init__(self, on_progress, on_finished):
+        """
+        Initialize the RenderScheduler with the handlers for the signals of its jobs.
+
+        :param on_progress: Slot connected to the progress signal of every job.
+        :param on_finished: Slot connected to the finished signal of every job.
+        """
+        super().__init__()
+        self.on_progress = on_progress
+        self.on_finished = on_finished
+        self.token = None
+        self.jobs = []
+
+    def submit(self, func, *args):
+        """
+        Run a function in a new thread, cancelling the job submitted before it.
+
+        :param func: The function to run in the thread.
+        :param args: Arguments to pass to the function.
+        """
+        self.cancel()
+        self.token = CancelToken()
+        self.jobs = [(thread, fv_thread) for thread, fv_thread in self.jobs if thread.isRunning()]
+
+        thread = QThread()
+        fv_thread = FVThread(func, *args, token=self.token)
+        fv_thread.moveToThread(thread)
+        self.jobs.append((thread, fv_thread))
+
+        thread.started.connect(fv_thread.run)
+        fv_thread.finished.connect(self.on_finished)
+        fv_thread.progress.connect(self.on_progress)
+        fv_thread.finished.connect(thread.quit)
+
+        thread.start()
+
+    def cancel(self):
+        """
+        Cancel the newest job, if any.
+        """
+        if self.token is not None:
+            self.token.cancel()
+
+
+class RenderJob:
+    """
+    A job of the render queue, with the function it runs and the times it was submitted, started and ended.
+
+    Attributes:
+        job_id (int): The number of the job, increasing in submission order.
+        description (str): The description shown by the Jobs command.
+        priority (int): Jobs of higher priority run first.
+        exclusive (bool): Whether the job waits for the other exclusive jobs, or starts as soon as it is submitted.
+        kind (str): The kind of work, whose measured rate estimates the run time of the job, or None.
+        work (float): The amount of work of the job, in the units of its rate.
+        predicted (float): The run time predicted by the cost model, used until a job of its kind completes, or None.
+        status (str): "queued", "running", "completed", "failed" or "cancelled".
+    """
+
+    def __init__(self, job_id, description, func, args, priority=0, exclusive=True, canvas=None, path=None,
+                 kind=None, work=0.0, predicted=None):
+        """
+        Initialize a queued job.
+
+        :param job_id: The number of the job.
+        :param description: The description shown by the Jobs command.
+        :param func: The function to run, called like the functions of FVThread.
+        :param args: Arguments to pass to the function.
+        :param priority: Jobs of higher priority run first, defaults to 0.
+        :param exclusive: Whether the job waits for the other exclusive jobs, defaults to True.
+        :param canvas: The canvas the job draws on or saves, saved to `path` once the function has run, defaults
+            to None.
+        :param path: Path of the image file the canvas is saved to, defaults to None.
+        :param kind: The kind of work of the job, defaults to None.
+        :param work: The amount of work of the job, defaults to 0.
+        :param predicted: The run time predicted by the cost model, defaults to None.
+        """
+        self.job_id = job_id
+        self.description = description
+        self.func = func
+        self.args = args
+        self.priority = priority
+        self.exclusive = exclusive
+        self.canvas = canvas
+        self.path = path
+        self.kind = kind
+        self.work = work
+        self.predicted = predicted
+        self.status = "queued"
+        self.token = CancelToken()
+        self.submitted = time.time()
+        self.started = None
+        self.ended = None
+        self.thread = None
+
+
+class JobQueue(QObject):
+    """
+    A queue of render jobs submitted by console commands and scripts, run one at a time by priority.
+
+    Unlike a RenderScheduler, a job never supersedes another one. Exclusive jobs, such as renders, run one after
+    the other in order of priority then submission; other jobs, such as saves, start in their own thread as soon
+    as the jobs submitted before them on the same canvas have ended. Exclusive jobs also wait for the earlier
+    non-exclusive jobs of their canvas, so a save sees every render queued before it and none queued after.
+    The time of every finished job is divided by its work to estimate the remaining time of the jobs of its kind;
+    until one has finished, the time predicted by the cost model is used.
+    """
+
+    def __init__(self, on_progress, on_finished):
+        """
+        Initialize the JobQueue with the handlers for the signals of its jobs.
+
+        :param on_progress: Slot connected to the progress signal of every job.
+        :param on_finished: Slot connected to the finished signal of every job.
+        """
+        super().__init__()
+        self.on_progress = on_progress
+        self.on_finished = on_finished
+        self.jobs = []
+        self.ended = []
+        self.next_id = 1
+        self.rates = {}
+        self.completed = 0
+        self.quit_when_idle = False
+
+    def submit(self, description, func, *args, priority=0, exclusive=True, canvas=None, path=None, kind=None,
+               work=0.0, predicted=None):
+        """
+        Add a job to the queue and start it if nothing holds it back.
+
+        :param description: The description shown by the Jobs command.
+        :param func: The function to run in the thread.
+        :param args: Arguments to pass to the function.
+        :param priority: Jobs of higher priority run first, defaults to 0.
+        :param exclusive: Whether the job waits for the other exclusive jobs, defaults to True.
+        :param canvas: The canvas the job draws on or saves, saved to `path` once the function has run, defaults
+            to None.
+        :param path: Path of the image file the canvas is saved to, defaults to None.
+        :param kind: The kind of work of the job, defaults to None.
+        :param work: The amount of work of the job, defaults to 0.
+        :param predicted: The run time predicted by the cost model, defaults to None.
+        :return: The queued job.
+        """
+        job = RenderJob(self.next_id, description, func, args, priority, exclusive, canvas, path, kind, work,
+                        predicted)
+        self.next_id += 1
+        self.jobs.append(job)
+        self.start_next()
+        return job
+
+    def queued(self):
+        """
+        Get the queued jobs in the order they will start.
+
+        :return: The list of queued jobs.
+        """
+        return sorted((job for job in self.jobs if job.status == "queued"), key=lambda job: (-job.priority, job.job_id))
+
+    def running(self):
+        """
+        Get the running jobs.
+
+        :return: The list of running jobs.
+        """
+        return [job for job in self.jobs if job.status == "running"]
+
+    def waits_on_canvas(self, job):
+        """
+        Check whether a job waits for a job submitted before it on the same canvas.
+
+        Exclusive jobs do not wait for each other here, as the queue order already runs them one at a time.
+
+        :param job: The queued job.
+        :return: True if an earlier job on the canvas of the job, other than an exclusive job when the job is
+            exclusive too, is queued or running.
+        """
+        return job.canvas is not None and any(
+            other.job_id < job.job_id and other.canvas is job.canvas and not (other.exclusive and job.exclusive)
+            for other in self.queued() + self.running())
+
+    def start_next(self):
+        """
+        Start every queued job that is not exclusive, and the first exclusive one if no exclusive job is running,
+        skipping the jobs that wait on their canvas.
+        """
+        exclusive_running = any(job.exclusive for job in self.running())
+        for job in self.queued():
+            if self.waits_on_canvas(job):
+                continue
+            if not job.exclusive:
+                self.start(job)
+            elif not exclusive_running:
+                self.start(job)
+                exclusive_running = True
+
+    def start(self, job):
+        """
+        Run a job in a new thread.
+
+        :param job: The job to run.
+        """
+        job.status = "running"
+        job.started = time.time()
+        thread = QThread()
+        fv_thread = FVThread(self.execute, job, token=job.token, name=job.description)
+        fv_thread.moveToThread(thread)
+        job.thread = (thread, fv_thread)
+
+        thread.started.connect(fv_thread.run)
+        fv_thread.progress.connect(self.on_progress)
+        fv_thread.finished.connect(self.on_finished)
+        fv_thread.finished.connect(self.on_job_finished)
+        fv_thread.finished.connect(thread.quit)
+
+        thread.start()
+
+    def execute(self, job, progress=None, token=None):
+        """
+        Run the function of a job, then save its canvas if the job has a path. Runs in the thread of the job.
+
+        :param job: The job to run.
+        :param progress: Callable receiving progress messages, defaults to None.
+        :param token: Cancellation token of the job, defaults to None.
+        :return: A message describing the result of the job.
+        """
+        progress(f"Job {job.job_id} started: {job.description}")
+        try:
+            message = job.func(*job.args, progress=progress, token=token)
+            if job.path is not None:
+                message = f"{message} {job.canvas.save_figure(job.path, token=token)}" if message else \
+                    job.canvas.save_figure(job.path, token=token)
+        except JobCancelled:
+            job.status = "cancelled"
+            return f"Job {job.job_id} cancelled."
+        except Exception as error:
+            job.status = "failed"
+            return f"Job {job.job_id} failed: {error}"
+        finally:
+            job.ended = time.time()
+        job.status = "completed"
+        return f"Job {job.job_id} done in {job.ended - job.started:.1f} s. {message or ''}".rstrip()
+
+    @pyqtSlot(str)
+    def on_job_finished(self, message):
+        """
+        Take the jobs that have ended off the queue, record the rate of the completed ones and start the next jobs.
+
+        Ended jobs are kept referenced until their threads have stopped.
+
+        :param message: The message emitted by the finished signal.
+        """
+        for job in [job for job in self.jobs if job.ended is not None]:
+            self.jobs.remove(job)
+            self.ended.append(job)
+            if job.status == "completed":
+                self.completed += 1
+                if job.kind is not None and job.work > 0:
+                    self.rates[job.kind] = (job.ended - job.started) / job.work
+        self.ended = [job for job in self.ended if job.thread[0].isRunning()]
+        self.start_next()
+        if self.quit_when_idle and not self.jobs:
+            QApplication.instance().quit()
+
+    def quit_when_done(self):
+        """
+        Quit the application once every queued and running job has ended, or now if there is none.
+        """
+        self.quit_when_idle = True
+        if not self.jobs:
+            QApplication.instance().quit()
+
+    def cancel(self, job_id=None):
+        """
+        Cancel a queued or running job, or every one of them.
+
+        :param job_id: The number of the job, defaults to None (every job).
+        :return: The number of jobs cancelled.
+        """
+        cancelled = 0
+        for job in list(self.jobs):
+            if job_id is not None and job.job_id != job_id:
+                continue
+            if job.status == "queued":
+                job.status = "cancelled"
+                self.jobs.remove(job)
+                cancelled += 1
+            elif job.status == "running":
+                job.token.cancel()
+                cancelled += 1
+        return cancelled
+
+    def estimate(self, job):
+        """
+        Estimate the run time of a job from the measured rate of its kind, or else from its predicted time.
+
+        :param job: The job.
+        :return: The estimated run time in seconds, or None if it cannot be estimated.
+        """
+        if job.kind not in self.rates:
+            return job.predicted
+        return self.rates[job.kind] * job.work
+
+    def describe(self):
+        """
+        Describe the running and queued jobs, with the time left until each of them is done.
+
+        Queued exclusive jobs are done after every exclusive job ahead of them, so their time left adds up; it is
+        unknown once a job ahead has no estimate.
+
+        :return: One line per job, running jobs first.
+        """
+        now = time.time()
+        lines = []
+        wait = 0.0
+        for job in self.running() + self.queued():
+            estimate = self.estimate(job)
+            if job.status == "running":
+                elapsed = now - job.started
+                left = None if estimate is None else max(estimate - elapsed, 0.0)
+                state = f"running for {elapsed:.0f} s"
+            else:
+                left = estimate
+                state = f"queued, priority {job.priority}"
+            if job.exclusive:
+                wait = None if wait is None or left is None else wait + left
+                left = wait
+            eta = "ETA unknown" if left is None else f"ETA {left:.0f} s"
+            lines.append(f"#{job.job_id} {job.description} ({state}, {eta})")
+        return lines
+
+    def summary(self):
+        """
+        Count the jobs of the queue.
+
+        :return: The number of running, queued and completed jobs.
+        """
+        return f"{len(self.running())} running, {len(self.queued())} queued, {self.completed} completed"
+
+
 class MainFrame(QMainWindow):
     """
     Main window for the Fractal Visualizer application.
@@ -205,6 +1012,10 @@ class MainFrame(QMainWindow):
 
         self.mandelbrot_canvas = FractalCanvas()
         self.bifurcation_canvas = FractalCanvas()
+        self.mandelbrot_scheduler = RenderScheduler(self.on_thread_progress, self.on_thread_finished)
+        self.bifurcation_scheduler = RenderScheduler(self.on_thread_progress, self.on_thread_finished)
+        self.job_queue = JobQueue(self.on_thread_progress, self.on_thread_finished)
+        self.mandelbrot_canvas.enable_viewport_tracking(self.mandelbrot_scheduler)
 
         self.plot_frame = QFrame()
         self.controls_frame = QFrame()
@@ -212,6 +1023,8 @@ class MainFrame(QMainWindow):
         self.console_handler = chand.ConsoleHandler(self)
 
         self.init_ui()
+        # Plans use the default cost model until this job, queued behind the startup plots, has calibrated it.
+        self.queue_calibration()
 
     def init_menu(self):
         """
@@ -250,7 +1063,7 @@ class MainFrame(QMainWindow):
 
     def init_plot_frame(self):
         """
-        Initialize the plot frame containing the Mandelbrot and logistic canvases.
+        Initialize the plot frame containing the Mandelbrot and logistic canvases, and queue their initial plots.
         """
         self.plot_frame.setFrameShape(QFrame.StyledPanel)
 
@@ -278,13 +1091,11 @@ class MainFrame(QMainWindow):
 
         plot_frame_layout.addLayout(mandelbrot_sublayout)
         plot_frame_layout.addLayout(bifurcation_sublayout)
-        self.key_listener = KeyListener(self.mandelbrot_canvas, self.bifurcation_canvas)
-        #just for shits and giggles
-        arr = np.zeros(10)
-        self.t1 = thread.Thread(self.bifurcation_canvas.plot_logistical())
-        self.t2 = thread.Thread(self.mandelbrot_canvas.plot_mandelbrot_col())
-        self.t1.start()
-        self.t2.start()
+        self.key_listener = KeyListener(self.mandelbrot_canvas, self.bifurcation_canvas, self.bifurcation_scheduler)
+        self.job_queue.submit("Initial logistical plot", self.bifurcation_canvas.plot_logistical,
+                              *INITIAL_LOGISTIC_SETTINGS, canvas=self.bifurcation_canvas)
+        self.job_queue.submit("Initial Mandelbrot plot", self.mandelbrot_canvas.plot_mandelbrot_col,
+                              *INITIAL_MANDELBROT_SETTINGS, canvas=self.mandelbrot_canvas)
         self.plot_frame.setLayout(plot_frame_layout)
 
     def init_controls_frame(self):
@@ -367,6 +1178,24 @@ class MainFrame(QMainWindow):
         controls_layout.addLayout(control_layout)
         controls_layout.addLayout(console_layout)
 
+    def eventFilter(self, source, event):
+        """
+        Run the command on the current line of the console when Return or Enter is pressed in it.
+
+        :param source: The object the event was sent to.
+        :param event: The event.
+        :return: True if the event was handled here, otherwise the result of the default filter.
+        """
+        if source is self.console and event.type() == QEvent.KeyPress and \
+                event.key() in (Qt.Key_Return, Qt.Key_Enter):
+            self.console_handler.get_console_input(self.console.textCursor().block().text())
+            self.console.moveCursor(QtGui.QTextCursor.End)
+            if self.console.textCursor().block().text():
+                self.console.append("")
+                self.console.moveCursor(QtGui.QTextCursor.End)
+            return True
+        return super().eventFilter(source, event)
+
     def init_ui(self):
         """
         Initialize the main UI layout of the application.
@@ -434,57 +1263,104 @@ class MainFrame(QMainWindow):
                 return False
         return False
 
-    def regenerate_mandel_plot(self):
+    def read_plot_settings(self, precision_field, step_field, canvas, initial):
+        """
+        Read the precision and step of a plot from its text fields.
+
+        An empty field keeps the value of the last full plot of the canvas, or the initial value before one is
+        done. Errors are shown in the console.
+
+        :param precision_field: QLineEdit holding the precision.
+        :param step_field: QLineEdit holding the step value.
+        :param canvas: The canvas the plot is drawn on.
+        :param initial: The (step, precision) of the initial plot of the canvas.
+        :return: The (step, precision) of the plot, or None if a field is invalid.
+        """
+        step, precision = canvas.plot_settings or initial
+        if precision_field.text():
+            if not self.check_text_is_number_int(precision_field):
+                return None
+            precision = int(precision_field.text())
+        if step_field.text():
+            if not self.check_text_is_number_float(step_field):
+                return None
+            step = float(step_field.text())
+        if step <= 0 or precision <= 0:
+            self.console.append("ERROR: The precision and step value should be positive. \n")
+            return None
+        return step, precision
+
+    def regenerate_mandel_plot(self, queued=False):
         """
         Regenerate the Mandelbrot plot based on user-specified precision and step values.
+
+        The cost model of the backend predicts the run time and memory of the plot. A grid that does not fit the
+        memory budget is computed in bands of rows, and only a grid whose results alone exceed it is refused.
+
+        :param queued: Run the plot as a job of the job queue, after the jobs queued before it, instead of
+            superseding the current job of the canvas, defaults to False.
         """
-        if self.check_text_is_number_int(self.mandel_precision_tfield):
-            precision = int(self.mandel_precision_tfield.text())
-        if self.check_text_is_number_float(self.mandel_step_tfield):
-            step = float(self.mandel_step_tfield.text())
-        if precision / step <= 250000:
-            self.console.append("Starting Mandelbrot plot regeneration...")
-            self.run_thread(self.mandelbrot_canvas.plot_mandelbrot_col, step, precision)
+        settings = self.read_plot_settings(self.mandel_precision_tfield, self.mandel_step_tfield,
+                                           self.mandelbrot_canvas, INITIAL_MANDELBROT_SETTINGS)
+        if settings is None:
+            return
+        step, precision = settings
+        mandel = MandelbrotCalculation(step, precision)
+        plan = self.mandelbrot_canvas.plan_mandelbrot(mandel, mandel.color_margin)
+        if plan.fits:
+            self.console.append(f"Starting Mandelbrot plot regeneration: {plan.summary()}.")
+            func = partial(self.mandelbrot_canvas.plot_mandelbrot_col, band_rows=plan.chunk)
+            if queued:
+                self.job_queue.submit("Refresh Mandelbrot plot", func, step, precision, canvas=self.mandelbrot_canvas,
+                                      kind=f"mand/{mandel.backend.name}", work=plan.points * precision,
+                                      predicted=plan.seconds)
+            else:
+                self.run_thread(self.mandelbrot_scheduler, func, step, precision)
         else:
-            self.console.append(f"Your pc probably wont handle performing {int(precision/step)} complex calculations. The "
-                                f"limit is 250000")
-            self.console.append("Reduce precision value or increase step value and try again.")
+            self.console.append(f"Your pc does not have the memory for this plot: {plan.summary()}.")
+            self.console.append("Increase step value and try again.")
 
-    def regenerate_logistical_plot(self):
+    def regenerate_logistical_plot(self, queued=False):
         """
         Regenerate the logistic plot based on user-specified precision and step values.
+
+        The cost model of the backend predicts the run time and memory of the plot. Fewer r values are iterated
+        together when the default chunks do not fit the memory budget, and only a diagram whose points alone
+        exceed it is refused.
+
+        :param queued: Run the plot as a job of the job queue, after the jobs queued before it, instead of
+            superseding the current job of the canvas, defaults to False.
         """
-        if self.check_text_is_number_int(self.logi_precision_tfield):
-            precision = int(self.logi_precision_tfield.text())
-        if self.check_text_is_number_float(self.logi_step_tfield):
-            step = float(self.logi_step_tfield.text())
-        if precision / step <= 10000000:
-            self.console.append("Starting Logistical plot regeneration...")
-            self.run_thread(self.bifurcation_canvas.plot_logistical, step, precision)
+        settings = self.read_plot_settings(self.logi_precision_tfield, self.logi_step_tfield,
+                                           self.bifurcation_canvas, INITIAL_LOGISTIC_SETTINGS)
+        if settings is None:
+            return
+        step, precision = settings
+        logi = BifurcationCalculation(step, precision)
+        plan = get_cost_model(logi.backend.name, wait=False).plan_logistic(logi.r_count(), precision)
+        if plan.fits:
+            self.console.append(f"Starting Logistical plot regeneration: {plan.summary()}.")
+            func = partial(self.bifurcation_canvas.plot_logistical, chunk_size=plan.chunk)
+            if queued:
+                self.job_queue.submit("Refresh logistical plot", func, step, precision,
+                                      canvas=self.bifurcation_canvas, kind=f"log/{logi.backend.name}",
+                                      work=plan.points * precision, predicted=plan.seconds)
+            else:
+                self.run_thread(self.bifurcation_scheduler, func, step, precision)
         else:
-            self.console.append(f"Your pc probably wont handle performing {int(precision/step)} complex calculations. The "
-                                f"limit is 10000000")
-            self.console.append("Reduce precision value or increase step value and try again.")
+            self.console.append(f"Your pc does not have the memory for this plot: {plan.summary()}.")
+            self.console.append("Increase step value and try again.")
 
-    def run_thread(self, func, *args):
+    def run_thread(self, scheduler, func, *args):
         """
-        Run a given function in a separate thread with specified arguments.
+        Run a given function in a separate thread with specified arguments, superseding the previous job
+        of the same scheduler.
 
+        :param scheduler: The render scheduler of the canvas the function draws on.
         :param func: The function to run in the thread.
         :param args: Arguments to pass to the function.
         """
-        self.thread = QThread()
-        self.fv_thread = FVThread(func, *args)
-        self.fv_thread.moveToThread(self.thread)
-
-        self.thread.started.connect(self.fv_thread.run)
-        self.fv_thread.finished.connect(self.on_thread_finished)
-        self.fv_thread.progress.connect(self.on_thread_progress)
-        self.fv_thread.finished.connect(self.thread.quit)
-        self.fv_thread.finished.connect(self.fv_thread.deleteLater)
-        self.fv_thread.finished.connect(self.thread.deleteLater)
-
-        self.thread.start()
+        scheduler.submit(func, *args)
 
     def on_thread_finished(self, message):
         """
@@ -502,6 +1378,32 @@ class MainFrame(QMainWindow):
         """
         self.console.append(message)
 
+    def queue_calibration(self, recalibrate=False):
+        """
+        Queue a job calibrating the cost model of the default backend, unless it is calibrated already.
+
+        The job is exclusive, so its timings are not slowed down by the renders of the queue.
+
+        :param recalibrate: Whether to calibrate the model again if it is calibrated, defaults to False.
+        :return: The queued job, or None if the model is calibrated.
+        """
+        if not recalibrate and is_calibrated():
+            return None
+        return self.job_queue.submit("Cost model calibration", self.calibrate_cost_model,
+                                     get_default_backend_name())
+
+    def calibrate_cost_model(self, backend_name, progress=None, token=None):
+        """
+        Calibrate the cost model of a backend. Runs in the thread of a job.
+
+        :param backend_name: The name of the backend.
+        :param progress: Callable receiving progress messages, defaults to None.
+        :param token: Cancellation token of the job, defaults to None.
+        :return: A message describing the calibrated model.
+        """
+        check_token(token)
+        return f"Cost model of the {get_cost_model(backend_name, recalibrate=True).summary()}"
+
     def save_all(self):
         """
         Save the current plots as image files in a user-selected directory.
@@ -520,4 +1422,6 @@ if __name__ == "__main__":
     app = QApplication(sys.argv)
     main_window = MainFrame()
     main_window.show()
+    if len(sys.argv) > 1:
+        main_window.console_handler.run_script(sys.argv[1])
     sys.exit(app.exec_())
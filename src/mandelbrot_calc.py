@@ -1,9 +1,154 @@
 import time
-from random import Random
 
 import matplotlib.pyplot as plt
 import numpy as np
-import tensorflow as tf
+
+from backends import CHECK_INTERVAL, JITTER_MAX, KernelStats, get_backend, get_cycle_checks
+from disk_cache import get_default_disk_cache
+from jobs import check_token
+from profiling import stage
+from tile_cache import CACHE_TILE_SIZE, get_default_cache, get_default_orbit_cache
+from subdivision import escape_time_grid, get_default_strategy
+from tiling import axis_values, compute_tiled, get_default_workers, lattice_spec, run_tiles, sub_spec
+
+PREVIEW_MIN_SIZE = 32
+DENSITY_SAMPLES = 100
+LYAPUNOV_SAMPLES = 200
+DENSITY_SHADINGS = ("log", "equalized")
+OUT_OF_CORE_BAND_BYTES = 64 * 1024 * 1024
+BYTES_PER_POINT = 64
+CHUNK_SIZE = 262144
+
+
+class IterationState:
+    """
+    The iteration counts and final z values of a computed Mandelbrot grid, from which another precision can continue.
+
+    Attributes:
+        key (tuple): The lattice parameters of both axes, backend name and strategy of the grid.
+        precision (int): The maximum number of iterations the counts were computed with.
+        counts (np.ndarray): The iteration-count image.
+        z (np.ndarray): The final z of every point as described in escape_time_kernel, infinity for points filled
+            by subdivision, or None if unknown.
+        has_z (np.ndarray): Mask of the points whose final z is known, or None if it is known for all of them.
+    """
+
+    def __init__(self, key, precision, counts, z=None, has_z=None):
+        """
+        Initialize the IterationState with the specified grid key, precision, counts and final values.
+
+        Args:
+            key (tuple): The lattice parameters of both axes, backend name and strategy of the grid.
+            precision (int): The maximum number of iterations the counts were computed with.
+            counts (np.ndarray): The iteration-count image.
+            z (np.ndarray, optional): The final z of every point. Defaults to None (unknown).
+            has_z (np.ndarray, optional): Mask of the points whose final z is known. Defaults to None (all of them).
+        """
+        self.key = key
+        self.precision = precision
+        self.counts = counts
+        self.z = z
+        self.has_z = has_z
+
+    def nbytes(self):
+        """
+        Get the memory held by the state.
+
+        Returns:
+            int: The bytes of the counts, final z values and mask.
+        """
+        return sum(array.nbytes for array in (self.counts, self.z, self.has_z) if array is not None)
+
+
+def open_npy_stream(path, shape, dtype):
+    """
+    Create a .npy file and write its header, so the data can be appended a band of rows at a time.
+
+    Args:
+        path (str): The path of the file.
+        shape (tuple): The shape of the array.
+        dtype: The data type of the array.
+
+    Returns:
+        file: The file, opened for binary writing and positioned at the start of the data.
+    """
+    file = open(path, "wb")
+    np.lib.format.write_array_header_2_0(file, {"descr": np.lib.format.dtype_to_descr(np.dtype(dtype)),
+                                                "fortran_order": False, "shape": tuple(shape)})
+    return file
+
+
+def read_rows(array, start, stop):
+    """
+    Read a band of rows of an array, with plain file reads when it is memory-mapped.
+
+    Reading a memory map through file reads keeps the pages out of the resident memory of the process.
+
+    Args:
+        array (np.ndarray): The array, possibly a np.memmap.
+        start (int): The first row of the band.
+        stop (int): The row after the last row of the band.
+
+    Returns:
+        np.ndarray: The rows of the band.
+    """
+    if not isinstance(array, np.memmap) or array.filename is None:
+        return np.asarray(array[start:stop])
+    row_shape = array.shape[1:]
+    row_items = int(np.prod(row_shape))
+    with open(array.filename, "rb") as file:
+        file.seek(array.offset + start * row_items * array.dtype.itemsize)
+        band = np.fromfile(file, dtype=array.dtype, count=(stop - start) * row_items)
+    return band.reshape((stop - start,) + row_shape)
+
+
+def band_bounds(rows, band_rows, top_down=False):
+    """
+    Split a number of rows into bands.
+
+    Args:
+        rows (int): The number of rows.
+        band_rows (int): The maximum number of rows of a band.
+        top_down (bool): Whether to list the bands from the last row to the first. Defaults to False.
+
+    Returns:
+        list: The (row_start, row_stop) bounds of every band.
+    """
+    bands = [(r0, min(r0 + band_rows, rows)) for r0 in range(0, rows, band_rows)]
+    return bands[::-1] if top_down else bands
+
+
+def shade_density(density, shading="log"):
+    """
+    Map the counts of a density histogram to brightness values for display.
+
+    Args:
+        density (np.ndarray): The histogram counts.
+        shading (str): "log" for logarithmic shading, "equalized" for histogram equalization of the non-empty
+            bins. Defaults to "log".
+
+    Returns:
+        np.ndarray: float32 values in [0, 1], 0 for empty bins.
+
+    Raises:
+        ValueError: If the shading is not one of DENSITY_SHADINGS.
+    """
+    if shading not in DENSITY_SHADINGS:
+        raise ValueError(f"Unknown shading: {shading}. Available shadings: {', '.join(DENSITY_SHADINGS)}")
+    shaded = np.zeros(density.shape, dtype=np.float32)
+    filled = density > 0
+    if not filled.any():
+        return shaded
+
+    if shading == "log":
+        values = np.log1p(density[filled])
+        shaded[filled] = values / values.max()
+    else:
+        _, inverse, frequencies = np.unique(density[filled], return_inverse=True, return_counts=True)
+        cdf = np.cumsum(frequencies) / filled.sum()
+        shaded[filled] = cdf[inverse.ravel()]
+    return shaded
+
 
 class MandelbrotCalculation:
     """
@@ -16,29 +161,69 @@ class MandelbrotCalculation:
         imstop (float): The stopping value for the imaginary part of the complex grid.
         restart (float): The starting value for the real part of the complex grid.
         restop (float): The stopping value for the real part of the complex grid.
-        x_array (list): List to store x-coordinates of the calculated points.
-        y_array (list): List to store y-coordinates of the calculated points.
-        c_array (list): List to store color values of the calculated points.
+        iterations (np.ndarray): 2D image of the iteration count of every grid point, rows along the imaginary axis.
+        extent (tuple): The (left, right, bottom, top) bounds of the image in the complex plane.
+        color_margin (float): Extra distance added on every side of the range for color plots.
+        backend: The compute backend running the escape-time kernel.
+        workers (int): The number of worker processes computing tiles of the grid in parallel.
+        token (CancelToken): Token checked by the kernels so a superseded calculation stops early, or None.
+        cache (TileCache): Cache of computed tiles shared between calculations, or None.
+        disk_cache (DiskCache): Persistent cache of whole iteration-count images, or None.
+        stats (KernelStats): The work skipped by the interior shortcuts of the escape-time kernel so far.
+        strategy (str): The rendering strategy, "full" to compute every point or "subdivide" for rectangle
+            subdivision.
+        z (np.ndarray): complex64 image of the final z of every grid point, or None if it was not kept.
+        has_z (np.ndarray): Mask of the points of `z` that are known, or None if all of them are.
+        state (IterationState): The iteration state of the last computed grid, from which the next computation of
+            the same grid at another precision continues, or None.
+        resumed_from (int): The precision the last computation continued from, or None if it started over.
+        band_rows (int): The maximum number of rows computed together outside the tile cache, or None for no limit.
+        disk_writes (bool): Whether computed images are written to the disk cache, which is still read otherwise.
     """
 
-    def __init__(self, step, precision):
+    def __init__(self, step, precision, backend=None, workers=None, token=None, cache=None, disk_cache=None,
+                 strategy=None, band_rows=None, disk_writes=True, state=None):
         """
         Initialize the MandelbrotCalculation class with the specified step size and precision.
 
         Args:
             step (float): The step size for the calculation grid.
             precision (int): The maximum number of iterations for the Mandelbrot calculation.
+            backend (str, optional): The name of the compute backend. Defaults to None (the default backend).
+            workers (int, optional): The number of worker processes. Defaults to None (the default number).
+            token (CancelToken, optional): Token that cancels the calculation. Defaults to None.
+            cache (TileCache, optional): Cache of computed tiles. Defaults to None (the default cache).
+            disk_cache (DiskCache, optional): Persistent cache of images. Defaults to None (the default disk cache).
+            strategy (str, optional): The rendering strategy. Defaults to None (the default strategy).
+            band_rows (int, optional): The maximum number of rows computed together outside the tile cache, which
+                bounds the working memory of the kernel. Defaults to None (no limit).
+            disk_writes (bool): Whether computed images are written to the disk cache. Defaults to True.
+            state (IterationState, optional): The state of an earlier computation to continue from, such as the one
+                kept by a canvas. Defaults to None.
         """
         self.precision = precision
         self.step = step
+        self.backend = get_backend(backend)
+        self.workers = workers or get_default_workers()
+        self.token = token
+        self.cache = cache if cache is not None else get_default_cache()
+        self.disk_cache = disk_cache if disk_cache is not None else get_default_disk_cache()
+        self.stats = KernelStats()
+        self.strategy = strategy or get_default_strategy()
         self.imstart = -1
         self.imstop = 1
         self.restart = -2
         self.restop = 0.5
+        self.color_margin = 0.1
+        self.band_rows = band_rows
+        self.disk_writes = disk_writes
 
-        self.x_array = []
-        self.y_array = []
-        self.c_array = []
+        self.iterations = None
+        self.extent = None
+        self.z = None
+        self.has_z = None
+        self.state = state
+        self.resumed_from = None
 
     def blue_grad(self, count):
         """
@@ -70,6 +255,21 @@ class MandelbrotCalculation:
         """
         self.step = step
 
+    def set_region(self, restart, restop, imstart, imstop):
+        """
+        Set the region of the complex plane covered by the calculation grid.
+
+        Args:
+            restart (float): The starting value for the real part of the complex grid.
+            restop (float): The stopping value for the real part of the complex grid.
+            imstart (float): The starting value for the imaginary part of the complex grid.
+            imstop (float): The stopping value for the imaginary part of the complex grid.
+        """
+        self.restart = restart
+        self.restop = restop
+        self.imstart = imstart
+        self.imstop = imstop
+
     def psych_grad(self, count):
         """
         Generate a psychedelic gradient color based on the iteration count.
@@ -87,53 +287,625 @@ class MandelbrotCalculation:
         else:
             return (count / self.precision, 0.5 + count / 2 / self.precision, 0.25 + 0.75 * count / self.precision)
 
-    def compute_mandelbrot_col(self):
+    def bw_grad(self, count):
         """
-        Compute the Mandelbrot set with coloring based on iteration count and update the arrays.
+        Generate a black and white color based on the iteration count.
+
+        Args:
+            count (int): The iteration count.
+
+        Returns:
+            tuple: A tuple representing the RGB color.
         """
-        re_array = np.linspace(self.restart - 0.1, self.restop + 0.1, int((self.restop - self.restart) / self.step + 1))
-        im_array = np.linspace(self.imstart - 0.1, self.imstop + 0.1, int((self.imstop - self.imstart) / self.step + 1))
+        return (0, 0, 1) if count < self.precision else (1, 1, 1)
 
-        re_array, im_array = np.meshgrid(re_array, im_array)
-        c = re_array + 1j * im_array
-        z = tf.zeros_like(c, dtype=tf.complex64)
-        m = tf.fill(c.shape, self.precision)
+    def color_table(self, gradient):
+        """
+        Build a color lookup table by evaluating a gradient once for every possible iteration count.
 
-        for i in range(self.precision):
-            mask = tf.abs(z) < 2
-            z = tf.where(mask, z * z + c, z)
-            m = tf.where(mask, tf.fill(m.shape, i), m)
+        Args:
+            gradient (callable): A gradient such as psych_grad or blue_grad.
 
-        x_array = re_array[m.numpy() < self.precision]
-        y_array = im_array[m.numpy() < self.precision]
-        c_array = [self.psych_grad(count) for count in m.numpy()[m.numpy() < self.precision]]
+        Returns:
+            np.ndarray: Array of shape (precision + 1, 3) with the RGB color of each iteration count.
+        """
+        return np.array([gradient(count) for count in range(self.precision + 1)], dtype=np.float32)
 
-        self.x_array.extend(x_array.flatten())
-        self.y_array.extend(y_array.flatten())
-        self.c_array.extend(c_array)
+    def colorize(self, gradient, iterations=None):
+        """
+        Color an iteration-count image through the lookup table of a gradient.
 
-    def compute_mandelbrot_bw(self):
+        Args:
+            gradient (callable): A gradient such as psych_grad or blue_grad.
+            iterations (np.ndarray, optional): The image to color. Defaults to None (the computed image).
+
+        Returns:
+            np.ndarray: RGB image of shape (rows, columns, 3).
+        """
+        if iterations is None:
+            iterations = self.iterations
+        with stage("colorize"):
+            return self.color_table(gradient)[iterations]
+
+    def axis_specs(self, margin=0.0):
+        """
+        Get the lattice parameters of the real and imaginary axes for the current range and step size.
+
+        Args:
+            margin (float): Extra distance added on every side of the range. Defaults to 0.
+
+        Returns:
+            tuple: The (first_index, num, step) parameters of the real axis and of the imaginary axis.
+        """
+        re_spec = lattice_spec(self.restart - margin, self.restop + margin, self.step)
+        im_spec = lattice_spec(self.imstart - margin, self.imstop + margin, self.step)
+        return re_spec, im_spec
+
+    def complex_grid(self, margin=0.0):
+        """
+        Build the grid of complex points for the current range and step size.
+
+        Args:
+            margin (float): Extra distance added on every side of the range. Defaults to 0.
+
+        Returns:
+            tuple: The real axis and imaginary axis as 1D arrays, and the complex values of the grid as a 2D array.
+        """
+        re_spec, im_spec = self.axis_specs(margin)
+        re_array = axis_values(re_spec)
+        im_array = axis_values(im_spec)
+
+        return re_array, im_array, re_array[np.newaxis, :] + 1j * im_array[:, np.newaxis]
+
+    def grid_extent(self, re_spec, im_spec):
+        """
+        Get the bounds of a grid in the complex plane.
+
+        Args:
+            re_spec (tuple): The lattice parameters of the real axis.
+            im_spec (tuple): The lattice parameters of the imaginary axis.
+
+        Returns:
+            tuple: The (left, right, bottom, top) bounds of the grid.
+        """
+        return (re_spec[0] * self.step, (re_spec[0] + re_spec[1] - 1) * self.step,
+                im_spec[0] * self.step, (im_spec[0] + im_spec[1] - 1) * self.step)
+
+    def uses_cache(self):
+        """
+        Check whether the calculation goes through a tile cache.
+
+        Returns:
+            bool: True if there is a cache with a non-zero byte budget.
+        """
+        return self.cache is not None and self.cache.max_bytes > 0
+
+    def cache_tiles(self, re_spec, im_spec):
+        """
+        List the cache tiles overlapping a grid.
+
+        Args:
+            re_spec (tuple): The lattice parameters of the real axis.
+            im_spec (tuple): The lattice parameters of the imaginary axis.
+
+        Returns:
+            list: The (tile_x, tile_y) coordinates of the overlapping tiles.
+        """
+        tx0, tx1 = re_spec[0] // CACHE_TILE_SIZE, (re_spec[0] + re_spec[1] - 1) // CACHE_TILE_SIZE
+        ty0, ty1 = im_spec[0] // CACHE_TILE_SIZE, (im_spec[0] + im_spec[1] - 1) // CACHE_TILE_SIZE
+        return [(tx, ty) for ty in range(ty0, ty1 + 1) for tx in range(tx0, tx1 + 1)]
+
+    def cache_key(self, tile):
+        """
+        Get the cache key of a tile for the current step, precision, backend and strategy.
+
+        Args:
+            tile (tuple): The (tile_x, tile_y) coordinates of the tile.
+
+        Returns:
+            tuple: The cache key.
+        """
+        return tile + (self.step, self.precision, self.backend.name, self.strategy)
+
+    def tile_overlap(self, tile, re_spec, im_spec):
+        """
+        Get the slices where a cache tile and a grid overlap.
+
+        Args:
+            tile (tuple): The (tile_x, tile_y) coordinates of the tile.
+            re_spec (tuple): The lattice parameters of the real axis of the grid.
+            im_spec (tuple): The lattice parameters of the imaginary axis of the grid.
+
+        Returns:
+            tuple: The (rows, columns) slices into the grid and the (rows, columns) slices into the tile.
+        """
+        spans = []
+        for index, spec in zip(reversed(tile), (im_spec, re_spec)):
+            start = max(index * CACHE_TILE_SIZE, spec[0])
+            stop = min((index + 1) * CACHE_TILE_SIZE, spec[0] + spec[1])
+            spans.append((slice(start - spec[0], stop - spec[0]),
+                          slice(start - index * CACHE_TILE_SIZE, stop - index * CACHE_TILE_SIZE)))
+        (grid_rows, tile_rows), (grid_cols, tile_cols) = spans
+        return (grid_rows, grid_cols), (tile_rows, tile_cols)
+
+    def compute_cached(self, re_spec, im_spec, known=None):
+        """
+        Compute the iteration-count image of a grid tile by tile, reusing the tiles found in the cache.
+
+        Missing tiles are computed and stored in the cache, in parallel processes with more than one worker.
+        Points already present in `self.iterations` according to `known` are reused instead of recomputed.
+        The final z values of the tiles computed in this process are kept in `z` and `has_z`.
+
+        Given `known`, the image is assembled in place in `self.iterations` and `self.z`, and `known` becomes
+        `has_z`, so no other grid-sized array is allocated. Worker processes compute the missing tiles in
+        batches of about `band_rows` rows of the grid, which bounds the memory of their shared output image.
+
+        Args:
+            re_spec (tuple): The lattice parameters of the real axis.
+            im_spec (tuple): The lattice parameters of the imaginary axis.
+            known (np.ndarray, optional): Mask of the points of `self.iterations` already computed, overwritten
+                with `has_z`. Defaults to None.
+
+        Returns:
+            np.ndarray: The iteration-count image.
+        """
+        if known is None:
+            image = np.empty((im_spec[1], re_spec[1]), dtype=np.int32)
+            z = np.zeros(image.shape, dtype=np.complex64)
+            has_z = np.zeros(image.shape, dtype=bool)
+        else:
+            image, z, has_z = self.iterations, self.z, known
+        missing = []
+        for tile in self.cache_tiles(re_spec, im_spec):
+            cached = self.cache.get(self.cache_key(tile))
+            if cached is None:
+                missing.append(tile)
+            else:
+                grid_slices, tile_slices = self.tile_overlap(tile, re_spec, im_spec)
+                image[grid_slices] = cached[tile_slices]
+                has_z[grid_slices] = False
+
+        size = CACHE_TILE_SIZE
+        tile_specs = [((tx * size, size, self.step), (ty * size, size, self.step)) for tx, ty in missing]
+        if self.workers > 1 and missing:
+            batch = max(1, (self.band_rows or im_spec[1]) * re_spec[1] // size ** 2)
+            for first in range(0, len(missing), batch):
+                check_token(self.token)
+                specs = tile_specs[first:first + batch]
+                stack = run_tiles((len(specs) * size, size),
+                                  [(tile_re, tile_im, (i * size, (i + 1) * size, 0, size))
+                                   for i, (tile_re, tile_im) in enumerate(specs)],
+                                  self.precision, self.backend.name, self.workers, self.token, self.stats,
+                                  self.strategy)
+                for i, tile in enumerate(missing[first:first + batch]):
+                    self.store_cache_tile(tile, stack[i * size:(i + 1) * size].copy(), image, re_spec, im_spec)
+                    has_z[self.tile_overlap(tile, re_spec, im_spec)[0]] = False
+                del stack
+        else:
+            for tile, (tile_re, tile_im) in zip(missing, tile_specs):
+                check_token(self.token)
+                counts, tile_z = self.compute_cache_tile(tile, tile_re, tile_im, re_spec, im_spec, known)
+                grid_slices, tile_slices = self.tile_overlap(tile, re_spec, im_spec)
+                z[grid_slices] = tile_z[tile_slices]
+                has_z[grid_slices] = True
+                self.store_cache_tile(tile, counts, image, re_spec, im_spec)
+
+        self.z, self.has_z = z, has_z
+        return image
+
+    def store_cache_tile(self, tile, counts, image, re_spec, im_spec):
+        """
+        Put the iteration counts of a computed tile in the cache and copy them into the image of a grid.
+
+        Args:
+            tile (tuple): The (tile_x, tile_y) coordinates of the tile.
+            counts (np.ndarray): The iteration counts of the whole tile.
+            image (np.ndarray): The iteration-count image of the grid, updated in place.
+            re_spec (tuple): The lattice parameters of the real axis of the grid.
+            im_spec (tuple): The lattice parameters of the imaginary axis of the grid.
+        """
+        self.cache.put(self.cache_key(tile), counts)
+        grid_slices, tile_slices = self.tile_overlap(tile, re_spec, im_spec)
+        image[grid_slices] = counts[tile_slices]
+
+    def compute_cache_tile(self, tile, tile_re, tile_im, re_spec, im_spec, known=None):
+        """
+        Compute the iteration counts of one cache tile in this process.
+
+        Args:
+            tile (tuple): The (tile_x, tile_y) coordinates of the tile.
+            tile_re (tuple): The lattice parameters of the real axis of the tile.
+            tile_im (tuple): The lattice parameters of the imaginary axis of the tile.
+            re_spec (tuple): The lattice parameters of the real axis of the grid.
+            im_spec (tuple): The lattice parameters of the imaginary axis of the grid.
+            known (np.ndarray, optional): Mask of the points of `self.iterations` already computed, whose final z
+                values are in `self.z`. Defaults to None.
+
+        Returns:
+            tuple: The iteration counts and the final z values of the tile.
+        """
+        c = axis_values(tile_re)[np.newaxis, :] + 1j * axis_values(tile_im)[:, np.newaxis]
+        counts = np.empty(c.shape, dtype=np.int32)
+        z = np.zeros(c.shape, dtype=np.complex64)
+        tile_known = np.zeros(c.shape, dtype=bool)
+
+        if known is not None:
+            grid_slices, tile_slices = self.tile_overlap(tile, re_spec, im_spec)
+            counts[tile_slices] = self.iterations[grid_slices]
+            z[tile_slices] = self.z[grid_slices]
+            tile_known[tile_slices] = known[grid_slices]
+
+        counts = escape_time_grid(self.backend, c, self.precision, self.token, self.stats, self.strategy, counts,
+                                  tile_known, z)
+        return counts, z
+
+    def disk_params(self, re_spec, im_spec):
+        """
+        Get the parameters identifying the iteration-count image of a grid in the disk cache.
+
+        Args:
+            re_spec (tuple): The lattice parameters of the real axis.
+            im_spec (tuple): The lattice parameters of the imaginary axis.
+
+        Returns:
+            dict: The disk cache parameters.
+        """
+        return {"kind": "mandelbrot", "re": list(re_spec), "im": list(im_spec), "precision": self.precision,
+                "backend": self.backend.name, "strategy": self.strategy}
+
+    def load_from_disk(self, re_spec, im_spec):
+        """
+        Load the iteration-count image of a grid from the disk cache, as a read-only memory map.
+
+        Args:
+            re_spec (tuple): The lattice parameters of the real axis.
+            im_spec (tuple): The lattice parameters of the imaginary axis.
+
+        Returns:
+            bool: True if the image was found and loaded into `iterations` and `extent`.
+        """
+        if self.disk_cache is None:
+            return False
+        with stage("disk cache"):
+            iterations = self.disk_cache.get(self.disk_params(re_spec, im_spec))
+        if iterations is None:
+            return False
+        self.iterations = iterations
+        self.extent = self.grid_extent(re_spec, im_spec)
+        return True
+
+    def save_to_disk(self, re_spec, im_spec, seconds=None):
+        """
+        Store the computed iteration-count image of a grid in the disk cache, unless disk writes are disabled.
+
+        Args:
+            re_spec (tuple): The lattice parameters of the real axis.
+            im_spec (tuple): The lattice parameters of the imaginary axis.
+            seconds (float, optional): The time it took to compute the image, as taken by DiskCache.put.
+                Defaults to None.
+        """
+        if self.disk_cache is not None and self.disk_writes:
+            with stage("disk cache"):
+                self.disk_cache.put(self.disk_params(re_spec, im_spec), self.iterations, seconds)
+
+    def all_cached(self, re_spec, im_spec):
+        """
+        Check whether every tile of a grid is in the tile cache.
+
+        Args:
+            re_spec (tuple): The lattice parameters of the real axis.
+            im_spec (tuple): The lattice parameters of the imaginary axis.
+
+        Returns:
+            bool: True if the calculation uses a cache holding every tile overlapping the grid.
+        """
+        return self.uses_cache() and all(self.cache_key(tile) in self.cache for tile in self.cache_tiles(re_spec, im_spec))
+
+    def state_key(self, re_spec, im_spec):
+        """
+        Get the key identifying a grid in the iteration state, which unlike the cache keys omits the precision.
+
+        Args:
+            re_spec (tuple): The lattice parameters of the real axis.
+            im_spec (tuple): The lattice parameters of the imaginary axis.
+
+        Returns:
+            tuple: The state key.
+        """
+        return tuple(re_spec), tuple(im_spec), self.backend.name, self.strategy
+
+    def record_state(self, re_spec, im_spec):
+        """
+        Keep the computed iteration-count image and final z values as the iteration state in `state`.
+
+        A state of the same grid at a higher precision is kept instead, as lower precisions can be derived from it.
+
+        Args:
+            re_spec (tuple): The lattice parameters of the real axis.
+            im_spec (tuple): The lattice parameters of the imaginary axis.
+        """
+        key = self.state_key(re_spec, im_spec)
+        if self.state is not None and self.state.key == key and self.state.precision > self.precision:
+            return
+        self.state = IterationState(key, self.precision, self.iterations, self.z, self.has_z)
+
+    def release_state(self):
+        """
+        Forget the iteration state and the final z values, releasing their memory. The counts are kept.
+        """
+        self.state = self.z = self.has_z = None
+
+    def resume(self, re_spec, im_spec):
+        """
+        Derive the iteration-count image of a grid from the iteration state in `state`, if it is of the same grid.
+
+        For a lower precision the counts are only clipped. For a higher precision only the points that had not
+        escaped are iterated further, from their final z values; points shown to be inside the set are skipped
+        and points whose final z was not kept, such as those computed in worker processes or filled by subdivision,
+        start over. With the full strategy the result is identical to a computation from scratch.
+
+        Args:
+            re_spec (tuple): The lattice parameters of the real axis.
+            im_spec (tuple): The lattice parameters of the imaginary axis.
+
+        Returns:
+            bool: True if there was a state to continue from and `iterations` holds the image.
+        """
+        state = self.state
+        if state is None or state.key != self.state_key(re_spec, im_spec):
+            return False
+        self.resumed_from = state.precision
+        if state.precision >= self.precision:
+            self.iterations = np.minimum(state.counts, self.precision - 1).astype(np.int32)
+            return True
+
+        counts = np.array(state.counts, dtype=np.int32)
+        live = counts == state.precision - 1
+        counts[live] = self.precision - 1
+        if state.z is None:
+            z = np.zeros(counts.shape, dtype=np.complex64)
+            has_z = np.zeros(counts.shape, dtype=bool)
+        else:
+            z = state.z.copy()
+            has_z = np.ones(counts.shape, dtype=bool) if state.has_z is None else state.has_z
+
+        with stage("grid"):
+            c = axis_values(re_spec)[np.newaxis, :] + 1j * axis_values(im_spec)[:, np.newaxis]
+        for todo, start in ((live & has_z & np.isfinite(z), state.precision), (live & (~has_z | np.isinf(z)), 0)):
+            if todo.any():
+                z_todo = z[todo] if start else np.zeros(int(np.count_nonzero(todo)), dtype=np.complex64)
+                with stage("iterate"):
+                    counts[todo] = self.backend.escape_time(c[todo], self.precision, self.token, self.stats,
+                                                            z=z_todo, start=start)
+                z[todo] = z_todo
+
+        self.iterations, self.z, self.has_z = counts, z, None
+        return True
+
+    def work_summary(self):
+        """
+        Describe the work saved by the last computation.
+
+        Returns:
+            str: The iterations saved by the interior shortcuts, and the precision the computation continued from.
+        """
+        summary = self.stats.summary()
+        if self.resumed_from is not None:
+            summary += f", continued from precision {self.resumed_from}"
+        return summary
+
+    def compute_iterations(self, margin=0.0):
+        """
+        Compute the iteration-count image of the grid and its extent.
+
+        The image is loaded from the disk cache when it is there, then copied from the tile cache when every tile
+        is cached, then continued from the iteration state of the same grid at another precision. Otherwise
+        it goes through the tile cache when there is one, or with more than one worker the grid is split into tiles
+        computed in parallel processes. Computed images are kept in `state` and stored in the disk cache,
+        unless they were quicker to compute than the cache's minimum time.
+
+        Args:
+            margin (float): Extra distance added on every side of the range. Defaults to 0.
+        """
+        re_spec, im_spec = self.axis_specs(margin)
+        self.z = self.has_z = self.resumed_from = None
+        if self.load_from_disk(re_spec, im_spec):
+            self.record_state(re_spec, im_spec)
+            return
+
+        start = time.perf_counter()
+        if self.all_cached(re_spec, im_spec) or not self.resume(re_spec, im_spec):
+            if self.uses_cache():
+                with stage("iterate"):
+                    self.iterations = self.compute_cached(re_spec, im_spec)
+            elif self.workers > 1:
+                with stage("iterate"):
+                    self.iterations = compute_tiled(re_spec, im_spec, self.precision, self.backend.name,
+                                                    self.workers, token=self.token, stats=self.stats,
+                                                    strategy=self.strategy)
+            else:
+                self.iterations = np.empty((im_spec[1], re_spec[1]), dtype=np.int32)
+                self.z = np.zeros(self.iterations.shape, dtype=np.complex64)
+                self.compute_rows(axis_values(re_spec), axis_values(im_spec), self.iterations, z=self.z)
+        self.extent = self.grid_extent(re_spec, im_spec)
+        self.record_state(re_spec, im_spec)
+        self.save_to_disk(re_spec, im_spec, time.perf_counter() - start)
+
+    def compute_progressive(self, margin=0.0, levels=4):
+        """
+        Compute the iteration-count image coarse to fine, yielding after each resolution level.
+
+        Level k computes every 2**k-th point of the final grid in both directions, so each level reuses all
+        points of the coarser ones and the total work equals a single full-resolution pass. Levels coarser
+        than PREVIEW_MIN_SIZE points along either axis are skipped. The final level goes through the tile
+        cache when there is one, and previews are skipped entirely when the image is in the disk cache or every
+        tile is already cached, or when the image can be continued from the iteration state of the grid.
+        Without a cache and with more than one worker the final level is computed by the tiled process pool.
+
+        Args:
+            margin (float): Extra distance added on every side of the range. Defaults to 0.
+            levels (int): The maximum number of resolution levels. Defaults to 4.
+
+        Yields:
+            int: The stride of the level just completed, ending with 1 for the full-resolution image.
+        """
+        re_spec, im_spec = self.axis_specs(margin)
+        self.z = self.has_z = self.resumed_from = None
+        if self.load_from_disk(re_spec, im_spec):
+            self.record_state(re_spec, im_spec)
+            yield 1
+            return
+        start = time.perf_counter()
+        if self.all_cached(re_spec, im_spec) or self.resume(re_spec, im_spec):
+            if self.resumed_from is None:
+                with stage("iterate"):
+                    self.iterations = self.compute_cached(re_spec, im_spec)
+            self.extent = self.grid_extent(re_spec, im_spec)
+            self.record_state(re_spec, im_spec)
+            self.save_to_disk(re_spec, im_spec, time.perf_counter() - start)
+            yield 1
+            return
+
+        with stage("grid"):
+            re_array = axis_values(re_spec)
+            im_array = axis_values(im_spec)
+
+            self.iterations = np.full((im_spec[1], re_spec[1]), -1, dtype=np.int32)
+            self.extent = self.grid_extent(re_spec, im_spec)
+            self.z = np.zeros(self.iterations.shape, dtype=np.complex64)
+            known = np.zeros(self.iterations.shape, dtype=bool)
+
+        strides = [2 ** k for k in reversed(range(1, levels)) if min(self.iterations.shape) // 2 ** k >= PREVIEW_MIN_SIZE]
+        for stride in strides + [1]:
+            if stride == 1 and self.uses_cache():
+                with stage("iterate"):
+                    self.iterations = self.compute_cached(re_spec, im_spec, known)
+            elif stride == 1 and self.workers > 1:
+                with stage("iterate"):
+                    self.iterations = compute_tiled(re_spec, im_spec, self.precision, self.backend.name,
+                                                    self.workers, token=self.token, stats=self.stats,
+                                                    strategy=self.strategy)
+                self.z = None
+            else:
+                self.compute_rows(re_array[::stride], im_array[::stride], self.iterations[::stride, ::stride],
+                                  known[::stride, ::stride], self.z[::stride, ::stride])
+                known[::stride, ::stride] = True
+            if stride == 1:
+                self.record_state(re_spec, im_spec)
+                self.save_to_disk(re_spec, im_spec, time.perf_counter() - start)
+            yield stride
+
+    def compute_rows(self, re_array, im_array, counts, known=None, z=None):
+        """
+        Compute the iteration counts of a grid given by its axes, at most `band_rows` rows at a time.
+
+        Only the complex points of one band are built at a time, so the working memory of the kernel is bounded
+        by the band. With the full strategy the counts do not depend on the bands.
+
+        Args:
+            re_array (np.ndarray): The real axis of the grid.
+            im_array (np.ndarray): The imaginary axis of the grid.
+            counts (np.ndarray): Iteration counts of the grid, updated in place.
+            known (np.ndarray, optional): Mask of the points whose count is already in `counts`. Defaults to None.
+            z (np.ndarray, optional): Grid receiving the final z of the computed points. Defaults to None.
         """
-        Compute the Mandelbrot set in black and white and update the arrays.
+        for r0, r1 in band_bounds(counts.shape[0], self.band_rows or max(counts.shape[0], 1)):
+            check_token(self.token)
+            with stage("grid"):
+                c = re_array[np.newaxis, :] + 1j * im_array[r0:r1, np.newaxis]
+            with stage("iterate"):
+                escape_time_grid(self.backend, c, self.precision, self.token, self.stats, self.strategy,
+                                 counts[r0:r1], None if known is None else known[r0:r1], None if z is None else z[r0:r1])
+
+    def level_view(self, stride):
         """
-        re_array = np.linspace(self.restart, self.restop, int((self.restop - self.restart) / self.step + 1))
-        im_array = np.linspace(self.imstart, self.imstop, int((self.imstop - self.imstart) / self.step + 1))
+        Get the part of the iteration-count image computed at a given resolution level.
 
-        re_array, im_array = np.meshgrid(re_array, im_array)
-        c = re_array + 1j * im_array
-        z = tf.zeros_like(c, dtype=tf.complex64)
-        m = tf.fill(c.shape, self.precision)
+        Args:
+            stride (int): The stride of the level.
 
-        for i in range(self.precision):
-            mask = tf.abs(z) < 2
-            z = tf.where(mask, z * z + c, z)
-            m = tf.where(mask, tf.fill(m.shape, i), m)
+        Returns:
+            tuple: The iteration counts of the level as a 2D array, and its (left, right, bottom, top) extent.
+        """
+        left, right, bottom, top = self.extent
+        rows, cols = self.iterations.shape
+        right = left + (right - left) * ((cols - 1) // stride * stride) / max(cols - 1, 1)
+        top = bottom + (top - bottom) * ((rows - 1) // stride * stride) / max(rows - 1, 1)
+        return self.iterations[::stride, ::stride], (left, right, bottom, top)
 
-        x_array = re_array[m.numpy() < self.precision]
-        y_array = im_array[m.numpy() < self.precision]
+    def compute_out_of_core(self, path, margin=0.0, band_bytes=OUT_OF_CORE_BAND_BYTES, top_down=False):
+        """
+        Compute the iteration-count image a band of rows at a time, streaming every band into a .npy file.
 
-        self.x_array.extend(x_array.flatten())
-        self.y_array.extend(y_array.flatten())
+        Only one band is held in memory, so the peak memory use depends on the band budget and the image width,
+        not on the image height. The caches are bypassed. Afterwards iterations is a read-only memory map of the file.
+
+        Args:
+            path (str): The path of the output .npy file.
+            margin (float): Extra distance added on every side of the range. Defaults to 0.
+            band_bytes (int): The approximate memory budget of one band. Defaults to OUT_OF_CORE_BAND_BYTES.
+            top_down (bool): Whether to store the rows from the top of the image (largest imaginary part)
+                down, as image files do. Defaults to False (the row order of iterations).
+
+        Returns:
+            np.memmap: The iteration-count image.
+        """
+        re_spec, im_spec = self.axis_specs(margin)
+        shape = (im_spec[1], re_spec[1])
+        band_rows = max(1, band_bytes // (shape[1] * BYTES_PER_POINT))
+        re_array = axis_values(re_spec)
+
+        with open_npy_stream(path, shape, np.int32) as file:
+            for r0, r1 in band_bounds(shape[0], band_rows, top_down):
+                check_token(self.token)
+                band_spec = sub_spec(im_spec, r0, r1)
+                if self.workers > 1:
+                    band = compute_tiled(re_spec, band_spec, self.precision, self.backend.name, self.workers,
+                                         token=self.token, stats=self.stats, strategy=self.strategy)
+                else:
+                    c = re_array[np.newaxis, :] + 1j * axis_values(band_spec)[:, np.newaxis]
+                    band = escape_time_grid(self.backend, c, self.precision, self.token, self.stats, self.strategy)
+                band = np.asarray(band, dtype=np.int32)
+                file.write((band[::-1] if top_down else band).tobytes())
+
+        self.extent = self.grid_extent(re_spec, im_spec)
+        self.iterations = np.load(path, mmap_mode="r")
+        return self.iterations
+
+    def colorize_out_of_core(self, gradient, path, band_bytes=OUT_OF_CORE_BAND_BYTES):
+        """
+        Color the iteration-count image a band of rows at a time, streaming 8-bit RGB into a .npy file.
+
+        Args:
+            gradient (callable): A gradient such as psych_grad or blue_grad.
+            path (str): The path of the output .npy file.
+            band_bytes (int): The approximate memory budget of one band. Defaults to OUT_OF_CORE_BAND_BYTES.
+
+        Returns:
+            np.memmap: The RGB image of shape (rows, columns, 3).
+        """
+        rows, cols = self.iterations.shape
+        table = np.round(self.color_table(gradient) * 255).astype(np.uint8)
+        band_rows = max(1, band_bytes // (cols * BYTES_PER_POINT))
+
+        with open_npy_stream(path, (rows, cols, 3), np.uint8) as file:
+            for r0, r1 in band_bounds(rows, band_rows):
+                check_token(self.token)
+                file.write(table[read_rows(self.iterations, r0, r1)].tobytes())
+
+        return np.load(path, mmap_mode="r")
+
+    def compute_mandelbrot_col(self):
+        """
+        Compute the Mandelbrot set for color plotting and update the iteration image.
+        """
+        self.compute_iterations(self.color_margin)
+
+    def compute_mandelbrot_bw(self):
+        """
+        Compute the Mandelbrot set for black and white plotting and update the iteration image.
+        """
+        self.compute_iterations()
 
 
 class BifurcationCalculation:
@@ -145,42 +917,200 @@ class BifurcationCalculation:
         step (float): The step size for the calculation grid.
         restart (float): The starting value for the parameter r.
         restop (float): The stopping value for the parameter r.
-        x_array (list): List to store x-coordinates of the calculated points.
-        r_array (list): List to store r values used in the calculation.
+        chunk_size (int): The maximum number of r values iterated together.
+        rng (np.random.Generator): The generator used for the per-r iteration jitter.
+        backend: The compute backend running the logistic kernel.
+        token (CancelToken): Token checked by the kernel so a superseded calculation stops early, or None.
+        seed (int): Seed for the per-r iteration jitter, or None.
+        cache (TileCache): In-memory cache of base orbits shared between calculations, or None.
+        disk_cache (DiskCache): Persistent cache of base orbits, or None.
+        x_array (np.ndarray): Array storing x-coordinates of the calculated points.
+        r_array (np.ndarray): Array storing r values used in the calculation.
+        density (np.ndarray): Histogram of the iterates over r and x from compute_density, rows along x, or None.
+        density_extent (tuple): The (left, right, bottom, top) bounds of the histogram in the (r, x) plane, or None.
+        periods (np.ndarray): The period of the cycle every r of the base orbit converged to, 0 where the orbit
+            did not converge, or None before the base orbit is computed.
+        lyapunov (np.ndarray): The Lyapunov exponent of every r from compute_lyapunov, or None.
     """
 
-    def __init__(self, step, precision):
+    def __init__(self, step, precision, seed=None, backend=None, token=None, cache=None, disk_cache=None,
+                 chunk_size=None):
         """
         Initialize the BifurcationCalculation class with the specified step size and precision.
 
         Args:
             step (float): The step size for the calculation grid.
             precision (int): The number of iterations for each calculation.
+            seed (int, optional): Seed for the per-r iteration jitter. Defaults to None (unseeded).
+            backend (str, optional): The name of the compute backend. Defaults to None (the default backend).
+            token (CancelToken, optional): Token that cancels the calculation. Defaults to None.
+            cache (TileCache, optional): In-memory cache of base orbits. Defaults to None (the default orbit cache).
+            disk_cache (DiskCache, optional): Persistent cache of base orbits. Defaults to None (the default disk cache).
+            chunk_size (int, optional): The maximum number of r values iterated together. Defaults to None
+                (CHUNK_SIZE).
         """
         self.precision = precision
         self.step = step
+        self.backend = get_backend(backend)
+        self.token = token
         self.restart = -2.0
         self.restop = 0.5
+        self.chunk_size = chunk_size or CHUNK_SIZE
+        self.seed = seed
+        self.rng = np.random.default_rng(seed)
+        self.cache = cache if cache is not None else get_default_orbit_cache()
+        self.disk_cache = disk_cache if disk_cache is not None else get_default_disk_cache()
 
         self.x_array = []
         self.r_array = []
+        self.density = None
+        self.density_extent = None
+        self.periods = None
+        self.lyapunov = None
 
-    def compute_bifurcation(self):
+    def r_grid(self):
         """
-        Compute the bifurcation diagram for the logistic map and update the arrays.
+        Build the grid of r values for the current range and step size.
+
+        Returns:
+            np.ndarray: The r values.
+        """
+        with stage("grid"):
+            return np.linspace(self.restart, self.restop, self.r_count())
+
+    def r_count(self):
+        """
+        Get the number of r values of the grid for the current range and step size.
+
+        Returns:
+            int: The number of r values.
+        """
+        return int((self.restop - self.restart) / self.step + 1)
+
+    def iterate_logistic(self, r_array, x0=0.2, periods=None):
+        """
+        Iterate the logistic map for every r value, in chunks of at most `chunk_size` values.
+
+        Each r gets a random number of extra iterations between 0 and JITTER_MAX, drawn from `rng`.
+
+        Args:
+            r_array (np.ndarray): The r values.
+            x0 (float): The initial x value. Defaults to 0.2.
+            periods (np.ndarray, optional): Integer array receiving the period of the cycle every r converged to,
+                or 0 where none was found. Defaults to None.
+
+        Returns:
+            np.ndarray: The final x value for every r.
         """
-        self.r_array = np.linspace(self.restart, self.restop, int((self.restop - self.restart) / self.step + 1))
+        r_array = np.asarray(r_array, dtype=np.float64)
+        jitter = self.rng.integers(0, JITTER_MAX + 1, size=r_array.shape)
+        x_array = np.empty_like(r_array)
+
+        with stage("iterate"):
+            for start in range(0, r_array.size, self.chunk_size):
+                stop = min(start + self.chunk_size, r_array.size)
+                x_array[start:stop] = self.backend.logistic(r_array[start:stop], x0, self.precision,
+                                                              jitter[start:stop], self.token,
+                                                              periods=None if periods is None else periods[start:stop])
 
-        for r in self.r_array:
-            count = 0
-            x = np.float64(0.2)
-            switcheroo = Random()
-            s = switcheroo.randint(0, 10)
+        return x_array
 
-            while count < self.precision + s:
-                x = r * x * (1 - x)
-                count += 1
-            self.x_array.append(x)
+    def load_cached(self, params):
+        """
+        Look up an array in the in-memory cache, then in the disk cache, copying arrays found on disk into memory.
+
+        Args:
+            params (dict): JSON-serializable parameters identifying the array.
+
+        Returns:
+            np.ndarray: The read-only cached array, or None if it is not cached.
+        """
+        key = tuple(params.values())
+        array = self.cache.get(key) if self.cache is not None else None
+        if array is None and self.disk_cache is not None:
+            with stage("disk cache"):
+                array = self.disk_cache.get(params)
+            if array is not None:
+                array = np.array(array)
+                array.flags.writeable = False
+                if self.cache is not None:
+                    self.cache.put(key, array)
+        return array
+
+    def store_cached(self, params, array, seconds=None):
+        """
+        Store an array in the in-memory cache and the disk cache. The array becomes read-only, as it is shared.
+
+        Args:
+            params (dict): JSON-serializable parameters identifying the array.
+            array (np.ndarray): The array to store.
+            seconds (float, optional): The time it took to compute the array, as taken by DiskCache.put.
+                Defaults to None.
+        """
+        array.flags.writeable = False
+        if self.cache is not None:
+            self.cache.put(tuple(params.values()), array)
+        if self.disk_cache is not None:
+            with stage("disk cache"):
+                self.disk_cache.put(params, array, seconds)
+
+    def base_orbit(self, x0=0.2):
+        """
+        Get the final x value for every r of the grid, from the in-memory cache or the disk cache when possible.
+
+        Cached orbits are keyed by the grid, precision, initial x, seed, backend and whether cycle detection was
+        used. An unseeded orbit is cached too, as one sample of the random jitter. Orbits loaded from disk are
+        copied into memory, so repeated lookups, such as one per click on the Mandelbrot plot, cost no file
+        access. The periods found by cycle detection are cached alongside and set in `periods`.
+
+        Args:
+            x0 (float): The initial x value. Defaults to 0.2.
+
+        Returns:
+            np.ndarray: The final x value for every r of `r_grid()`.
+        """
+        params = {"kind": "logistic", "restart": self.restart, "restop": self.restop, "step": self.step,
+                  "precision": self.precision, "x0": float(x0), "seed": self.seed, "backend": self.backend.name,
+                  "cycles": get_cycle_checks()}
+        period_params = dict(params, kind="logistic_periods")
+
+        x_array = self.load_cached(params)
+        periods = self.load_cached(period_params)
+        if x_array is None or periods is None:
+            start = time.perf_counter()
+            r_array = self.r_grid()
+            periods = np.zeros(r_array.size, dtype=np.int32)
+            x_array = self.iterate_logistic(r_array, x0, periods)
+            seconds = time.perf_counter() - start
+            self.store_cached(params, x_array, seconds)
+            self.store_cached(period_params, periods, seconds)
+
+        self.periods = periods
+        return x_array
+
+    def period_summary(self):
+        """
+        Describe the cycles found by the last base orbit.
+
+        Returns:
+            str: The number of r values whose orbit converged to a cycle and the most common periods.
+        """
+        if self.periods is None or len(self.periods) == 0:
+            return "no cycles found"
+        counts = np.bincount(self.periods)
+        common = [f"{period}: {counts[period]}" for period in np.argsort(counts[1:])[::-1][:4] + 1 if counts[period]]
+        converged = len(self.periods) - counts[0]
+        summary = f"{converged} of {len(self.periods)} r values converged to a cycle"
+        if common:
+            summary += f" (r values per period, {', '.join(common)})"
+        return summary
+
+    def compute_bifurcation(self):
+        """
+        Compute the bifurcation diagram for the logistic map and update the arrays.
+        """
+        self.r_array = self.r_grid()
+        self.x_array = self.base_orbit()
 
         plt.xlim(-2, -0.5)
 
@@ -191,17 +1121,8 @@ class BifurcationCalculation:
         Args:
             x (float): The initial x value for the logistic map.
         """
-        self.r_array = np.linspace(self.restart, self.restop, int((self.restop - self.restart) / self.step + 1))
-
-        for r in self.r_array:
-            count = 0
-            switcheroo = Random()
-            s = switcheroo.randint(0, 10)
-
-            while count < self.precision + s:
-                x = r * x * (1 - x)
-                count += 1
-            self.x_array.append(x)
+        self.r_array = self.r_grid()
+        self.x_array = self.base_orbit(x)
 
         plt.xlim(-2, -0.5)
 
@@ -213,22 +1134,145 @@ class BifurcationCalculation:
             real (float): The real part of the initial complex value.
             imag (float): The imaginary part of the initial complex value.
         """
-        self.r_array = np.linspace(self.restart, self.restop, int((self.restop - self.restart) / self.step + 1))
+        self.r_array = self.r_grid()
         c = complex(real, imag)
 
-        for r in self.r_array:
-            count = 0
-            x = np.float64(0.2)
-            switcheroo = Random()
-            s = switcheroo.randint(0, 10)
-
-            while count < self.precision + s:
-                x = r * x * (1 - x)
-                count += 1
-            self.x_array.append(np.abs(c) * x * (1 - x))
+        x = self.base_orbit()
+        self.x_array = np.abs(c) * x * (1 - x)
 
         plt.xlim(-2, -0.5)
 
+    def compute_bifurcation_points(self, points, x0=0.2):
+        """
+        Compute the bifurcation diagrams of many complex points in one batch.
+
+        Every point scales the same base orbit as in compute_bifurcation_from_point, so the orbit is computed once
+        and the result is filled a block of points at a time, each block holding about `chunk_size` values.
+
+        Args:
+            points (array_like): The complex points.
+            x0 (float): The initial x value. Defaults to 0.2.
+
+        Returns:
+            np.ndarray: Array of shape (number of points, number of r values) whose row i is the diagram of the
+                i-th point over `r_array`.
+        """
+        self.r_array = self.r_grid()
+        x = self.base_orbit(x0)
+        complement = 1 - x
+        scale = np.abs(np.asarray(points, dtype=np.complex128).ravel())
+
+        x_points = np.empty((scale.size, x.size))
+        block = max(1, self.chunk_size // max(x.size, 1))
+        for start in range(0, scale.size, block):
+            check_token(self.token)
+            stop = min(start + block, scale.size)
+            np.multiply(scale[start:stop, np.newaxis], x, out=x_points[start:stop])
+            x_points[start:stop] *= complement
+
+        return x_points
+
+    def compute_density(self, shape, samples=DENSITY_SAMPLES, x0=0.2, x_range=None):
+        """
+        Compute a density histogram of the last iterates of the logistic map over the r grid.
+
+        Starting from the base orbit, every r is iterated `samples` more times and the (x, r) bin of each iterate
+        is recorded. Bins are counted once at least as many iterates as there are bins are pending, so the cost
+        of counting does not grow with the number of samples times the number of bins. The r values are
+        processed in chunks of `chunk_size`, and memory use depends on the histogram shape and the chunk size only.
+
+        Args:
+            shape (tuple): The number of bins along x and along r.
+            samples (int): The number of iterates recorded per r. Defaults to DENSITY_SAMPLES.
+            x0 (float): The initial x value. Defaults to 0.2.
+            x_range (tuple, optional): The (low, high) bounds of the x bins. Defaults to None (the range of the
+                finite values of the base orbit). Iterates outside the range or diverged are not counted.
+
+        Returns:
+            np.ndarray: The int64 histogram counts, of the given shape.
+        """
+        x_bins, r_bins = shape
+        r_array = self.r_grid()
+        x_start = self.base_orbit(x0)
+        if x_range is None:
+            finite = x_start[np.isfinite(x_start)]
+            x_range = (finite.min(), finite.max()) if finite.size else (0.0, 1.0)
+        x_low, x_high = x_range
+        if x_high <= x_low:
+            x_low, x_high = x_low - 0.5, x_low + 0.5
+
+        r_index = ((r_array - self.restart) / (self.restop - self.restart) * r_bins).astype(np.int64)
+        r_index = np.clip(r_index, 0, r_bins - 1)
+        x_scale = x_bins / (x_high - x_low)
+        density = np.zeros(x_bins * r_bins, dtype=np.int64)
+        pending = []
+        pending_count = 0
+
+        with np.errstate(over='ignore', invalid='ignore'), stage("histogram"):
+            for start in range(0, r_array.size, self.chunk_size):
+                stop = min(start + self.chunk_size, r_array.size)
+                r = r_array[start:stop]
+                x = np.array(x_start[start:stop])
+                for i in range(samples):
+                    if i % CHECK_INTERVAL == 0:
+                        check_token(self.token)
+                    x = r * x * (1 - x)
+                    x_index = np.floor((x - x_low) * x_scale)
+                    inside = (x_index >= 0) & (x_index < x_bins)
+                    pending.append(x_index[inside].astype(np.int64) * r_bins + r_index[start:stop][inside])
+                    pending_count += pending[-1].size
+                    if pending_count >= density.size:
+                        density += np.bincount(np.concatenate(pending), minlength=density.size)
+                        pending = []
+                        pending_count = 0
+            if pending:
+                density += np.bincount(np.concatenate(pending), minlength=density.size)
+
+        self.density = density.reshape(shape)
+        self.density_extent = (self.restart, self.restop, x_low, x_high)
+        return self.density
+
+    def compute_lyapunov(self, samples=LYAPUNOV_SAMPLES, x0=0.2):
+        """
+        Compute the Lyapunov exponent of the logistic map for every r of the grid.
+
+        Each r iterates `precision` times from x0 and then averages the log-derivative over `samples` further
+        iterations, in the same pass of the backend kernel, so the transient is not walked twice. An r whose orbit
+        converged to a cycle stops as soon as the cycle is detected and only walks the cycle once, which gives the
+        exponent of the cycle exactly. The periods found are set in `periods`. The r values are processed in chunks
+        of `chunk_size`.
+
+        Args:
+            samples (int): The number of iterations averaged for the r values without a cycle. Defaults to
+                LYAPUNOV_SAMPLES.
+            x0 (float): The initial x value. Defaults to 0.2.
+
+        Returns:
+            np.ndarray: The Lyapunov exponent of every r of `r_array`; negative where the orbit is stable,
+                positive where it is chaotic.
+        """
+        self.r_array = self.r_grid()
+        self.periods = np.zeros(self.r_array.size, dtype=np.int32)
+
+        self.lyapunov = np.empty(self.r_array.size)
+        with stage("lyapunov"):
+            for start in range(0, self.r_array.size, self.chunk_size):
+                stop = min(start + self.chunk_size, self.r_array.size)
+                self.lyapunov[start:stop] = self.backend.lyapunov(self.r_array[start:stop], x0, self.precision,
+                                                                  samples, self.token,
+                                                                  periods=self.periods[start:stop])
+        return self.lyapunov
+
+    def set_seed(self, seed):
+        """
+        Reseed the generator used for the per-r iteration jitter.
+
+        Args:
+            seed (int): The new seed.
+        """
+        self.seed = seed
+        self.rng = np.random.default_rng(seed)
+
     def set_precision(self, precision):
         """
         Set the precision (number of iterations) for the bifurcation calculation.
@@ -0,0 +1,258 @@
+import cProfile
+import io
+import pstats
+import threading
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+
+from jobs import JobCancelled
+
+TRACE_HISTORY = 50
+CPROFILE_LINES = 25
+
+_enabled = False
+_cprofile = False
+_started_tracemalloc = False
+_traces = deque(maxlen=TRACE_HISTORY)
+_traces_lock = threading.Lock()
+_local = threading.local()
+
+
+class StageStats:
+    """
+    The time and memory spent by a job in one kind of stage, accumulated over every time the stage ran.
+
+    Attributes:
+        calls (int): The number of times the stage ran.
+        seconds (float): The total wall time of the stage.
+        peak_bytes (int): The highest traced memory allocated above the level at the start of the stage.
+    """
+
+    def __init__(self):
+        """
+        Initialize empty stage statistics.
+        """
+        self.calls = 0
+        self.seconds = 0.0
+        self.peak_bytes = 0
+
+
+class JobTrace:
+    """
+    The stages of one render job, in the order they first ran, with the total time of the job.
+
+    Attributes:
+        name (str): The name of the job.
+        started (float): The time.time() at which the job started.
+        seconds (float): The wall time of the whole job, set when it ends.
+        status (str): "running", "completed", "cancelled" or "failed".
+        stages (dict): The StageStats of every stage name.
+        profile (str): The cProfile report of the job, or None if it was not captured.
+        open_peaks (list): The memory peaks of the stages currently running, outermost first.
+    """
+
+    def __init__(self, name):
+        """
+        Initialize the trace of a job that starts now.
+
+        Args:
+            name (str): The name of the job.
+        """
+        self.name = name
+        self.started = time.time()
+        self.seconds = 0.0
+        self.status = "running"
+        self.stages = {}
+        self.profile = None
+        self.open_peaks = []
+
+    def summary(self):
+        """
+        Describe the time and memory of every stage of the job.
+
+        Returns:
+            str: One line for the job followed by one line per stage.
+        """
+        lines = [f"Profile of {self.name} ({self.status}, {time.strftime('%H:%M:%S', time.localtime(self.started))}): "
+                 f"{self.seconds:.3f} s"]
+        for name, stats in self.stages.items():
+            share = stats.seconds / self.seconds if self.seconds else 0.0
+            line = f"  {name}: {stats.seconds:.3f} s ({share:.0%})"
+            if stats.calls > 1:
+                line += f" over {stats.calls} calls"
+            if tracemalloc.is_tracing():
+                line += f", peak {stats.peak_bytes / 2 ** 20:.1f} MB"
+            lines.append(line)
+        return "\n".join(lines)
+
+
+def fold_peak(trace):
+    """
+    Raise the peak of every open stage of a trace to the memory traced so far, then restart the peak.
+
+    tracemalloc keeps a single peak, so nested stages fold it into their own before an inner stage resets it.
+
+    Args:
+        trace (JobTrace): The trace whose open stages are updated.
+    """
+    if not tracemalloc.is_tracing():
+        return
+    _, peak = tracemalloc.get_traced_memory()
+    trace.open_peaks = [max(open_peak, peak) for open_peak in trace.open_peaks]
+    tracemalloc.reset_peak()
+
+
+@contextmanager
+def stage(name):
+    """
+    Time a stage of the job running in the current thread, and trace the memory it allocates.
+
+    Does nothing when profiling is disabled or no job is traced in the current thread. The memory is traced by
+    tracemalloc, which has a single peak for the whole process, so jobs running at the same time in other threads
+    add to each other's peaks.
+
+    Args:
+        name (str): The name of the stage. Stages of the same name are accumulated.
+    """
+    trace = getattr(_local, "trace", None)
+    if trace is None:
+        yield
+        return
+
+    fold_peak(trace)
+    current = tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else 0
+    trace.open_peaks.append(current)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        fold_peak(trace)
+        peak = trace.open_peaks.pop()
+        stats = trace.stages.setdefault(name, StageStats())
+        stats.calls += 1
+        stats.seconds += seconds
+        stats.peak_bytes = max(stats.peak_bytes, peak - current)
+
+
+@contextmanager
+def job_trace(name):
+    """
+    Trace the stages of a job running in the current thread, keeping the trace among the last TRACE_HISTORY ones.
+
+    With cProfile capture enabled the job also runs under cProfile, unless another profiler is already active.
+
+    Args:
+        name (str): The name of the job.
+
+    Yields:
+        JobTrace: The trace of the job, or None when profiling is disabled.
+    """
+    if not _enabled:
+        yield None
+        return
+
+    trace = JobTrace(name)
+    profiler = cProfile.Profile() if _cprofile else None
+    if profiler is not None:
+        try:
+            profiler.enable()
+        except ValueError:
+            profiler = None
+    _local.trace = trace
+    start = time.perf_counter()
+    try:
+        yield trace
+        trace.status = "completed"
+    except JobCancelled:
+        trace.status = "cancelled"
+        raise
+    except Exception:
+        trace.status = "failed"
+        raise
+    finally:
+        trace.seconds = time.perf_counter() - start
+        _local.trace = None
+        if profiler is not None:
+            profiler.disable()
+            report = io.StringIO()
+            pstats.Stats(profiler, stream=report).sort_stats("cumulative").print_stats(CPROFILE_LINES)
+            trace.profile = report.getvalue()
+        with _traces_lock:
+            _traces.append(trace)
+
+
+def last_traces(count=None):
+    """
+    Get the traces of the last jobs, oldest first.
+
+    Args:
+        count (int, optional): The number of traces. Defaults to None (every kept trace).
+
+    Returns:
+        list: The JobTrace of each job.
+    """
+    with _traces_lock:
+        traces = list(_traces)
+    return traces if count is None else traces[-count:] if count > 0 else []
+
+
+def clear_traces():
+    """
+    Forget the traces of every finished job.
+    """
+    with _traces_lock:
+        _traces.clear()
+
+
+def set_profiling(enabled):
+    """
+    Enable or disable the tracing of render jobs.
+
+    Enabling it starts tracemalloc, unless it is already running, and disabling it stops tracemalloc if it was
+    started here. tracemalloc slows down allocations, so profiling is disabled by default.
+
+    Args:
+        enabled (bool): Whether jobs are traced.
+    """
+    global _enabled, _started_tracemalloc
+    if enabled and not tracemalloc.is_tracing():
+        tracemalloc.start()
+        _started_tracemalloc = True
+    elif not enabled and _started_tracemalloc:
+        tracemalloc.stop()
+        _started_tracemalloc = False
+    _enabled = enabled
+
+
+def get_profiling():
+    """
+    Get whether render jobs are traced.
+
+    Returns:
+        bool: True if profiling is enabled.
+    """
+    return _enabled
+
+
+def set_cprofile(enabled):
+    """
+    Enable or disable capturing a cProfile report of every traced job.
+
+    Args:
+        enabled (bool): Whether traced jobs run under cProfile.
+    """
+    global _cprofile
+    _cprofile = enabled
+
+
+def get_cprofile():
+    """
+    Get whether traced jobs run under cProfile.
+
+    Returns:
+        bool: True if cProfile reports are captured.
+    """
+    return _cprofile
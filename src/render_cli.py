@@ -0,0 +1,380 @@
+"""
+Headless batch rendering of Mandelbrot and bifurcation plots, without PyQt5.
+
+Jobs are given as "kind key=value ..." strings on the command line, or in a parameter file holding either
+a JSON list of job objects or one job string per line. Examples::
+
+    python render_cli.py "mandelbrot step=0.001 precision=200" "bifurcation step=0.00001 precision=100"
+    python render_cli.py --file jobs.txt --out renders --parallel 8 --format png,npy
+    python render_cli.py "mandelbrot step=0.00005 precision=500 out_of_core=1 format=npy,rgb" --parallel 1
+    python render_cli.py "mandelbrot_deep center=-0.7415316680727509037,0.1115626551234837375 step=1e-16 precision=3000"
+
+Out-of-core Mandelbrot jobs stream the image to disk a band of rows at a time, so images larger than memory
+can be rendered. They write the iteration counts as .npy and, with format rgb, the colors as an 8-bit .rgb.npy.
+
+Mandelbrot images and bifurcation orbits are read from and written to the on-disk cache, whose budget is set
+with --disk-cache, $LPF_DISK_CACHE_MB or the DiskCache command of the GUI, so repeated renders are loaded back.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib.image
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from deep_zoom import DeepZoomCalculation
+from disk_cache import get_default_disk_cache
+from mandelbrot_calc import MandelbrotCalculation, BifurcationCalculation
+
+JOB_KINDS = ("mandelbrot", "mandelbrot_bw", "mandelbrot_deep", "bifurcation", "bifurcation_point")
+FLOAT_LIST_KEYS = ("region", "range", "point")
+INT_KEYS = ("precision", "seed", "workers", "width", "height", "dpi", "out_of_core", "band_mb")
+FLOAT_KEYS = ("step",)
+INT_LIST_KEYS = ("size",)
+
+
+def parse_job_spec(text):
+    """
+    Parse a job string of the form "kind key=value key=value ...".
+
+    Values of region, range and point are comma-separated lists of floats, size is a comma-separated
+    width and height, center is a comma-separated pair of decimal strings and format is a comma-separated
+    list of output formats.
+
+    Args:
+        text (str): The job string.
+
+    Returns:
+        dict: The job parameters.
+
+    Raises:
+        ValueError: If the string is malformed.
+    """
+    tokens = text.split()
+    if not tokens:
+        raise ValueError("Empty job specification")
+
+    job = {}
+    if "=" not in tokens[0]:
+        job["kind"] = tokens.pop(0)
+    for token in tokens:
+        key, sep, value = token.partition("=")
+        if not sep:
+            raise ValueError(f"Expected key=value, got: {token}")
+        job[key] = value
+    return normalize_job(job)
+
+
+def normalize_job(job):
+    """
+    Convert the values of a job to their types and check its kind.
+
+    Args:
+        job (dict): The job parameters, with values as strings or already typed.
+
+    Returns:
+        dict: The job with typed values.
+
+    Raises:
+        ValueError: If the kind is unknown or a value cannot be converted.
+    """
+    job = dict(job)
+    job.setdefault("kind", "mandelbrot")
+    if job["kind"] not in JOB_KINDS:
+        raise ValueError(f"Unknown job kind: {job['kind']}. Available kinds: {', '.join(JOB_KINDS)}")
+
+    for key in FLOAT_LIST_KEYS:
+        if isinstance(job.get(key), str):
+            job[key] = [float(value) for value in job[key].split(",")]
+    for key in INT_LIST_KEYS:
+        if isinstance(job.get(key), str):
+            job[key] = [int(value) for value in job[key].split(",")]
+    if isinstance(job.get("center"), str):
+        job["center"] = job["center"].split(",")
+    for key in INT_KEYS:
+        if key in job:
+            job[key] = int(job[key])
+    for key in FLOAT_KEYS:
+        if key in job:
+            job[key] = float(job[key])
+    if isinstance(job.get("format"), str):
+        job["format"] = job["format"].split(",")
+    return job
+
+
+def load_jobs(path):
+    """
+    Load jobs from a parameter file.
+
+    Args:
+        path (str): A .json file holding a list of job objects, or a text file with one job string per line.
+            Empty lines and lines starting with # are skipped.
+
+    Returns:
+        list: The job parameters.
+    """
+    with open(path, "r", encoding="utf-8") as file:
+        text = file.read()
+    if path.endswith(".json"):
+        return [normalize_job(job) for job in json.loads(text)]
+    return [parse_job_spec(line) for line in text.splitlines() if line.strip() and not line.lstrip().startswith("#")]
+
+
+def mandelbrot_job(job, gradient_name):
+    """
+    Set up the Mandelbrot calculation of a job.
+
+    Args:
+        job (dict): The job parameters.
+        gradient_name (str): The name of the MandelbrotCalculation gradient coloring the image.
+
+    Returns:
+        tuple: The calculation and the margin of its range.
+    """
+    mandel = MandelbrotCalculation(job.get("step", 0.005), job.get("precision", 100), backend=job.get("backend"),
+                                   workers=job.get("workers", 1), strategy=job.get("strategy"))
+    margin = mandel.color_margin if gradient_name == "psych_grad" else 0.0
+    if "region" in job:
+        mandel.set_region(*job["region"])
+        margin = 0.0
+    return mandel, margin
+
+
+def render_mandelbrot(job, gradient_name):
+    """
+    Compute the Mandelbrot set of a job.
+
+    Args:
+        job (dict): The job parameters.
+        gradient_name (str): The name of the MandelbrotCalculation gradient coloring the image.
+
+    Returns:
+        tuple: The iteration-count image and the RGB image, with the first row at the top.
+    """
+    mandel, margin = mandelbrot_job(job, gradient_name)
+    mandel.compute_iterations(margin)
+
+    iterations = np.asarray(mandel.iterations)
+    colors = mandel.colorize(getattr(mandel, gradient_name), iterations)
+    return iterations[::-1], colors[::-1]
+
+
+def render_mandelbrot_out_of_core(job, gradient_name, base, formats):
+    """
+    Compute the Mandelbrot set of a job band by band, streaming it to .npy files.
+
+    Args:
+        job (dict): The job parameters, optionally with the band memory budget band_mb in megabytes.
+        gradient_name (str): The name of the MandelbrotCalculation gradient coloring the image.
+        base (str): The output path without extension.
+        formats (list): The output formats, npy and/or rgb.
+
+    Returns:
+        tuple: The written files and the compute time in seconds.
+
+    Raises:
+        ValueError: If a format other than npy or rgb is requested.
+    """
+    unsupported = set(formats) - {"npy", "rgb"}
+    if unsupported:
+        raise ValueError(f"Out-of-core jobs only write npy and rgb, not {', '.join(sorted(unsupported))}")
+
+    mandel, margin = mandelbrot_job(job, gradient_name)
+    band_bytes = job.get("band_mb", 64) * 1024 * 1024
+    start = time.perf_counter()
+    mandel.compute_out_of_core(base + ".npy", margin, band_bytes, top_down=True)
+    computed = time.perf_counter() - start
+    outputs = [base + ".npy"]
+    if "rgb" in formats:
+        mandel.colorize_out_of_core(getattr(mandel, gradient_name), base + ".rgb.npy", band_bytes)
+        outputs.append(base + ".rgb.npy")
+    return outputs, computed
+
+
+def render_mandelbrot_deep(job):
+    """
+    Compute a deep zoom of the Mandelbrot set by perturbation.
+
+    Args:
+        job (dict): The job parameters, with the center as a pair of decimal strings and the size in pixels.
+
+    Returns:
+        tuple: The iteration-count image and the RGB image, with the first row at the top.
+    """
+    width, height = job.get("size", (640, 480))
+    deep = DeepZoomCalculation(*job.get("center", ("-0.75", "0.1")), job.get("step", 1e-6), width, height,
+                               job.get("precision", 1000))
+    iterations = deep.compute_iterations()
+    mandel = MandelbrotCalculation(deep.step, deep.precision)
+    colors = mandel.colorize(mandel.psych_grad, iterations)
+    return iterations[::-1], colors[::-1]
+
+
+def render_bifurcation(job):
+    """
+    Compute the bifurcation diagram of a job.
+
+    Args:
+        job (dict): The job parameters.
+
+    Returns:
+        tuple: The r values and x values.
+    """
+    logi = BifurcationCalculation(job.get("step", 0.0001), job.get("precision", 100), seed=job.get("seed"),
+                                  backend=job.get("backend"))
+    if "range" in job:
+        logi.restart, logi.restop = job["range"]
+    if job["kind"] == "bifurcation_point":
+        logi.compute_bifurcation_from_point(*job.get("point", (0.0, 0.0)))
+    else:
+        logi.compute_bifurcation()
+    return np.asarray(logi.r_array), np.asarray(logi.x_array)
+
+
+def save_scatter_png(path, r_array, x_array, job):
+    """
+    Save a bifurcation diagram as a scatter plot, drawn without pyplot.
+
+    Args:
+        path (str): The output path.
+        r_array (np.ndarray): The r values.
+        x_array (np.ndarray): The x values.
+        job (dict): The job parameters, optionally with width, height and dpi.
+    """
+    dpi = job.get("dpi", 100)
+    figure = Figure(figsize=(job.get("width", 1200) / dpi, job.get("height", 800) / dpi), dpi=dpi)
+    FigureCanvasAgg(figure)
+    ax = figure.add_subplot(111)
+    ax.scatter(r_array, x_array, 0.05, 'b')
+    ax.set_xlabel('r')
+    ax.set_ylabel('x')
+    figure.savefig(path)
+
+
+def run_job(index, job, out_dir, disk_cache_bytes=None):
+    """
+    Run one job and write its outputs.
+
+    Args:
+        index (int): The position of the job in the batch, used in the default output name.
+        job (dict): The job parameters.
+        out_dir (str): The output directory.
+        disk_cache_bytes (int, optional): The byte budget of the disk cache, 0 to disable it. Defaults to None
+            (the default budget).
+
+    Returns:
+        dict: The job name, the written files and the compute and write times in seconds.
+    """
+    if disk_cache_bytes is not None:
+        get_default_disk_cache().set_max_bytes(disk_cache_bytes)
+    name = job.get("name", f"{index:03d}_{job['kind']}")
+    formats = job.get("format", ["png"])
+    base = os.path.join(out_dir, name)
+    outputs = []
+
+    start = time.perf_counter()
+    if job["kind"] in ("mandelbrot", "mandelbrot_bw") and job.get("out_of_core"):
+        outputs, compute_time = render_mandelbrot_out_of_core(
+            job, "psych_grad" if job["kind"] == "mandelbrot" else "bw_grad", base, formats)
+        computed = start + compute_time
+    elif job["kind"].startswith("mandelbrot"):
+        if job["kind"] == "mandelbrot_deep":
+            iterations, colors = render_mandelbrot_deep(job)
+        else:
+            iterations, colors = render_mandelbrot(job, "psych_grad" if job["kind"] == "mandelbrot" else "bw_grad")
+        computed = time.perf_counter()
+        if "png" in formats:
+            matplotlib.image.imsave(base + ".png", colors)
+            outputs.append(base + ".png")
+        if "npy" in formats:
+            np.save(base + ".npy", iterations)
+            outputs.append(base + ".npy")
+    else:
+        r_array, x_array = render_bifurcation(job)
+        computed = time.perf_counter()
+        if "png" in formats:
+            save_scatter_png(base + ".png", r_array, x_array, job)
+            outputs.append(base + ".png")
+        if "npy" in formats:
+            np.save(base + ".npy", np.stack([r_array, x_array]))
+            outputs.append(base + ".npy")
+    written = time.perf_counter()
+
+    return {"name": name, "outputs": outputs, "compute": computed - start, "write": written - computed}
+
+
+def run_batch(jobs, out_dir, parallel=1, disk_cache_bytes=None):
+    """
+    Run a batch of jobs, in parallel worker processes when more than one is requested.
+
+    Args:
+        jobs (list): The job parameters.
+        out_dir (str): The output directory.
+        parallel (int): The number of jobs run at the same time. Defaults to 1.
+        disk_cache_bytes (int, optional): The byte budget of the disk cache, 0 to disable it. Defaults to None
+            (the default budget).
+
+    Returns:
+        list: The results of run_job, in job order.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    if parallel <= 1:
+        return [run_job(index, job, out_dir, disk_cache_bytes) for index, job in enumerate(jobs)]
+    with ProcessPoolExecutor(max_workers=parallel) as pool:
+        futures = [pool.submit(run_job, index, job, out_dir, disk_cache_bytes) for index, job in enumerate(jobs)]
+        return [future.result() for future in futures]
+
+
+def main(argv=None):
+    """
+    Run the command-line interface.
+
+    Args:
+        argv (list, optional): The command-line arguments. Defaults to None (sys.argv).
+
+    Returns:
+        int: The exit status.
+    """
+    parser = argparse.ArgumentParser(description="Render Mandelbrot and bifurcation plots without the GUI.")
+    parser.add_argument("jobs", nargs="*", help='job strings such as "mandelbrot step=0.001 precision=200"')
+    parser.add_argument("--file", help="parameter file: a JSON list of jobs or one job string per line")
+    parser.add_argument("--out", default="renders", help="output directory (default: renders)")
+    parser.add_argument("--parallel", type=int, default=os.cpu_count() or 1,
+                        help="number of jobs rendered at the same time (default: one per core)")
+    parser.add_argument("--format", help="default output formats for jobs that do not set one, e.g. png,npy")
+    parser.add_argument("--disk-cache", type=float, metavar="MB",
+                        help="budget of the on-disk cache in megabytes, 0 to disable it (default: $LPF_DISK_CACHE_MB "
+                             "or the size set in the GUI, otherwise 1024)")
+    args = parser.parse_args(argv)
+    if args.disk_cache is not None and args.disk_cache < 0:
+        parser.error("--disk-cache must not be negative")
+
+    try:
+        jobs = [parse_job_spec(text) for text in args.jobs]
+        if args.file:
+            jobs += load_jobs(args.file)
+    except (OSError, ValueError) as error:
+        parser.error(str(error))
+    if not jobs:
+        parser.error("no jobs given")
+    if args.format:
+        for job in jobs:
+            job.setdefault("format", args.format.split(","))
+
+    start = time.perf_counter()
+    disk_cache_bytes = None if args.disk_cache is None else int(args.disk_cache * 2 ** 20)
+    results = run_batch(jobs, args.out, args.parallel, disk_cache_bytes)
+    for result in results:
+        print(f"{result['name']}: compute {result['compute']:.3f} s, write {result['write']:.3f} s -> "
+              f"{', '.join(result['outputs'])}")
+    print(f"{len(results)} jobs in {time.perf_counter() - start:.3f} s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
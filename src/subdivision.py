@@ -0,0 +1,254 @@
+import time
+
+import numpy as np
+
+from backends import get_interior_checks
+from jobs import check_token
+
+STRATEGIES = ("full", "subdivide")
+MIN_RECT_SIZE = 16
+
+_default_strategy = "full"
+
+
+def rect_border(rect):
+    """
+    Get the index arrays of the border points of a rectangle.
+
+    Args:
+        rect (tuple): The (row_start, row_stop, col_start, col_stop) bounds of the rectangle.
+
+    Returns:
+        tuple: The row indices and column indices of the border points.
+    """
+    r0, r1, c0, c1 = rect
+    cols = np.arange(c0, c1)
+    rows = np.arange(r0 + 1, r1 - 1)
+    border_rows = np.concatenate([np.full(cols.size, r0), np.full(cols.size, r1 - 1), rows, rows])
+    border_cols = np.concatenate([cols, cols, np.full(rows.size, c0), np.full(rows.size, c1 - 1)])
+    return border_rows, border_cols
+
+
+def split_rect(rect):
+    """
+    Split a rectangle into four quadrants sharing their middle row and column.
+
+    Args:
+        rect (tuple): The (row_start, row_stop, col_start, col_stop) bounds of the rectangle.
+
+    Returns:
+        list: The bounds of the four quadrants.
+    """
+    r0, r1, c0, c1 = rect
+    rm = (r0 + r1) // 2
+    cm = (c0 + c1) // 2
+    return [(r0, rm + 1, c0, cm + 1), (r0, rm + 1, cm, c1), (rm, r1, c0, cm + 1), (rm, r1, cm, c1)]
+
+
+def escape_time_subdivided(backend, c, precision, token=None, stats=None, counts=None, known=None, z=None,
+                           min_size=MIN_RECT_SIZE):
+    """
+    Compute Mandelbrot iteration counts of a grid by Mariani-Silver rectangle subdivision.
+
+    Only the borders of rectangles are computed. A rectangle whose border has a single iteration count is
+    filled with it, otherwise it is split into four quadrants. Rectangles no larger than `min_size` along
+    either side are computed in full. All rectangles of a subdivision level are computed in one kernel call.
+
+    The result is approximate. The fill assumes that nothing with a different count lies strictly inside a
+    uniform border, which holds for the continuous set but not for its samples on a grid: an escaping point can
+    sit between in-set neighbours, near the edge of a bulb, without any sample of the border or of the inside
+    telling it apart. Such points are rare, a few per view (4 of 365716 points on the full view at step 0.0037
+    and precision 120), and they get the count of the border. Use compare_strategies to count them.
+
+    Subdivision is not a speedup while the interior shortcuts are enabled, as they are by default: the shortcuts
+    already skip the points inside the set that a uniform border would fill, and every subdivision level pays the
+    per-iteration overhead of the kernel again, so whole views and boundary zooms take as long or longer than the
+    full computation. It pays off with the shortcuts disabled, where it is several times faster, and on views
+    mostly inside the set away from the main cardioid and bulb. It can therefore only be made the default
+    strategy while the shortcuts are disabled; see available_strategies.
+
+    Args:
+        backend: The compute backend running the escape-time kernel.
+        c (np.ndarray): The complex points, as a 2D grid.
+        precision (int): The maximum number of iterations.
+        token (CancelToken, optional): Token checked between subdivision levels. Defaults to None.
+        stats (KernelStats, optional): Counts updated with the work skipped by the shortcuts and the fills.
+            Defaults to None.
+        counts (np.ndarray, optional): Iteration counts of the grid, valid where `known` is set. Updated in place.
+            Defaults to None.
+        known (np.ndarray, optional): Mask of the points whose count is already in `counts`. Defaults to None.
+        z (np.ndarray, optional): Grid receiving the final z of the computed points, and infinity for the filled
+            ones, whose orbits are unknown. Defaults to None.
+        min_size (int): The size below which a rectangle is computed in full. Defaults to MIN_RECT_SIZE.
+
+    Returns:
+        np.ndarray: The int32 iteration count of every point of the grid.
+    """
+    min_size = max(min_size, 3)
+    if counts is None:
+        counts = np.empty(c.shape, dtype=np.int32)
+    known = np.zeros(c.shape, dtype=bool) if known is None else known.copy()
+
+    rects = [(0, c.shape[0], 0, c.shape[1])] if c.size else []
+    while rects:
+        check_token(token)
+        small = [rect for rect in rects if min(rect[1] - rect[0], rect[3] - rect[2]) <= min_size]
+        large = [rect for rect in rects if min(rect[1] - rect[0], rect[3] - rect[2]) > min_size]
+
+        todo = np.zeros(c.shape, dtype=bool)
+        for r0, r1, c0, c1 in small:
+            todo[r0:r1, c0:c1] = True
+        borders = [rect_border(rect) for rect in large]
+        for border in borders:
+            todo[border] = True
+        todo &= ~known
+        counts[todo] = compute_points(backend, c, todo, precision, token, stats, z)
+        known |= todo
+
+        rects = []
+        for (r0, r1, c0, c1), border in zip(large, borders):
+            values = counts[border]
+            if (values == values[0]).all():
+                inner = ~known[r0 + 1:r1 - 1, c0 + 1:c1 - 1]
+                counts[r0 + 1:r1 - 1, c0 + 1:c1 - 1][inner] = values[0]
+                if z is not None:
+                    z[r0 + 1:r1 - 1, c0 + 1:c1 - 1][inner] = np.inf
+                known[r0 + 1:r1 - 1, c0 + 1:c1 - 1] = True
+                if stats is not None:
+                    filled = int(inner.sum())
+                    stats.filled_points += filled
+                    stats.saved_iterations += filled * min(int(values[0]) + 1, precision)
+            else:
+                rects.extend(split_rect((r0, r1, c0, c1)))
+
+    return counts
+
+
+def compute_points(backend, c, todo, precision, token=None, stats=None, z=None):
+    """
+    Compute the iteration counts of the points of a grid selected by a mask.
+
+    Args:
+        backend: The compute backend running the escape-time kernel.
+        c (np.ndarray): The complex points, as a 2D grid.
+        todo (np.ndarray): Mask of the points to compute.
+        precision (int): The maximum number of iterations.
+        token (CancelToken, optional): Token that cancels the calculation. Defaults to None.
+        stats (KernelStats, optional): Counts updated with the work skipped. Defaults to None.
+        z (np.ndarray, optional): Grid receiving the final z of the computed points. Defaults to None.
+
+    Returns:
+        np.ndarray: The iteration counts of the selected points.
+    """
+    if z is None:
+        return backend.escape_time(c[todo], precision, token, stats)
+    z_todo = np.zeros(int(np.count_nonzero(todo)), dtype=np.complex64)
+    counts = backend.escape_time(c[todo], precision, token, stats, z=z_todo)
+    z[todo] = z_todo
+    return counts
+
+
+def escape_time_grid(backend, c, precision, token=None, stats=None, strategy=None, counts=None, known=None, z=None):
+    """
+    Compute Mandelbrot iteration counts of a grid with a rendering strategy.
+
+    Args:
+        backend: The compute backend running the escape-time kernel.
+        c (np.ndarray): The complex points, as a 2D grid.
+        precision (int): The maximum number of iterations.
+        token (CancelToken, optional): Token that cancels the calculation. Defaults to None.
+        stats (KernelStats, optional): Counts updated with the work skipped. Defaults to None.
+        strategy (str, optional): "full" computes every point, "subdivide" uses rectangle subdivision.
+            Defaults to None (the default strategy).
+        counts (np.ndarray, optional): Iteration counts of the grid, valid where `known` is set. Updated in place.
+            Defaults to None.
+        known (np.ndarray, optional): Mask of the points whose count is already in `counts`. Defaults to None.
+        z (np.ndarray, optional): complex64 grid receiving the final z of the computed points, as described in
+            escape_time_kernel. Defaults to None.
+
+    Returns:
+        np.ndarray: The int32 iteration count of every point of the grid.
+    """
+    if strategy is None:
+        strategy = _default_strategy
+    if strategy == "subdivide":
+        return escape_time_subdivided(backend, c, precision, token, stats, counts, known, z)
+
+    if counts is None and known is None and z is None:
+        return backend.escape_time(c, precision, token, stats)
+    if counts is None:
+        counts = np.empty(c.shape, dtype=np.int32)
+    todo = np.ones(c.shape, dtype=bool) if known is None else ~known
+    counts[todo] = compute_points(backend, c, todo, precision, token, stats, z)
+    return counts
+
+
+def compare_strategies(backend, c, precision):
+    """
+    Compute a grid with both strategies and compare the results, to check subdivision against brute force.
+
+    Args:
+        backend: The compute backend running the escape-time kernel.
+        c (np.ndarray): The complex points, as a 2D grid.
+        precision (int): The maximum number of iterations.
+
+    Returns:
+        tuple: The number of points whose counts differ, the time of the full computation and the time of
+            the subdivision in seconds.
+    """
+    start = time.perf_counter()
+    full = escape_time_grid(backend, c, precision, strategy="full")
+    full_time = time.perf_counter() - start
+    start = time.perf_counter()
+    subdivided = escape_time_grid(backend, c, precision, strategy="subdivide")
+    subdivided_time = time.perf_counter() - start
+    return int(np.count_nonzero(full != subdivided)), full_time, subdivided_time
+
+
+def available_strategies():
+    """
+    Get the strategies that can be made the default.
+
+    Subdivision is approximate and, with the interior shortcuts enabled, no faster than the full computation,
+    so it is only offered while the shortcuts are disabled.
+
+    Returns:
+        tuple: The names of the available strategies.
+    """
+    if get_interior_checks():
+        return tuple(name for name in STRATEGIES if name != "subdivide")
+    return STRATEGIES
+
+
+def set_default_strategy(name):
+    """
+    Set the rendering strategy used by calculations that do not ask for a specific one.
+
+    Args:
+        name (str): The name of the strategy.
+
+    Raises:
+        ValueError: If there is no strategy with the given name, or if it is not available.
+    """
+    global _default_strategy
+    if name not in STRATEGIES:
+        raise ValueError(f"Unknown strategy: {name}. Available strategies: {', '.join(available_strategies())}")
+    if name not in available_strategies():
+        raise ValueError(f"The {name} strategy is only available with the interior shortcuts disabled "
+                         f"(Interior off)")
+    _default_strategy = name
+
+
+def get_default_strategy():
+    """
+    Get the name of the default rendering strategy.
+
+    A default that is no longer available, such as subdivision after the interior shortcuts were enabled again,
+    gives way to the full computation until it is available again.
+
+    Returns:
+        str: The name of the default strategy.
+    """
+    if _default_strategy not in available_strategies():
+        return "full"
+    return _default_strategy
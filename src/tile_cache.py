@@ -0,0 +1,151 @@
+import threading
+from collections import OrderedDict
+
+CACHE_TILE_SIZE = 128
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+DEFAULT_ORBIT_MAX_BYTES = 64 * 1024 * 1024
+
+
+class TileCache:
+    """
+    An in-memory cache of computed iteration-count tiles with a byte budget and least-recently-used eviction.
+
+    Tiles are keyed by (tile_x, tile_y, step, precision, backend, strategy). Tile (tile_x, tile_y) covers the
+    lattice points k * step with k in [tile * CACHE_TILE_SIZE, (tile + 1) * CACHE_TILE_SIZE) along each axis.
+    A second instance holds the base orbits of bifurcation calculations, keyed by their parameters.
+
+    Attributes:
+        max_bytes (int): The byte budget of the cache. 0 disables caching.
+        current_bytes (int): The number of bytes held by the cached tiles.
+        hits (int): The number of lookups that found a tile.
+        misses (int): The number of lookups that did not find a tile.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        """
+        Initialize an empty TileCache with the specified byte budget.
+
+        Args:
+            max_bytes (int): The byte budget of the cache. Defaults to DEFAULT_MAX_BYTES.
+        """
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._tiles = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Look up a tile and mark it as most recently used.
+
+        Args:
+            key (tuple): The key of the tile.
+
+        Returns:
+            np.ndarray: The cached tile, or None if it is not cached.
+        """
+        with self._lock:
+            tile = self._tiles.get(key)
+            if tile is None:
+                self.misses += 1
+                return None
+            self._tiles.move_to_end(key)
+            self.hits += 1
+            return tile
+
+    def __contains__(self, key):
+        """
+        Check whether a tile is cached, without counting a hit or miss or changing its recency.
+
+        Args:
+            key (tuple): The key of the tile.
+
+        Returns:
+            bool: True if the tile is cached.
+        """
+        with self._lock:
+            return key in self._tiles
+
+    def put(self, key, tile):
+        """
+        Store a tile, evicting the least recently used tiles until the cache fits its budget.
+
+        Tiles larger than the whole budget are not stored.
+
+        Args:
+            key (tuple): The key of the tile.
+            tile (np.ndarray): The iteration counts of the tile.
+        """
+        with self._lock:
+            if tile.nbytes > self.max_bytes:
+                return
+            old = self._tiles.pop(key, None)
+            if old is not None:
+                self.current_bytes -= old.nbytes
+            self._tiles[key] = tile
+            self.current_bytes += tile.nbytes
+            self._evict()
+
+    def set_max_bytes(self, max_bytes):
+        """
+        Set the byte budget of the cache, evicting tiles if it shrank.
+
+        Args:
+            max_bytes (int): The new byte budget. 0 disables caching.
+        """
+        with self._lock:
+            self.max_bytes = max_bytes
+            self._evict()
+
+    def clear(self):
+        """
+        Remove all tiles and reset the hit and miss counters.
+        """
+        with self._lock:
+            self._tiles.clear()
+            self.current_bytes = 0
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """
+        Describe the state of the cache.
+
+        Returns:
+            str: The number of tiles, memory use and hit/miss counters.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            rate = 100 * self.hits / lookups if lookups else 0
+            return (f"{len(self._tiles)} tiles, {self.current_bytes / 2 ** 20:.1f} of "
+                    f"{self.max_bytes / 2 ** 20:.1f} MB, {self.hits} hits, {self.misses} misses ({rate:.0f}% hit rate)")
+
+    def _evict(self):
+        while self.current_bytes > self.max_bytes and self._tiles:
+            _, tile = self._tiles.popitem(last=False)
+            self.current_bytes -= tile.nbytes
+
+
+default_cache = TileCache()
+default_orbit_cache = TileCache(DEFAULT_ORBIT_MAX_BYTES)
+
+
+def get_default_cache():
+    """
+    Get the tile cache shared by all calculations that do not ask for a specific one.
+
+    Returns:
+        TileCache: The default tile cache.
+    """
+    return default_cache
+
+
+def get_default_orbit_cache():
+    """
+    Get the in-memory cache of base orbits shared by all bifurcation calculations that do not ask for a specific one.
+
+    Returns:
+        TileCache: The default orbit cache.
+    """
+    return default_orbit_cache
@@ -0,0 +1,240 @@
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor, wait
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from backends import KernelStats, get_backend, get_interior_checks, set_interior_checks
+from jobs import check_token
+from subdivision import escape_time_grid, get_default_strategy
+
+TILE_SIZE = 256
+
+_pool = None
+_pool_workers = 0
+_default_workers = 1
+
+
+def lattice_spec(start, stop, step):
+    """
+    Get the lattice parameters of the grid axis covering a range.
+
+    Grid points always lie on the global lattice k * step for integer k, so grids of different regions
+    computed with the same step share their points exactly.
+
+    Args:
+        start (float): The start of the range.
+        stop (float): The end of the range.
+        step (float): The distance between grid points.
+
+    Returns:
+        tuple: The (first_index, num, step) parameters of the axis.
+    """
+    first = math.ceil(start / step - 1e-9)
+    last = math.floor(stop / step + 1e-9)
+    return first, max(last - first + 1, 1), step
+
+
+def axis_values(spec):
+    """
+    Build the grid points of an axis from its lattice parameters.
+
+    Args:
+        spec (tuple): The (first_index, num, step) parameters of the axis.
+
+    Returns:
+        np.ndarray: The grid points of the axis.
+    """
+    first, num, step = spec
+    return (first + np.arange(num)) * step
+
+
+def sub_spec(spec, start, stop):
+    """
+    Get the lattice parameters of a slice of an axis.
+
+    Args:
+        spec (tuple): The (first_index, num, step) parameters of the axis.
+        start (int): The index of the first point of the slice.
+        stop (int): The index after the last point of the slice.
+
+    Returns:
+        tuple: The (first_index, num, step) parameters of the slice.
+    """
+    first, _, step = spec
+    return first + start, stop - start, step
+
+
+def split_tiles(shape, tile_size=TILE_SIZE):
+    """
+    Split an image shape into rectangular tiles.
+
+    Args:
+        shape (tuple): The (rows, columns) shape of the image.
+        tile_size (int): The maximum height and width of a tile. Defaults to TILE_SIZE.
+
+    Returns:
+        list: The (row_start, row_stop, col_start, col_stop) bounds of every tile.
+    """
+    rows, cols = shape
+    return [(r0, min(r0 + tile_size, rows), c0, min(c0 + tile_size, cols))
+            for r0 in range(0, rows, tile_size)
+            for c0 in range(0, cols, tile_size)]
+
+
+def compute_tile(shm_name, shape, re_spec, im_spec, bounds, precision, backend_name, shortcuts=True,
+                 strategy="full"):
+    """
+    Compute the iteration counts of one tile and write them into a shared-memory image.
+
+    Runs inside a worker process. Only the lattice parameters of the tile axes and its position are sent
+    to the worker, the grid itself is rebuilt locally so no large arrays are pickled.
+
+    Args:
+        shm_name (str): The name of the shared-memory block holding the int32 output image.
+        shape (tuple): The (rows, columns) shape of the output image.
+        re_spec (tuple): The lattice parameters of the real axis of the tile.
+        im_spec (tuple): The lattice parameters of the imaginary axis of the tile.
+        bounds (tuple): The (row_start, row_stop, col_start, col_stop) position of the tile in the output image.
+        precision (int): The maximum number of iterations.
+        backend_name (str): The name of the compute backend.
+        shortcuts (bool): Whether to use the interior shortcuts of the kernel. Defaults to True.
+        strategy (str): The rendering strategy, "full" or "subdivide". Defaults to "full".
+
+    Returns:
+        KernelStats: The work skipped by the interior shortcuts and subdivision.
+    """
+    r0, r1, c0, c1 = bounds
+    stats = KernelStats()
+    c = axis_values(re_spec)[np.newaxis, :] + 1j * axis_values(im_spec)[:, np.newaxis]
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        out = np.ndarray(shape, dtype=np.int32, buffer=shm.buf)
+        set_interior_checks(shortcuts)
+        out[r0:r1, c0:c1] = escape_time_grid(get_backend(backend_name), c, precision, stats=stats, strategy=strategy)
+        del out
+    finally:
+        shm.close()
+
+    return stats
+
+
+def get_pool(workers):
+    """
+    Get the shared process pool, recreating it if a different number of workers is requested.
+
+    Args:
+        workers (int): The number of worker processes.
+
+    Returns:
+        ProcessPoolExecutor: The process pool.
+    """
+    global _pool, _pool_workers
+    if _pool is None or _pool_workers != workers:
+        if _pool is not None:
+            _pool.shutdown()
+        _pool = ProcessPoolExecutor(max_workers=workers)
+        _pool_workers = workers
+    return _pool
+
+
+def run_tiles(shape, tiles, precision, backend_name, workers, token=None, stats=None, strategy=None):
+    """
+    Compute tiles in parallel worker processes, each written into its place in a shared-memory image.
+
+    The token is checked while waiting for tiles; on cancellation the tiles that have not started are dropped.
+
+    Args:
+        shape (tuple): The (rows, columns) shape of the output image.
+        tiles (list): The (re_spec, im_spec, bounds) of every tile, as taken by compute_tile.
+        precision (int): The maximum number of iterations.
+        backend_name (str): The name of the compute backend.
+        workers (int): The number of worker processes.
+        token (CancelToken, optional): Token checked while waiting for tiles. Defaults to None.
+        stats (KernelStats, optional): Counts updated with the work skipped by the interior shortcuts.
+            Defaults to None.
+        strategy (str, optional): The rendering strategy of every tile. Defaults to None (the default strategy).
+
+    Returns:
+        np.ndarray: The int32 output image.
+    """
+    nbytes = max(shape[0] * shape[1] * np.dtype(np.int32).itemsize, 1)
+    shortcuts = get_interior_checks()
+    strategy = strategy or get_default_strategy()
+    shm = shared_memory.SharedMemory(create=True, size=nbytes)
+    try:
+        pool = get_pool(workers)
+        pending = {pool.submit(compute_tile, shm.name, shape, re_spec, im_spec, bounds, precision, backend_name,
+                               shortcuts, strategy)
+                   for re_spec, im_spec, bounds in tiles}
+        while pending:
+            done, pending = wait(pending, timeout=0.1)
+            for future in done:
+                tile_stats = future.result()
+                if stats is not None:
+                    stats.add(tile_stats)
+            if token is not None and token.cancelled:
+                for future in pending:
+                    future.cancel()
+                check_token(token)
+
+        image = np.ndarray(shape, dtype=np.int32, buffer=shm.buf).copy()
+    finally:
+        shm.close()
+        shm.unlink()
+
+    return image
+
+
+def compute_tiled(re_spec, im_spec, precision, backend_name, workers, tile_size=TILE_SIZE, token=None, stats=None,
+                  strategy=None):
+    """
+    Compute an iteration-count image by splitting it into tiles computed in parallel worker processes.
+
+    Args:
+        re_spec (tuple): The lattice parameters of the real axis.
+        im_spec (tuple): The lattice parameters of the imaginary axis.
+        precision (int): The maximum number of iterations.
+        backend_name (str): The name of the compute backend.
+        workers (int): The number of worker processes.
+        tile_size (int): The maximum height and width of a tile. Defaults to TILE_SIZE.
+        token (CancelToken, optional): Token checked while waiting for tiles. Defaults to None.
+        stats (KernelStats, optional): Counts updated with the work skipped by the interior shortcuts.
+            Defaults to None.
+        strategy (str, optional): The rendering strategy of every tile. Defaults to None (the default strategy).
+
+    Returns:
+        np.ndarray: The int32 iteration-count image, rows along the imaginary axis.
+    """
+    shape = (im_spec[1], re_spec[1])
+    tiles = [(sub_spec(re_spec, c0, c1), sub_spec(im_spec, r0, r1), (r0, r1, c0, c1))
+             for r0, r1, c0, c1 in split_tiles(shape, tile_size)]
+    return run_tiles(shape, tiles, precision, backend_name, workers, token, stats, strategy)
+
+
+def set_default_workers(workers):
+    """
+    Set the number of worker processes used by calculations that do not ask for a specific number.
+
+    Args:
+        workers (int): The number of worker processes. 0 means one per CPU core.
+
+    Raises:
+        ValueError: If the number of workers is negative.
+    """
+    global _default_workers
+    if workers < 0:
+        raise ValueError(f"The number of workers must not be negative, got {workers}")
+    _default_workers = workers or os.cpu_count() or 1
+
+
+def get_default_workers():
+    """
+    Get the default number of worker processes.
+
+    Returns:
+        int: The default number of worker processes.
+    """
+    return _default_workers
@@ -0,0 +1,19 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from backends import get_backend  # noqa: E402
+
+
+@pytest.fixture(params=["numpy", "numba"])
+def backend(request):
+    """
+    Get every compute backend whose library is installed.
+    """
+    try:
+        return get_backend(request.param)
+    except ImportError:
+        pytest.skip(f"The {request.param} backend is not installed")
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from backends import CYCLE_TOLERANCE, JITTER_MAX
+
+# The r range of the bifurcation plot, then the period-doubling cascade and the chaotic region of the usual range.
+R_VALUES = np.concatenate([np.linspace(-2.0, 0.5, 2001), np.linspace(2.5, 4.0, 1501)])
+
+
+@pytest.mark.parametrize("precision", [50, 100, 1000])
+def test_cycle_detection_matches_full_iteration(backend, precision):
+    jitter = np.random.default_rng(0).integers(0, JITTER_MAX + 1, size=R_VALUES.size)
+    periods = np.zeros(R_VALUES.size, dtype=np.int64)
+    expected = backend.logistic(R_VALUES, 0.2, precision, jitter, shortcuts=False)
+    x = backend.logistic(R_VALUES, 0.2, precision, jitter, shortcuts=True, periods=periods)
+    np.testing.assert_allclose(x, expected, rtol=0, atol=10 * CYCLE_TOLERANCE)
+    assert periods.any()
+
+
+@pytest.mark.parametrize("r, period", [(-0.5, 1), (-1.2, 2), (2.5, 1), (3.2, 2), (3.5, 4), (3.55, 8)])
+def test_cycle_detection_finds_period(backend, r, period):
+    periods = np.zeros(1, dtype=np.int64)
+    backend.logistic(np.array([r]), 0.2, 1000, np.zeros(1, dtype=np.int64), shortcuts=True, periods=periods)
+    assert periods[0] == period
+
+
+def test_full_iteration_reports_no_periods(backend):
+    periods = np.ones(R_VALUES.size, dtype=np.int64)
+    backend.logistic(R_VALUES, 0.2, 100, np.zeros(R_VALUES.size, dtype=np.int64), shortcuts=False, periods=periods)
+    assert not periods.any()
+
+
+def test_lyapunov_full_iteration_matches_plain_loop(backend):
+    precision, samples = 100, 50
+    x = np.full(R_VALUES.size, 0.2)
+    expected = np.zeros(R_VALUES.size)
+    with np.errstate(divide="ignore"):
+        for i in range(precision + samples):
+            if i >= precision:
+                expected += np.log(np.abs(R_VALUES * (1 - 2 * x)))
+            x = R_VALUES * x * (1 - x)
+    exponents = backend.lyapunov(R_VALUES, 0.2, precision, samples, shortcuts=False)
+    np.testing.assert_allclose(exponents, expected / samples, rtol=1e-9, atol=1e-9)
+
+
+@pytest.mark.parametrize("r", [-1.2, -0.5, 2.8, 3.2, 3.5, 3.55])
+def test_lyapunov_cycle_matches_full_iteration(backend, r):
+    # 64 samples hold a whole number of periods of every cycle above, so both averages cover the same points.
+    periods = np.zeros(1, dtype=np.int64)
+    expected = backend.lyapunov(np.array([r]), 0.2, 1000, 64, shortcuts=False)
+    exponent = backend.lyapunov(np.array([r]), 0.2, 1000, 64, shortcuts=True, periods=periods)
+    np.testing.assert_allclose(exponent, expected, rtol=0, atol=1e-9)
+    assert periods[0] > 0
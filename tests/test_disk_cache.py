@@ -0,0 +1,31 @@
+import numpy as np
+
+from disk_cache import DEFAULT_MAX_BYTES, DiskCache, default_max_bytes, save_default_max_bytes
+
+PARAMS = {"kind": "test", "step": 0.5}
+
+
+def test_quick_results_are_not_written(tmp_path):
+    cache = DiskCache(directory=str(tmp_path), min_seconds=1.0)
+    cache.put(PARAMS, np.arange(10), seconds=0.1)
+    assert cache.get(PARAMS) is None
+    cache.put(PARAMS, np.arange(10), seconds=2.0)
+    np.testing.assert_array_equal(cache.get(PARAMS), np.arange(10))
+
+
+def test_disabling_keeps_entries(tmp_path):
+    cache = DiskCache(directory=str(tmp_path))
+    cache.put(PARAMS, np.arange(10))
+    cache.set_max_bytes(0)
+    assert cache.get(PARAMS) is None
+    cache.set_max_bytes(DEFAULT_MAX_BYTES)
+    np.testing.assert_array_equal(cache.get(PARAMS), np.arange(10))
+
+
+def test_default_budget(tmp_path, monkeypatch):
+    monkeypatch.delenv("LPF_DISK_CACHE_MB", raising=False)
+    assert default_max_bytes(str(tmp_path)) == DEFAULT_MAX_BYTES
+    save_default_max_bytes(5 * 2 ** 20, str(tmp_path))
+    assert default_max_bytes(str(tmp_path)) == 5 * 2 ** 20
+    monkeypatch.setenv("LPF_DISK_CACHE_MB", "2")
+    assert default_max_bytes(str(tmp_path)) == 2 * 2 ** 20
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from backends import JITTER_MAX
+
+# The full view of the Mandelbrot plot, then a patch of the boundary near the seahorse valley.
+FULL_VIEW = (np.arange(-2.0, 0.5, 0.01)[np.newaxis, :] + 1j * np.arange(-1.25, 1.25, 0.01)[:, np.newaxis])
+BOUNDARY = (np.linspace(-0.76, -0.73, 150)[np.newaxis, :] + 1j * np.linspace(0.08, 0.11, 150)[:, np.newaxis])
+R_VALUES = np.concatenate([np.linspace(-2.0, 0.5, 2001), np.linspace(2.5, 4.0, 1501)])
+
+
+def plain_escape_time(c, precision):
+    """
+    Iterate every point of the grid, masking the escaped ones, without any shortcut.
+    """
+    c = np.asarray(c, dtype=np.complex64)
+    z = np.zeros_like(c)
+    counts = np.full(c.shape, precision - 1, dtype=np.int32)
+    alive = np.ones(c.shape, dtype=bool)
+    with np.errstate(over="ignore", invalid="ignore"):
+        for i in range(precision):
+            escaped = alive & ~(np.abs(z) < 2)
+            counts[escaped] = i - 1
+            alive &= ~escaped
+            z[alive] = z[alive] * z[alive] + c[alive]
+    return counts
+
+
+def plain_logistic(r, x0, precision, jitter):
+    """
+    Iterate every lane of the logistic map for its own number of iterations, without cycle detection.
+    """
+    x = np.full(r.shape, x0, dtype=np.float64)
+    steps = precision + jitter
+    for i in range(int(steps.max())):
+        lanes = steps > i
+        x[lanes] = r[lanes] * x[lanes] * (1 - x[lanes])
+    return x
+
+
+@pytest.mark.parametrize("c", [FULL_VIEW, BOUNDARY], ids=["full", "boundary"])
+@pytest.mark.parametrize("precision", [50, 300, 1000])
+@pytest.mark.parametrize("shortcuts", [True, False])
+def test_escape_time_matches_plain_loop(backend, c, precision, shortcuts):
+    expected = plain_escape_time(c, precision)
+    np.testing.assert_array_equal(backend.escape_time(c, precision, shortcuts=shortcuts), expected)
+
+
+@pytest.mark.parametrize("precision", [50, 300])
+def test_logistic_matches_plain_loop(backend, precision):
+    jitter = np.random.default_rng(0).integers(0, JITTER_MAX + 1, size=R_VALUES.size)
+    expected = plain_logistic(R_VALUES, 0.2, precision, jitter)
+    x = backend.logistic(R_VALUES, 0.2, precision, jitter, shortcuts=False)
+    np.testing.assert_array_equal(x, expected)
@@ -0,0 +1,91 @@
+import numpy as np
+import pytest
+
+from disk_cache import DiskCache
+from cost_model import default_model
+from mandelbrot_calc import MandelbrotCalculation
+from tile_cache import TileCache
+from tiling import axis_values
+
+
+def calculation(backend, precision, tmp_path, **kwargs):
+    return MandelbrotCalculation(0.02, precision, backend=backend.name, workers=1, cache=TileCache(0),
+                                 disk_cache=DiskCache(directory=str(tmp_path), max_bytes=0), **kwargs)
+
+
+def brute_force(backend, mandel, precision):
+    re_spec, im_spec = mandel.axis_specs()
+    c = axis_values(re_spec)[np.newaxis, :] + 1j * axis_values(im_spec)[:, np.newaxis]
+    return backend.escape_time(c, precision, shortcuts=False)
+
+
+@pytest.mark.parametrize("band_rows", [None, 7])
+@pytest.mark.parametrize("precisions", [(50, 120), (100, 250), (20, 40, 300)])
+def test_raised_precision_matches_brute_force(backend, tmp_path, precisions, band_rows):
+    mandel = calculation(backend, precisions[0], tmp_path, strategy="full", band_rows=band_rows)
+    mandel.compute_iterations()
+    for lower, precision in zip(precisions, precisions[1:]):
+        mandel.set_precision(precision)
+        mandel.compute_iterations()
+        assert mandel.resumed_from == lower
+        np.testing.assert_array_equal(mandel.iterations, brute_force(backend, mandel, precision))
+
+
+def test_subdivided_resume_matches_brute_force(backend, tmp_path):
+    mandel = calculation(backend, 100, tmp_path, strategy="subdivide")
+    mandel.compute_iterations()
+    mandel.set_precision(250)
+    mandel.compute_iterations()
+    assert mandel.resumed_from == 100
+    np.testing.assert_array_equal(mandel.iterations, brute_force(backend, mandel, 250))
+
+
+def test_lowered_precision_matches_brute_force(backend, tmp_path):
+    mandel = calculation(backend, 250, tmp_path, strategy="full")
+    mandel.compute_iterations()
+    mandel.set_precision(80)
+    mandel.compute_iterations()
+    assert mandel.resumed_from == 250
+    np.testing.assert_array_equal(mandel.iterations, brute_force(backend, mandel, 80))
+
+
+def test_other_grid_starts_over(backend, tmp_path):
+    mandel = calculation(backend, 50, tmp_path, strategy="full")
+    mandel.compute_iterations()
+    mandel.set_step_count(0.03)
+    mandel.set_precision(120)
+    mandel.compute_iterations()
+    assert mandel.resumed_from is None
+    np.testing.assert_array_equal(mandel.iterations, brute_force(backend, mandel, 120))
+
+
+def test_state_is_passed_explicitly(backend, tmp_path):
+    first = calculation(backend, 50, tmp_path, strategy="full")
+    first.compute_iterations()
+    other = calculation(backend, 120, tmp_path, strategy="full")
+    other.compute_iterations()
+    assert other.resumed_from is None
+
+    resumed = calculation(backend, 120, tmp_path, strategy="full", state=first.state)
+    resumed.compute_iterations()
+    assert resumed.resumed_from == 50
+    np.testing.assert_array_equal(resumed.iterations, brute_force(backend, resumed, 120))
+
+
+def test_released_state_starts_over(backend, tmp_path):
+    mandel = calculation(backend, 50, tmp_path, strategy="full")
+    mandel.compute_iterations()
+    assert mandel.state.nbytes() >= mandel.iterations.size * 12
+    mandel.release_state()
+    assert mandel.state is None and mandel.z is None
+    mandel.set_precision(120)
+    mandel.compute_iterations()
+    assert mandel.resumed_from is None
+
+
+def test_plan_counts_kept_state():
+    model = default_model("numpy")
+    plan = model.plan_mandelbrot(100, 100, 100, budget=2 ** 30)
+    with_state = model.plan_mandelbrot(100, 100, 100, budget=2 ** 30, state_bytes=10 ** 6)
+    assert with_state.peak_bytes == plan.peak_bytes + 10 ** 6
+    assert not model.plan_mandelbrot(100, 100, 100, budget=2 * plan.peak_bytes, state_bytes=2 ** 30).fits
@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+
+import subdivision
+from backends import set_interior_checks
+from mandelbrot_calc import MandelbrotCalculation
+from subdivision import escape_time_grid, escape_time_subdivided
+
+# Small grids over the whole set, the seahorse valley and the period-2 bulb, with their precisions.
+GRIDS = [
+    ((-2.0, 0.5, -1.25, 1.25), 65, 50),
+    ((-2.0, 0.5, -1.25, 1.25), 120, 100),
+    ((-0.8, -0.7, 0.05, 0.15), 64, 200),
+    ((-1.5, -1.2, -0.15, 0.15), 97, 80),
+]
+
+# Subdivision is approximate: an escaping point between in-set samples can be filled with the count of its border.
+MAX_MISMATCH = 1e-4
+
+
+def grid(bounds, size):
+    restart, restop, imstart, imstop = bounds
+    return np.linspace(restart, restop, size)[np.newaxis, :] + 1j * np.linspace(imstart, imstop, size)[:, np.newaxis]
+
+
+def assert_mostly_equal(counts, expected):
+    differing = np.count_nonzero(counts != expected)
+    assert differing <= max(1, MAX_MISMATCH * expected.size), f"{differing} of {expected.size} points differ"
+
+
+@pytest.fixture
+def restore_defaults():
+    yield
+    set_interior_checks(True)
+    subdivision.set_default_strategy("full")
+
+
+@pytest.mark.parametrize("bounds, size, precision", GRIDS)
+def test_subdivision_matches_brute_force(backend, bounds, size, precision):
+    c = grid(bounds, size)
+    expected = backend.escape_time(c, precision, shortcuts=False)
+    assert_mostly_equal(escape_time_grid(backend, c, precision, strategy="subdivide"), expected)
+
+
+def test_subdivision_of_full_view_is_close_to_brute_force(backend):
+    _, _, c = MandelbrotCalculation(0.0037, 120, backend=backend.name).complex_grid()
+    expected = backend.escape_time(c, 120, shortcuts=False)
+    assert_mostly_equal(escape_time_grid(backend, c, 120, strategy="subdivide"), expected)
+
+
+@pytest.mark.parametrize("bounds, size, precision", GRIDS)
+def test_subdivision_fills_unknown_points_only(backend, bounds, size, precision):
+    c = grid(bounds, size)
+    expected = backend.escape_time(c, precision, shortcuts=False)
+    known = np.zeros(c.shape, dtype=bool)
+    known[::3, ::2] = True
+    counts = np.where(known, expected, -1).astype(np.int32)
+    escape_time_grid(backend, c, precision, strategy="subdivide", counts=counts, known=known)
+    np.testing.assert_array_equal(counts[known], expected[known])
+    assert_mostly_equal(counts, expected)
+
+
+@pytest.mark.parametrize("min_size", [2, 4, 8])
+def test_deep_subdivision_matches_brute_force(backend, min_size):
+    bounds, size, precision = GRIDS[1]
+    c = grid(bounds, size)
+    expected = backend.escape_time(c, precision, shortcuts=False)
+    assert_mostly_equal(escape_time_subdivided(backend, c, precision, min_size=min_size), expected)
+
+
+def test_subdivision_needs_shortcuts_disabled(restore_defaults):
+    set_interior_checks(True)
+    assert "subdivide" not in subdivision.available_strategies()
+    with pytest.raises(ValueError):
+        subdivision.set_default_strategy("subdivide")
+
+    set_interior_checks(False)
+    subdivision.set_default_strategy("subdivide")
+    assert subdivision.get_default_strategy() == "subdivide"
+    set_interior_checks(True)
+    assert subdivision.get_default_strategy() == "full"